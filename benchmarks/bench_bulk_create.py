@@ -0,0 +1,35 @@
+"""Compare one-at-a-time game setup with GameService.bulk_create_games."""
+import time
+
+from benchmarks.support import setup_django
+
+
+def run():
+    from django.contrib.auth import get_user_model
+    from game.services.game_service import GameService
+
+    User = get_user_model()
+    users = [User.objects.create(username=f"bench_user_{n}") for n in range(2)]
+    service = GameService()
+
+    count = 50
+    started = time.perf_counter()
+    for number in range(count):
+        game = service.create_game(users[0], f"single {number}", 15, 2)
+        service.add_player(game, users[1])
+    single = (time.perf_counter() - started) / count
+
+    for count in (100, 1000):
+        started = time.perf_counter()
+        service.bulk_create_games(
+            {"name": f"bulk {n}", "map_size": 15, "max_players": 2, "users": users}
+            for n in range(count)
+        )
+        elapsed = time.perf_counter() - started
+        print(f"bulk_create_games({count}): {elapsed:.2f}s ({elapsed / count * 1000:.2f} ms/game)")
+    print(f"create_game + add_player: {single * 1000:.2f} ms/game")
+
+
+if __name__ == "__main__":
+    setup_django()
+    run()
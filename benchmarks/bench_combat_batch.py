@@ -0,0 +1,58 @@
+"""Time CombatService.resolve_attacks for 1, 100 and 10,000 queued attacks."""
+import time
+
+from benchmarks.support import setup_django
+
+
+def make_battle(attacks):
+    """A game where each attacker stands next to one enemy infantry unit."""
+    from django.contrib.auth import get_user_model
+    from game.core.models import Game, Player, Unit
+
+    columns = 100
+    size = columns * 2
+    game = Game.objects.create(
+        name=f"battle-{attacks}",
+        map_size=size,
+        map_data={"size": size, "terrain": [["plains"] * size for _ in range(size)]},
+    )
+    User = get_user_model()
+    players = [
+        Player.objects.create(
+            game=game, player_number=n, resources=0,
+            user=User.objects.get_or_create(username=f"battle_player_{n}")[0],
+        )
+        for n in (1, 2)
+    ]
+
+    units = []
+    for index in range(attacks):
+        x, y = (index % columns) * 2, index // columns
+        units.append(Unit(game=game, player=players[0], unit_type="infantry", x_position=x, y_position=y))
+        units.append(Unit(game=game, player=players[1], unit_type="infantry", x_position=x + 1, y_position=y))
+    Unit.objects.bulk_create(units, batch_size=500)
+
+    attackers = Unit.objects.filter(game=game, player=players[0]).order_by("id")
+    queued = [
+        {"unit_id": unit.id, "target_x": unit.x_position + 1, "target_y": unit.y_position}
+        for unit in attackers
+    ]
+    return game, players[0], queued
+
+
+def run():
+    from game.services.combat_service import CombatService
+
+    service = CombatService()
+    for attacks in (1, 100, 10000):
+        game, player, queued = make_battle(attacks)
+        started = time.perf_counter()
+        results = service.resolve_attacks(game, player, queued)
+        elapsed = time.perf_counter() - started
+        assert all(result["valid"] for result in results)
+        print(f"{attacks:>6} attacks: {elapsed * 1000:9.1f} ms ({elapsed / attacks * 1e6:8.1f} us/attack)")
+
+
+if __name__ == "__main__":
+    setup_django()
+    run()
@@ -0,0 +1,149 @@
+"""Write contention under the database connection profiles.
+
+Writer threads run short read-modify-write transactions while reader
+threads count a game's units. Each SQLite profile runs in its own process
+against a fresh database file::
+
+    python -m benchmarks.bench_db_contention --seconds 5 --writers 8
+
+With ``DB_ENGINE=postgres`` (and the POSTGRES_* variables) the configured
+PostgreSQL database is measured instead.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.support import setup_django, make_game
+
+# name -> (use the settings' OPTIONS (PRAGMAs, IMMEDIATE transactions), keep connections)
+SQLITE_PROFILES = {
+    "sqlite-default": (False, False),
+    "sqlite-tuned": (True, False),
+    "sqlite-tuned-persistent": (True, True),
+}
+
+
+def worker(request, persistent, stop, stats):
+    from django.db import OperationalError, connection
+
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            request()
+        except OperationalError as e:
+            stats["errors"] += 1
+            stats["last_error"] = str(e)
+        else:
+            stats["latencies"].append((time.perf_counter() - started) * 1000)
+        if not persistent:
+            # What the request_finished handler does with CONN_MAX_AGE = 0
+            connection.close()
+    connection.close()
+
+
+def run_profile(writers, readers, seconds, persistent):
+    from django.db import transaction
+    from django.db.models import F
+    from game.core.models import Job, Player, Unit
+
+    game = make_game(30, 4, 50, 5, seed=1)
+    player_ids = list(game.players.values_list("id", flat=True))
+
+    def write():
+        with transaction.atomic():
+            player_id = player_ids[threading.get_ident() % len(player_ids)]
+            Player.objects.get(id=player_id)
+            Player.objects.filter(id=player_id).update(resources=F("resources") + 1)
+            Job.objects.create(kind="noop", game=game)
+
+    def read():
+        Unit.objects.filter(game=game).count()
+
+    stop = threading.Event()
+    results = {"write": [], "read": []}
+    threads = []
+    for kind, request, count in (("write", write, writers), ("read", read, readers)):
+        for _ in range(count):
+            stats = {"latencies": [], "errors": 0, "last_error": None}
+            results[kind].append(stats)
+            threads.append(threading.Thread(target=worker, args=(request, persistent, stop, stats)))
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    summary = {}
+    for kind, per_thread in results.items():
+        latencies = sorted(l for stats in per_thread for l in stats["latencies"])
+        errors = sum(stats["errors"] for stats in per_thread)
+        cuts = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else [0.0] * 99
+        summary[kind] = {
+            "ops_per_s": len(latencies) / seconds,
+            "errors": errors,
+            "p50_ms": cuts[49],
+            "p99_ms": cuts[98],
+            "last_error": next((s["last_error"] for s in per_thread if s["last_error"]), None),
+        }
+    return summary
+
+
+def print_summary(name, summary):
+    print(name)
+    for kind, row in summary.items():
+        print(
+            f"  {kind:<6} {row['ops_per_s']:>9.0f} ops/s  p50 {row['p50_ms']:>8.2f} ms"
+            f"  p99 {row['p99_ms']:>8.2f} ms  errors {row['errors']}"
+        )
+        if row["last_error"]:
+            print(f"         last error: {row['last_error']}")
+
+
+def child(args):
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "strategy_game.settings")
+    os.environ.setdefault("DJANGO_KEY", "benchmark")
+    from django.conf import settings
+
+    # Before the first connection: journal_mode is stored in the database file
+    tuned, persistent = SQLITE_PROFILES[args.profile]
+    if not tuned:
+        settings.DATABASES["default"]["OPTIONS"] = {}
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django(os.path.join(directory, "contention.sqlite3"))
+        summary = run_profile(args.writers, args.readers, args.seconds, persistent)
+    print(json.dumps(summary))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--profile", choices=list(SQLITE_PROFILES), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.profile:
+        child(args)
+        return
+    if os.environ.get("DB_ENGINE") == "postgres":
+        setup_django()
+        print_summary("postgres", run_profile(args.writers, args.readers, args.seconds, persistent=True))
+        return
+
+    for profile in SQLITE_PROFILES:
+        output = subprocess.check_output([
+            sys.executable, "-m", "benchmarks.bench_db_contention", "--profile", profile,
+            "--writers", str(args.writers), "--readers", str(args.readers), "--seconds", str(args.seconds),
+        ], text=True)
+        print_summary(profile, json.loads(output.strip().splitlines()[-1]))
+
+
+if __name__ == "__main__":
+    main()
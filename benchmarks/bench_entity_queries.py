@@ -0,0 +1,28 @@
+"""Compare per-game entity lookups through ``player__game`` against the
+denormalized ``game`` foreign key."""
+from benchmarks.support import setup_django, make_game, measure, report
+
+
+def run():
+    from game.core.models import Unit
+
+    for units_per_player in (100, 1000, 5000):
+        make_game(map_size=30, players=4, units_per_player=units_per_player, seed=1)
+        game = make_game(map_size=30, players=4, units_per_player=units_per_player, seed=2)
+
+        rows = [
+            ("occupancy via player__game", measure(
+                lambda: Unit.objects.filter(player__game=game, x_position=5, y_position=5).exists())),
+            ("occupancy via game", measure(
+                lambda: Unit.objects.filter(game=game, x_position=5, y_position=5).exists())),
+            ("list units via player__game", measure(
+                lambda: list(Unit.objects.filter(player__game=game)), repeat=20)),
+            ("list units via game", measure(
+                lambda: list(Unit.objects.filter(game=game)), repeat=20)),
+        ]
+        report(f"{units_per_player * 4} units per game", rows)
+
+
+if __name__ == "__main__":
+    setup_django()
+    run()
@@ -0,0 +1,112 @@
+"""100-unit group moves on a 128x128 map: per-unit A* versus a shared flow field."""
+import time
+from heapq import heappop, heappush
+
+from benchmarks.support import setup_django, make_game, measure, report
+
+
+def astar(grid, start, target):
+    """Cost of the cheapest path, searched for one unit on its own"""
+    size, costs = grid.size, grid.costs
+    tx, ty = grid.position(target)
+    best = {start: 0}
+    heap = [(0, 0, start)]
+    while heap:
+        _, g, current = heappop(heap)
+        if current == target:
+            return g
+        if g > best[current]:
+            continue
+        for neighbour in grid.neighbours(current):
+            cost = costs[neighbour]
+            if cost is None:
+                continue
+            ng = g + cost
+            if ng < best.get(neighbour, ng + 1):
+                best[neighbour] = ng
+                h = abs(neighbour % size - tx) + abs(neighbour // size - ty)
+                heappush(heap, (ng + h, ng, neighbour))
+    return None
+
+
+def timed(func):
+    started = time.perf_counter()
+    func()
+    return (time.perf_counter() - started) * 1e6
+
+
+def run():
+    from game.core.models import Unit
+    from game.services.game_service import GameService
+    from game.utils import pathfinding
+    from game.utils.pathfinding import ClusterGraph, CostGrid, FlowField, flow_field
+
+    game = make_game(128, 2, 100, 20, seed=3)
+    player = game.players.order_by("player_number").first()
+    units = list(Unit.objects.filter(player=player))
+    grid = CostGrid.for_game(game)
+    target = next(i for i in range(len(grid.costs) - 1, -1, -1) if grid.costs[i] is not None)
+    starts = {grid.index(u.x_position, u.y_position) for u in units}
+
+    def clear_caches():
+        for cache in (pathfinding._graph_cache, pathfinding._latest_graph, pathfinding._field_cache):
+            cache.clear()
+
+    def cold_field():
+        clear_caches()
+        flow_field(grid, target, starts)
+
+    graph = ClusterGraph.for_grid(grid)
+    rows = [
+        ("A* per unit (100 searches)", measure(lambda: [astar(grid, s, target) for s in starts], 3)),
+        ("flow field over the whole map", measure(lambda: FlowField(grid, target), 5)),
+        ("portal corridor + corridor flow field", measure(
+            lambda: FlowField(grid, target, graph.corridor(starts, target)), 5)),
+        ("flow_field, cold (graph build included)", measure(cold_field, 3)),
+        ("flow_field, cached", measure(lambda: flow_field(grid, target, starts), 1000)),
+    ]
+    report("path planning, 100 scattered units to the far corner", rows)
+
+    # A formation: 100 units packed into one corner, sent to the opposite one
+    block = {i for i in range(len(grid.costs)) if grid.position(i)[0] < 12 and grid.position(i)[1] < 12}
+    packed = set(sorted(i for i in block if grid.costs[i] is not None)[:100])
+    corridor = graph.corridor(packed, target)
+    rows = [
+        ("A* per unit (100 searches)", measure(lambda: [astar(grid, s, target) for s in packed], 3)),
+        ("flow field over the whole map", measure(lambda: FlowField(grid, target), 5)),
+        (f"corridor flow field ({len(corridor)} of {graph.per_side ** 2} clusters)", measure(
+            lambda: FlowField(grid, target, graph, graph.corridor(packed, target)), 5)),
+    ]
+    report("path planning, 100 packed units to the far corner", rows)
+
+    # A building changes the grid key: only the clusters around it are rebuilt
+    base = ClusterGraph(grid)
+    x, y = grid.position(grid.index(64, 64))
+    changed = list(grid.costs)
+    changed[grid.index(x, y)] = None
+    moved_grid = CostGrid(grid.size, changed)
+    rows = [
+        ("cluster graph, full build", measure(lambda: ClusterGraph(moved_grid), 3)),
+        ("cluster graph, one tile changed", measure(lambda: ClusterGraph(moved_grid, previous=base), 3)),
+    ]
+    report("cluster graph invalidation", rows)
+
+    tx, ty = grid.position(target)
+    service = GameService()
+    unit_ids = [u.id for u in units]
+
+    def reset_units():
+        Unit.objects.filter(id__in=[u.id for u in units]).update(has_moved=False)
+        for u in units:
+            Unit.objects.filter(id=u.id).update(x_position=u.x_position, y_position=u.y_position)
+
+    samples = []
+    for _ in range(5):
+        reset_units()
+        samples.append(timed(lambda: service.move_group(game, player, unit_ids, tx, ty)))
+    report("GameService.move_group, 100 units", [("mean of 5 (caches warm after the first)", sum(samples) / len(samples))])
+
+
+if __name__ == "__main__":
+    setup_django()
+    run()
@@ -0,0 +1,57 @@
+"""Throughput and latency of the database-backed JobQueue."""
+import statistics
+import time
+
+from benchmarks.support import setup_django, make_game
+
+
+def run():
+    from game.core.models import Job
+    from game.services.job_queue import JobQueue, job_handler
+
+    job_handler("noop")(lambda payload: None)
+    queue = JobQueue()
+    games = [make_game(10, 2, 1, 1, seed) for seed in range(10)]
+
+    count = 1000
+    started = time.perf_counter()
+    for n in range(count):
+        queue.enqueue("noop", {"n": n})
+    single = time.perf_counter() - started
+    print(f"enqueue: {count / single:,.0f} jobs/s")
+
+    Job.objects.all().delete()
+    started = time.perf_counter()
+    queue.enqueue_many(
+        Job(kind="noop", payload={"n": n}, game=games[n % len(games)]) for n in range(count)
+    )
+    bulk = time.perf_counter() - started
+    print(f"enqueue_many: {count / bulk:,.0f} jobs/s")
+
+    started = time.perf_counter()
+    processed = queue.work(worker_id="bench", burst=True)
+    drained = time.perf_counter() - started
+    print(f"worker, {len(games)} per-game ordered streams: {processed / drained:,.0f} jobs/s")
+
+    queue.enqueue_many(Job(kind="noop", payload={"n": n}) for n in range(count))
+    started = time.perf_counter()
+    processed = queue.work(worker_id="bench", burst=True)
+    drained = time.perf_counter() - started
+    print(f"worker, unordered jobs: {processed / drained:,.0f} jobs/s")
+
+    # Enqueue-to-finish latency with the worker keeping up with arrivals
+    latencies = []
+    for n in range(200):
+        queue.enqueue("noop", {"n": n}, game=games[n % len(games)])
+        queue.work(worker_id="bench", max_jobs=1)
+    for created, finished in Job.objects.filter(finished_at__isnull=False).order_by("-id").values_list(
+        "created_at", "finished_at"
+    )[:200]:
+        latencies.append((finished - created).total_seconds() * 1000)
+    cuts = statistics.quantiles(latencies, n=100)
+    print(f"latency: p50 {cuts[49]:.2f} ms, p95 {cuts[94]:.2f} ms, p99 {cuts[98]:.2f} ms")
+
+
+if __name__ == "__main__":
+    setup_django()
+    run()
@@ -0,0 +1,47 @@
+"""Line-of-sight checks for ranged attacks on a 128x128 map."""
+from benchmarks.support import setup_django, make_game, measure, report
+
+
+def run():
+    from game.utils.line_of_sight import SightMask, bresenham, BLOCKS_SIGHT
+    from game.utils.terrain import TerrainMap
+    from game.utils.terrain_grids import TerrainGrids
+
+    game = make_game(128, 2, 10, 0, seed=5)
+    terrain = TerrainMap.for_game(game)
+    sight = TerrainGrids.for_game(game).sight
+    x, y, attack_range = 64, 64, 3
+    cells = [
+        (x + dx, y + dy)
+        for dy in range(-attack_range, attack_range + 1)
+        for dx in range(-attack_range, attack_range + 1)
+        if (dx, dy) != (0, 0)
+    ]
+
+    def walk_each_ray():
+        # Bresenham traced per target against the terrain names
+        return [
+            c for c in cells
+            if not any(terrain.get(x + px, y + py) in BLOCKS_SIGHT for px, py in bresenham(c[0] - x, c[1] - y))
+        ]
+
+    def table_each_ray():
+        return [c for c in cells if sight.has_line_of_sight(x, y, *c)]
+
+    assert sorted(walk_each_ray()) == sorted(table_each_ray()) == sorted(sight.visible_cells(x, y, attack_range))
+    rows = [
+        ("traced rays, terrain lookups (48 targets)", measure(walk_each_ray, 2000)),
+        ("precomputed rays, sight mask (48 targets)", measure(table_each_ray, 2000)),
+        ("visible_cells window bitmask (all in range)", measure(lambda: sight.visible_cells(x, y, attack_range), 2000)),
+        ("single target, precomputed ray", measure(lambda: sight.has_line_of_sight(x, y, x + 3, y + 1), 20000)),
+    ]
+    report("archer at range 3", rows)
+    report("sight mask", [
+        ("built from terrain", measure(lambda: SightMask.from_rows(terrain.rows()), 50)),
+        ("cached per terrain version", measure(lambda: TerrainGrids.for_game(game).sight, 2000)),
+    ])
+
+
+if __name__ == "__main__":
+    setup_django()
+    run()
@@ -0,0 +1,36 @@
+"""Compare linear scans over the constants dicts with the compiled rules."""
+from benchmarks.support import measure, report
+from game.core.constants import UNIT_TYPES, BUILDING_TYPES, TERRAIN_TYPES
+from game.core.rules import RULES
+
+
+def scan_cost(types, name):
+    for data in types.values():
+        if data['name'] == name:
+            return data['cost']
+    return 0
+
+
+def scan_movement_cost(terrain):
+    for data in TERRAIN_TYPES.values():
+        if data['name'] == terrain:
+            return data['movement_cost']
+    return 1
+
+
+def run():
+    repeat = 100000
+    rows = [
+        ("unit cost (scan)", measure(lambda: scan_cost(UNIT_TYPES, 'siege'), repeat)),
+        ("unit cost (compiled)", measure(lambda: RULES.unit_cost('siege'), repeat)),
+        ("building cost (scan)", measure(lambda: scan_cost(BUILDING_TYPES, 'mine'), repeat)),
+        ("building cost (compiled)", measure(lambda: RULES.building_cost('mine'), repeat)),
+        ("movement cost (scan)", measure(lambda: scan_movement_cost('water'), repeat)),
+        ("movement cost (compiled)", measure(lambda: RULES.movement_cost('water'), repeat)),
+        ("damage modifier (compiled)", measure(lambda: RULES.damage_modifier('archer', 'forest'), repeat)),
+    ]
+    report("rules lookups", rows)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,69 @@
+"""Per-request cost of building the service graph versus the shared registry."""
+import tracemalloc
+
+from benchmarks.support import setup_django, make_game, measure, report
+
+
+def allocations(func, repeat=100):
+    """Mean bytes and blocks still allocated by ``func`` per call"""
+    func()
+    kept = []
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for _ in range(repeat):
+        kept.append(func())
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    return (
+        sum(stat.size_diff for stat in stats) / repeat,
+        sum(stat.count_diff for stat in stats) / repeat,
+    )
+
+
+def per_request_graph():
+    # What GameViewSet.__init__ used to build for every request
+    from game.services.game_service import GameService
+    from game.services.player_service import PlayerService
+
+    service = GameService()
+    service.player_service = PlayerService()
+    return service
+
+
+def run():
+    from django.contrib.auth import get_user_model
+    from django.test import Client
+    from game.services.registry import services
+
+    rows = [
+        ("service graph per request", measure(per_request_graph, 20000)),
+        ("registry lookup", measure(lambda: services.game, 20000)),
+    ]
+    report("service construction", rows)
+
+    print("retained allocations per request")
+    for label, func in (("service graph per request", per_request_graph), ("registry lookup", lambda: services.game)):
+        size, count = allocations(func)
+        print(f"  {label:<48} {size:>10.0f} B {count:>8.1f} blocks")
+
+    game = make_game(30, 4, 50, 5, seed=1)
+    user = get_user_model().objects.get(username="bench_player_1")
+    client = Client(HTTP_HOST="localhost")
+    client.force_login(user)
+    url = f"/api/games/{game.id}/state"
+
+    def rebuilt():
+        services.reset()
+        return client.get(url)
+
+    rows = [
+        ("state request, services rebuilt", measure(rebuilt, 200)),
+        ("state request, shared services", measure(lambda: client.get(url), 200)),
+    ]
+    report("GET /api/games/<id>/state", rows)
+
+
+if __name__ == "__main__":
+    setup_django()
+    run()
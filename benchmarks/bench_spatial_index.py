@@ -0,0 +1,50 @@
+"""Compare a full scan of a game's entities with SpatialIndex range queries."""
+import random
+
+from benchmarks.support import setup_django, measure, report
+
+
+class Entity:
+    class _meta:
+        model_name = "entity"
+
+    def __init__(self, pk, x, y, player_id):
+        self.pk = pk
+        self.x_position = x
+        self.y_position = y
+        self.player_id = player_id
+
+
+def scan(entities, x, y, radius, player_id):
+    return [
+        e for e in entities
+        if e.player_id != player_id
+        and max(abs(e.x_position - x), abs(e.y_position - y)) <= radius
+    ]
+
+
+def run():
+    from game.utils.spatial_index import SpatialIndex
+
+    rng = random.Random(0)
+    map_size = 128
+    for count in (100, 1000, 10000):
+        entities = [
+            Entity(pk, rng.randrange(map_size), rng.randrange(map_size), rng.randrange(4))
+            for pk in range(count)
+        ]
+        index = SpatialIndex()
+        for entity in entities:
+            index.add(entity)
+
+        rows = [
+            ("full scan, radius 3", measure(lambda: scan(entities, 64, 64, 3, 0), 200)),
+            ("grid index, radius 3", measure(lambda: index.enemies_within(64, 64, 3, 0), 200)),
+            ("grid index, nearest enemy", measure(lambda: index.nearest_enemy(64, 64, 0), 200)),
+        ]
+        report(f"{count} entities on {map_size}x{map_size}", rows)
+
+
+if __name__ == "__main__":
+    setup_django()
+    run()
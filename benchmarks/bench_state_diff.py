@@ -0,0 +1,37 @@
+"""Bytes per state poll for a 4-player 30x30 game: full snapshot vs patch."""
+import json
+
+from benchmarks.support import setup_django, make_game
+
+
+def encoded_size(payload):
+    return len(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+
+
+def run():
+    from game.core.models import Unit
+    from game.services.state_diff_service import StateDiffService
+
+    service = StateDiffService()
+    for units_per_player in (10, 50):
+        game = make_game(map_size=30, players=4, units_per_player=units_per_player, buildings_per_player=3)
+
+        full = service.get_state(game.id, None)
+        unchanged = service.get_state(game.id, None, since=full["version"])
+
+        moved = list(Unit.objects.filter(game=game)[:2])
+        for unit in moved:
+            unit.x_position = (unit.x_position + 1) % 30
+            unit.has_moved = True
+        Unit.objects.bulk_update(moved, ["x_position", "has_moved"])
+        patch = service.get_state(game.id, None, since=full["version"])
+
+        print(f"{units_per_player * 4} units:")
+        print(f"  full snapshot          {encoded_size(full):>8} bytes")
+        print(f"  patch, nothing changed {encoded_size(unchanged):>8} bytes")
+        print(f"  patch, two units moved {encoded_size(patch):>8} bytes")
+
+
+if __name__ == "__main__":
+    setup_django()
+    run()
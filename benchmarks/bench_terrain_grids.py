@@ -0,0 +1,50 @@
+"""Per-tile rule lookups through terrain names versus the precomputed grids."""
+from benchmarks.support import setup_django, measure, report
+
+
+def run():
+    from django.contrib.auth import get_user_model
+    from game.core.rules import RULES
+    from game.services.game_service import GameService
+    from game.utils.terrain import TerrainMap
+    from game.utils.terrain_grids import TerrainGrids
+
+    user, _ = get_user_model().objects.get_or_create(username="bench_player_1")
+    game = GameService().create_game(user, "grids", 128, 2)
+    game.refresh_from_db()
+    terrain = TerrainMap.for_game(game)
+    terrain.rows()  # load every chunk so lookups measure indexing only
+    grids = TerrainGrids.for_game(game)
+    grids.movement_costs()  # build every chunk's grids
+    tiles = [(x, y) for y in range(0, 128, 3) for x in range(0, 128, 3)]
+
+    rows = [
+        ("passable (terrain name)", measure(lambda: [terrain.get(x, y) != "water" for x, y in tiles], 50)),
+        ("passable (grid)", measure(lambda: [grids.passable(x, y) for x, y in tiles], 50)),
+        ("movement cost (compiled rules)", measure(lambda: [RULES.movement_cost(terrain.get(x, y)) for x, y in tiles], 50)),
+        ("movement cost (grid)", measure(lambda: [grids.movement_cost(x, y) for x, y in tiles], 50)),
+        ("damage modifier (compiled rules)", measure(
+            lambda: [RULES.damage_modifier("archer", terrain.get(x, y)) for x, y in tiles], 50)),
+        ("damage modifier (grid)", measure(lambda: [grids.damage_modifier("archer", x, y) for x, y in tiles], 50)),
+    ]
+    report(f"{len(tiles)} tiles of a chunked 128x128 map", rows)
+
+    def costs_from_names():
+        return [
+            RULES.movement_cost(tile) if RULES.terrain(tile).passable else None
+            for row in terrain.rows() for tile in row
+        ]
+
+    report("whole-map tables", [
+        ("movement costs from terrain names", measure(costs_from_names, 20)),
+        ("movement costs from built chunk grids", measure(grids.movement_costs, 20)),
+        ("all chunk grids derived from terrain", measure(lambda: TerrainGrids.from_rows(terrain.rows()).movement_costs(), 20)),
+    ])
+    report("one tile check on a fresh request", [
+        ("chunk grids cached per terrain version", measure(lambda: TerrainGrids.for_game(game).passable(70, 70), 2000)),
+    ])
+
+
+if __name__ == "__main__":
+    setup_django()
+    run()
@@ -0,0 +1,41 @@
+"""JSON vs MessagePack, keyed vs compact layout, for full state payloads."""
+import json
+
+import msgpack
+
+from benchmarks.support import setup_django, make_game, measure
+
+
+def run():
+    from game.api.renderers import packb, compact_state_payload
+    from game.services.state_diff_service import StateDiffService
+
+    service = StateDiffService()
+    print(f"{'units':>6} {'format':<16} {'bytes':>9} {'encode us':>10} {'decode us':>10}")
+    for units_per_player in (10, 100, 1000):
+        game = make_game(map_size=30, players=4, units_per_player=units_per_player, buildings_per_player=5)
+        payload = service.get_state(game.id, None)
+        variants = {
+            "json": payload,
+            "json compact": compact_state_payload(payload),
+            "msgpack": payload,
+            "msgpack compact": compact_state_payload(payload),
+        }
+        for name, data in variants.items():
+            if name.startswith("json"):
+                encode = lambda data=data: json.dumps(data, separators=(",", ":")).encode("utf-8")
+                decode = json.loads
+            else:
+                encode = lambda data=data: packb(data)
+                decode = lambda raw: msgpack.unpackb(raw, raw=False)
+            raw = encode()
+            repeat = 20 if units_per_player >= 1000 else 200
+            print(
+                f"{units_per_player * 4:>6} {name:<16} {len(raw):>9}"
+                f" {measure(encode, repeat):>10.1f} {measure(lambda: decode(raw), repeat):>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    setup_django()
+    run()
@@ -0,0 +1,53 @@
+"""Compare two ``benchmarks.suite`` result files and flag regressions.
+
+Exits with status 1 when any case got slower by more than ``--threshold``
+(a fraction, 0.20 by default) on the chosen ``--stat``, so it can gate CI.
+``min_us`` is the least noisy statistic on a busy machine::
+
+    python -m benchmarks.compare baseline.json current.json --threshold 0.15
+"""
+import argparse
+import json
+import sys
+
+
+def compare(baseline, current, threshold, stat="median_us"):
+    """``(case, old_us, new_us, change, regressed)`` rows for cases in both runs"""
+    rows = []
+    for key in sorted(set(baseline) & set(current)):
+        old = baseline[key][stat]
+        new = current[key][stat]
+        change = new / old - 1 if old else 0.0
+        rows.append((key, old, new, change, change > threshold))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.20)
+    parser.add_argument("--stat", choices=["min_us", "median_us", "mean_us"], default="median_us")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+
+    print(f"{baseline['revision']} -> {current['revision']}")
+    rows = compare(baseline["results"], current["results"], args.threshold, args.stat)
+    for key, old, new, change, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"  {key:<48} {old:>12.2f} {new:>12.2f} us {change:>+8.1%}{flag}")
+    for key in sorted(set(baseline["results"]) ^ set(current["results"])):
+        print(f"  {key:<48} only in {'baseline' if key in baseline['results'] else 'current'}")
+
+    regressions = sum(1 for row in rows if row[4])
+    if regressions:
+        print(f"{regressions} case(s) slower than {args.threshold:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
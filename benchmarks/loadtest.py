@@ -0,0 +1,380 @@
+"""Load generator for the game API and chat WebSockets.
+
+Creates users and their login sessions directly in the database, then drives a locally running server
+the way real clients do: each simulated game is created and joined through
+the API, both players poll ``state`` at client cadence and play their turns
+through ``take_turn``, and every player holds a WebSocket to
+``ws/chat/<game_id>/`` that sends a chat message now and then and times the
+echo. Run from the project root::
+
+    python -m benchmarks.loadtest --start-server --games 20 --duration 60
+
+Results are written to ``benchmarks/results/`` keyed by commit; pass
+``--compare <file>`` to print latency changes against an earlier run.
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import socket
+import statistics
+import struct
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlsplit
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+# Any 32 character token is accepted as long as cookie and header agree
+CSRF_TOKEN = "loadtestloadtestloadtestloadtest"
+
+
+def session_cookie(session_key):
+    return f"sessionid={session_key}; csrftoken={CSRF_TOKEN}"
+
+
+class Recorder:
+    """Latency samples and error counts per endpoint"""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, endpoint, started, ok=True):
+        if ok:
+            self.samples[endpoint].append((time.perf_counter() - started) * 1000)
+        else:
+            self.errors[endpoint] += 1
+
+    def summary(self, duration):
+        rows = {}
+        for endpoint in sorted(set(self.samples) | set(self.errors)):
+            samples = sorted(self.samples[endpoint])
+            errors = self.errors[endpoint]
+            total = len(samples) + errors
+            if len(samples) >= 2:
+                cuts = statistics.quantiles(samples, n=100)
+                p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+            else:
+                p50 = p95 = p99 = samples[0] if samples else None
+            rows[endpoint] = {
+                "requests": total,
+                "throughput": total / duration,
+                "p50_ms": p50,
+                "p95_ms": p95,
+                "p99_ms": p99,
+                "error_rate": errors / total if total else 0.0,
+            }
+        return rows
+
+
+class ApiClient:
+    """Blocking JSON client for one logged-in user, run on a thread pool"""
+
+    def __init__(self, base_url, session_key, recorder, executor):
+        self.base_url = base_url.rstrip("/")
+        self.session_key = session_key
+        self.headers = {
+            "Cookie": session_cookie(session_key),
+            "X-CSRFToken": CSRF_TOKEN,
+            "Content-Type": "application/json",
+        }
+        self.recorder = recorder
+        self.executor = executor
+
+    def _request(self, method, path, body):
+        data = None if body is None else json.dumps(body).encode()
+        request = urllib.request.Request(self.base_url + path, data=data, method=method, headers=self.headers)
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                return response.status, json.loads(response.read() or b"null")
+        except urllib.error.HTTPError as e:
+            return e.code, None
+        except (urllib.error.URLError, OSError):
+            return None, None
+
+    async def call(self, endpoint, method, path, body=None):
+        started = time.perf_counter()
+        status, payload = await asyncio.get_running_loop().run_in_executor(
+            self.executor, self._request, method, path, body
+        )
+        ok = status is not None and status < 400
+        self.recorder.record(endpoint, started, ok)
+        return payload if ok else None
+
+
+class WebSocket:
+    """Just enough of RFC 6455 to send text frames and read the replies"""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, host, port, path, cookie):
+        reader, writer = await asyncio.open_connection(host, port)
+        key = base64.b64encode(os.urandom(16)).decode()
+        writer.write((
+            f"GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\nUpgrade: websocket\r\n"
+            f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n"
+            f"Origin: http://{host}:{port}\r\nCookie: {cookie}\r\n\r\n"
+        ).encode())
+        status_line = await reader.readline()
+        while (await reader.readline()) not in (b"\r\n", b""):
+            pass
+        if b" 101 " not in status_line:
+            writer.close()
+            raise ConnectionError(status_line.decode(errors="replace").strip())
+        return cls(reader, writer)
+
+    async def send(self, text):
+        payload = text.encode()
+        mask = os.urandom(4)
+        header = bytearray([0x81])
+        if len(payload) < 126:
+            header.append(0x80 | len(payload))
+        elif len(payload) < 1 << 16:
+            header += bytes([0x80 | 126]) + struct.pack("!H", len(payload))
+        else:
+            header += bytes([0x80 | 127]) + struct.pack("!Q", len(payload))
+        masked = bytes(byte ^ mask[i % 4] for i, byte in enumerate(payload))
+        self.writer.write(bytes(header) + mask + masked)
+        await self.writer.drain()
+
+    async def receive(self):
+        """Next text message, or None once the server closes the socket"""
+        while True:
+            first, second = await self.reader.readexactly(2)
+            length = second & 0x7F
+            if length == 126:
+                length = struct.unpack("!H", await self.reader.readexactly(2))[0]
+            elif length == 127:
+                length = struct.unpack("!Q", await self.reader.readexactly(8))[0]
+            payload = await self.reader.readexactly(length)
+            opcode = first & 0x0F
+            if opcode == 0x8:
+                return None
+            if opcode == 0x1:
+                return payload.decode()
+
+    def close(self):
+        self.writer.close()
+
+
+async def websocket_client(base_url, session_key, game_id, recorder, deadline, chat_interval):
+    """Hold a chat socket open, timing the echo of an occasional message"""
+    parts = urlsplit(base_url)
+    started = time.perf_counter()
+    try:
+        ws = await WebSocket.connect(
+            parts.hostname, parts.port or 80, f"/ws/chat/{game_id}/", session_cookie(session_key)
+        )
+    except (OSError, ConnectionError):
+        recorder.record("ws_connect", started, ok=False)
+        return
+    recorder.record("ws_connect", started)
+
+    pending = {}
+    async def read():
+        while True:
+            message = await ws.receive()
+            if message is None:
+                return
+            data = json.loads(message)
+            sent = pending.pop(data.get("message"), None)
+            if sent is not None:
+                recorder.record("ws_chat_echo", sent)
+
+    reader = asyncio.create_task(read())
+    try:
+        while time.monotonic() < deadline and not reader.done():
+            token = os.urandom(6).hex()
+            pending[token] = time.perf_counter()
+            await ws.send(json.dumps({"type": "chat_message", "message": token}))
+            await asyncio.sleep(chat_interval)
+    except (OSError, ConnectionError):
+        recorder.record("ws_chat_echo", time.perf_counter(), ok=False)
+    finally:
+        reader.cancel()
+        ws.close()
+    for _ in pending:
+        recorder.record("ws_chat_echo", time.perf_counter(), ok=False)
+
+
+async def player_client(client, game_id, username, turns, deadline, poll_interval):
+    """Poll state at client cadence and play a turn whenever it is ours"""
+    version = None
+    current = None
+    played = 0
+    path = f"/api/games/{game_id}/state"
+    while played < turns and time.monotonic() < deadline:
+        query = "" if version is None else f"?since={version}"
+        payload = await client.call("state", "GET", path + query)
+        if payload is not None:
+            version = payload["version"]
+            if payload.get("full"):
+                current = payload["state"].get("current_player")
+            elif "current_player" in payload.get("set", {}):
+                current = payload["set"]["current_player"]
+        if current and current.get("username") == username:
+            result = await client.call(
+                "take_turn", "POST", f"/api/games/{game_id}/take_turn", {"actions": []}
+            )
+            if result is not None:
+                played += 1
+                current = None
+                continue
+        await asyncio.sleep(poll_interval)
+
+
+async def simulate_game(number, args, users, recorder, executor, deadline):
+    host, guest = (ApiClient(args.base_url, session_key, recorder, executor) for _, session_key in users)
+    created = await host.call("create_game", "POST", "/api/games/create_game", {
+        "name": f"load {number}", "map_size": args.map_size, "max_players": 2
+    })
+    if created is None:
+        return
+    game_id = created["game_id"]
+    if await guest.call("join", "POST", f"/api/games/{game_id}/join") is None:
+        return
+
+    tasks = [
+        player_client(client, game_id, name, args.turns, deadline, args.poll_interval)
+        for client, (name, _) in zip((host, guest), users)
+    ]
+    tasks += [
+        websocket_client(args.base_url, client.session_key, game_id, recorder, deadline, args.chat_interval)
+        for client in (host, guest)
+        for _ in range(args.sockets_per_game // 2 or 1)
+    ]
+    await asyncio.gather(*tasks)
+
+
+def create_users(count, prefix):
+    """Insert load-test users with a ready session each.
+
+    Sessions are created directly so the run measures the game endpoints
+    rather than password hashing on login.
+    """
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "strategy_game.settings")
+    import django
+    django.setup()
+    from django.contrib.auth import get_user_model, BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+    from django.contrib.auth.hashers import make_password
+    from django.contrib.sessions.backends.db import SessionStore
+
+    User = get_user_model()
+    password = make_password(None)
+    users = User.objects.bulk_create(
+        [User(username=f"{prefix}_{n}", password=password) for n in range(count)]
+    )
+    sessions = []
+    for user in users:
+        session = SessionStore()
+        session[SESSION_KEY] = str(user.pk)
+        session[BACKEND_SESSION_KEY] = "django.contrib.auth.backends.ModelBackend"
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.create()
+        sessions.append((user.username, session.session_key))
+    return sessions
+
+
+def start_server(base_url):
+    """Serve the ASGI app with daphne and wait until it accepts connections"""
+    parts = urlsplit(base_url)
+    process = subprocess.Popen([
+        sys.executable, "-m", "daphne", "-b", parts.hostname, "-p", str(parts.port or 80),
+        "strategy_game.asgi:application",
+    ])
+    for _ in range(100):
+        try:
+            socket.create_connection((parts.hostname, parts.port or 80), timeout=0.1).close()
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("Server did not start")
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_summary(rows, baseline=None):
+    print(f"{'endpoint':<14}{'req':>7}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>9}")
+    for endpoint, row in rows.items():
+        cells = [
+            f"{value:>10.2f}" if value is not None else f"{'-':>10}"
+            for value in (row["p50_ms"], row["p95_ms"], row["p99_ms"])
+        ]
+        line = (
+            f"{endpoint:<14}{row['requests']:>7}{row['throughput']:>9.1f}"
+            f"{''.join(cells)}{row['error_rate']:>8.1%}"
+        )
+        before = (baseline or {}).get(endpoint)
+        if before and before["p95_ms"] and row["p95_ms"]:
+            line += f"  p95 {(row['p95_ms'] / before['p95_ms'] - 1):+.0%}"
+        print(line)
+
+
+async def run(args, users):
+    recorder = Recorder()
+    deadline = time.monotonic() + args.duration
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        await asyncio.gather(*(
+            simulate_game(n, args, users[2 * n:2 * n + 2], recorder, executor, deadline)
+            for n in range(args.games)
+        ))
+    return recorder.summary(time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://127.0.0.1:8765")
+    parser.add_argument("--start-server", action="store_true", help="Launch daphne on --base-url first")
+    parser.add_argument("--games", type=int, default=10, help="Concurrent games to simulate")
+    parser.add_argument("--turns", type=int, default=5, help="Turns each player plays")
+    parser.add_argument("--duration", type=float, default=60, help="Stop after this many seconds")
+    parser.add_argument("--map-size", type=int, default=10)
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds between state polls")
+    parser.add_argument("--sockets-per-game", type=int, default=2, help="Chat sockets held open per game")
+    parser.add_argument("--chat-interval", type=float, default=5.0, help="Seconds between chat messages")
+    parser.add_argument("--concurrency", type=int, default=32, help="Maximum HTTP requests in flight")
+    parser.add_argument("--compare", type=Path, help="Earlier results file to compare against")
+    args = parser.parse_args()
+
+    users = create_users(args.games * 2, f"load_{int(time.time())}")
+    server = start_server(args.base_url) if args.start_server else None
+    try:
+        rows = asyncio.run(run(args, users))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    baseline = json.loads(args.compare.read_text())["endpoints"] if args.compare else None
+    print_summary(rows, baseline)
+
+    revision = git_revision()
+    RESULTS_DIR.mkdir(exist_ok=True)
+    path = RESULTS_DIR / f"loadtest-{revision}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    path.write_text(json.dumps({
+        "revision": revision,
+        "parameters": {key: value for key, value in vars(args).items() if key != "compare"},
+        "endpoints": rows,
+    }, indent=2, default=str))
+    print(f"Results written to {path}")
+
+
+if __name__ == "__main__":
+    main()
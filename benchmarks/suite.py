@@ -0,0 +1,190 @@
+"""Microbenchmark suite for the game services and helpers.
+
+Every case runs against seeded fixtures at several game sizes and records
+min / median / mean per-call times. Results are written as JSON so runs can
+be diffed with ``benchmarks.compare``::
+
+    python -m benchmarks.suite --output before.json
+    python -m benchmarks.suite --output after.json
+    python -m benchmarks.compare before.json after.json
+
+``--sizes small,medium`` skips the 10,000-entity games and ``--filter state``
+runs only cases whose name contains ``state``.
+"""
+import argparse
+import gc
+import json
+import platform
+import statistics
+import subprocess
+import time
+
+from benchmarks.support import setup_django, make_game
+
+# name -> (map_size, total entities); 90% units, 10% buildings over 4 players
+SIZES = {
+    "small": (10, 10),
+    "medium": (30, 1000),
+    "large": (100, 10000),
+}
+SEED = 1234
+
+CASES = []
+
+
+def case(func):
+    """Register ``func(fixture) -> callable`` as a benchmark case"""
+    CASES.append(func)
+    return func
+
+
+class Fixture:
+    """A seeded game of one size, shared by every case at that size"""
+
+    def __init__(self, size_name):
+        from game.core.models import Unit
+
+        self.size_name = size_name
+        self.map_size, entities = SIZES[size_name]
+        units_per_player = max(1, entities * 9 // 40)
+        buildings_per_player = max(1, entities // 40)
+        self.game = make_game(self.map_size, 4, units_per_player, buildings_per_player, seed=SEED)
+        self.game.refresh_from_db()
+        self.player = self.game.players.order_by("player_number").first()
+        self.unit = Unit.objects.filter(game=self.game).order_by("id").first()
+
+
+@case
+def generate_map(fixture):
+    from game.core.rng import stream
+    from game.utils.game_helpers import generate_map
+
+    return lambda: generate_map(fixture.map_size, stream(SEED, "map"))
+
+
+@case
+def calculate_visibility_map(fixture):
+    from game.utils.game_helpers import calculate_visibility_map
+
+    return lambda: calculate_visibility_map(fixture.game, fixture.player)
+
+
+@case
+def is_valid_move(fixture):
+    from game.utils.game_helpers import is_valid_move
+
+    unit = fixture.unit
+    x = unit.x_position + 1 if unit.x_position + 1 < fixture.map_size else unit.x_position - 1
+    return lambda: is_valid_move(unit, x, unit.y_position, fixture.game)
+
+
+@case
+def get_valid_targets(fixture):
+    from game.services.combat_service import CombatService
+
+    service = CombatService()
+    return lambda: service.get_valid_targets(fixture.unit, fixture.game)
+
+
+@case
+def get_game_state(fixture):
+    from game.services.state_service import GameStateService
+
+    service = GameStateService()
+    return lambda: service.get_game_state(fixture.game.id, None)
+
+
+@case
+def game_serializer(fixture):
+    from rest_framework.renderers import JSONRenderer
+    from game.api.serializers.game import GameSerializer
+    from game.core.models import Game
+
+    game = Game.objects.prefetch_related("players__user", "units", "buildings").get(id=fixture.game.id)
+    renderer = JSONRenderer()
+    return lambda: renderer.render(GameSerializer(game).data)
+
+
+@case
+def close_round(fixture):
+    from game.services.game_service import GameService
+    from game.services.job_queue import JobQueue
+
+    service, queue = GameService(), JobQueue()
+    game = fixture.game
+    last_index = game.players.filter(is_active=True).count() - 1
+
+    def close():
+        # The last player's turn ends: next_turn wraps and settle_round pays the round
+        game.current_player_index = last_index
+        service.next_turn(game)
+        queue.work("bench", burst=True)
+
+    return close
+
+
+def time_call(func, min_rounds=5, min_time=0.2):
+    """Per-call times in microseconds, repeating until both floors are met"""
+    func()
+    times = []
+    started = time.perf_counter()
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        while len(times) < min_rounds or time.perf_counter() - started < min_time:
+            call_started = time.perf_counter()
+            func()
+            times.append((time.perf_counter() - call_started) * 1e6)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return {
+        "rounds": len(times),
+        "min_us": min(times),
+        "median_us": statistics.median(times),
+        "mean_us": statistics.fmean(times),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run(size_names, name_filter=None, min_time=0.2):
+    results = {}
+    for size_name in size_names:
+        fixture = Fixture(size_name)
+        for func in CASES:
+            if name_filter and name_filter not in func.__name__:
+                continue
+            key = f"{func.__name__}[{size_name}]"
+            results[key] = time_call(func(fixture), min_time=min_time)
+            print(f"{key:<48} {results[key]['median_us']:>12.2f} us")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=",".join(SIZES), help="Comma-separated subset of " + ", ".join(SIZES))
+    parser.add_argument("--filter", default=None, help="Only run cases whose name contains this")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Seconds to spend timing each case")
+    parser.add_argument("--output", default=None, help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    setup_django()
+    results = run(args.sizes.split(","), args.filter, args.min_time)
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump({
+                "revision": git_revision(),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "results": results,
+            }, output, indent=2, sort_keys=True)
+
+
+if __name__ == "__main__":
+    main()
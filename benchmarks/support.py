@@ -0,0 +1,80 @@
+"""Shared setup for the standalone benchmark scripts.
+
+Benchmarks run against a throwaway in-memory SQLite database so they never
+touch ``db.sqlite3``. Run them from the project root, e.g.::
+
+    python -m benchmarks.bench_entity_queries
+"""
+import os
+import random
+import time
+
+import django
+
+
+def setup_django(database_name=":memory:"):
+    """Configure Django against a throwaway SQLite database and apply migrations."""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "strategy_game.settings")
+    os.environ.setdefault("DJANGO_KEY", "benchmark")
+
+    from django.conf import settings
+    if settings.DATABASES["default"]["ENGINE"].endswith("sqlite3"):
+        settings.DATABASES["default"]["NAME"] = database_name
+    django.setup()
+
+    from django.core.management import call_command
+    call_command("migrate", verbosity=0)
+
+
+def make_game(map_size=30, players=4, units_per_player=100, buildings_per_player=10, seed=0):
+    """Create a game populated with entities, bypassing per-row signals."""
+    from django.contrib.auth import get_user_model
+    from game.core.models import Game, Player, Unit, Building
+    from game.core.rng import stream
+    from game.utils.game_helpers import generate_map
+
+    rng = random.Random(seed)
+    User = get_user_model()
+    game = Game.objects.create(
+        name=f"bench-{map_size}-{units_per_player}",
+        map_size=map_size,
+        max_players=players,
+        rng_seed=seed,
+        map_data=generate_map(map_size, stream(seed, 'map')),
+    )
+    game_players = []
+    for number in range(1, players + 1):
+        user, _ = User.objects.get_or_create(username=f"bench_player_{number}")
+        game_players.append(Player.objects.create(game=game, user=user, player_number=number, resources=500))
+
+    units, buildings = [], []
+    for player in game_players:
+        for _ in range(units_per_player):
+            units.append(Unit(
+                game=game, player=player, unit_type="infantry",
+                x_position=rng.randrange(map_size), y_position=rng.randrange(map_size),
+            ))
+        for _ in range(buildings_per_player):
+            buildings.append(Building(
+                game=game, player=player, building_type="farm",
+                x_position=rng.randrange(map_size), y_position=rng.randrange(map_size),
+            ))
+    Unit.objects.bulk_create(units, batch_size=500)
+    Building.objects.bulk_create(buildings, batch_size=500)
+    return game
+
+
+def measure(func, repeat=200):
+    """Return the mean wall-clock time of ``func`` in microseconds."""
+    func()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def report(title, rows):
+    """Print ``(label, microseconds)`` rows as an aligned table."""
+    print(title)
+    for label, micros in rows:
+        print(f"  {label:<48} {micros:>10.2f} us")
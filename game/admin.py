@@ -1,5 +1,5 @@
 from django.contrib import admin
-from game.core.models import Game, Player, Unit, Building, Turn
+from game.core.models import Game, Player, Unit, Building, Turn, GameArchive, Job
 
 @admin.register(Game)
 class GameAdmin(admin.ModelAdmin):
@@ -41,3 +41,21 @@ class TurnAdmin(admin.ModelAdmin):
     list_filter = ("completed", "game")
     search_fields = ("player__user__username", "game__name")
     readonly_fields = ("created_at", "completed_at")
+
+
+@admin.register(GameArchive)
+class GameArchiveAdmin(admin.ModelAdmin):
+    """Admin interface for archived games"""
+    list_display = ("game", "archived_at")
+    search_fields = ("game__name",)
+    readonly_fields = ("game", "archived_at")
+    exclude = ("data",)
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    """Admin interface for queued background jobs"""
+    list_display = ("kind", "game", "status", "priority", "attempts", "run_after", "finished_at")
+    list_filter = ("status", "kind")
+    search_fields = ("kind", "game__name")
+    readonly_fields = ("created_at", "locked_by", "locked_at", "finished_at", "last_error")
@@ -0,0 +1,117 @@
+"""Replay of mutating game actions retried with the same ``Idempotency-Key``.
+
+The first request with a key runs normally and its response is stored per
+user, action and game; a retry with the same key gets the stored response
+back without touching the game tables. A retry that arrives while the first
+request is still running gets 409, and reusing a key with a different body
+gets 422. Server errors are not stored so they can be retried.
+
+Responses are kept in process memory, bounded by
+``GAME_IDEMPOTENCY_MAX_KEYS`` and ``GAME_IDEMPOTENCY_TTL``.
+"""
+import hashlib
+import json
+import logging
+import threading
+from functools import wraps
+from django.conf import settings
+from rest_framework import status
+from rest_framework.response import Response
+from game.utils.lru_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = 'HTTP_IDEMPOTENCY_KEY'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+
+_IN_FLIGHT = object()
+
+
+class IdempotencyStore:
+    """Stored responses plus hit / miss counters for retry metrics"""
+
+    def __init__(self, max_size=None, ttl=None):
+        self.cache = LRUCache(
+            max_size or getattr(settings, 'GAME_IDEMPOTENCY_MAX_KEYS', 10000),
+            ttl or getattr(settings, 'GAME_IDEMPOTENCY_TTL', 600),
+        )
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self._lock:
+            self.counts = {'requests': 0, 'replayed': 0, 'conflicts': 0, 'mismatches': 0}
+
+    def count(self, name):
+        with self._lock:
+            self.counts[name] += 1
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self.counts)
+        counts['hit_rate'] = counts['replayed'] / counts['requests'] if counts['requests'] else 0.0
+        counts['stored'] = len(self.cache)
+        return counts
+
+
+IDEMPOTENCY_STORE = IdempotencyStore()
+
+
+def _fingerprint(request):
+    body = json.dumps(request.data, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(body.encode('utf-8')).hexdigest()
+
+
+def idempotent(view_method):
+    """Make a mutating viewset action replay its response for a repeated key.
+
+    Requests without the header are processed as before.
+    """
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.META.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return Response({'error': 'Idempotency-Key is too long'}, status=status.HTTP_400_BAD_REQUEST)
+
+        store = IDEMPOTENCY_STORE
+        cache_key = (request.user.pk, view_method.__name__, kwargs.get('pk'), key)
+        fingerprint = _fingerprint(request)
+        store.count('requests')
+
+        if not store.cache.add(cache_key, _IN_FLIGHT):
+            stored = store.cache.get(cache_key)
+            if stored is _IN_FLIGHT:
+                store.count('conflicts')
+                return Response(
+                    {'error': 'A request with this Idempotency-Key is still being processed'},
+                    status=status.HTTP_409_CONFLICT
+                )
+            if stored is not None:
+                stored_fingerprint, status_code, data = stored
+                if stored_fingerprint != fingerprint:
+                    store.count('mismatches')
+                    return Response(
+                        {'error': 'Idempotency-Key was already used with a different request'},
+                        status=status.HTTP_422_UNPROCESSABLE_ENTITY
+                    )
+                store.count('replayed')
+                logger.debug("Replayed %s for key %s", view_method.__name__, key)
+                return Response(data, status=status_code, headers={REPLAYED_HEADER: 'true'})
+            # Expired between add() and get(); claim it again
+            store.cache.set(cache_key, _IN_FLIGHT)
+
+        try:
+            response = view_method(self, request, *args, **kwargs)
+        except Exception:
+            store.cache.delete(cache_key)
+            raise
+        if response.status_code >= 500:
+            store.cache.delete(cache_key)
+        else:
+            store.cache.set(cache_key, (fingerprint, response.status_code, response.data))
+        return response
+
+    return wrapper
@@ -0,0 +1,52 @@
+import msgpack
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.renderers import BaseRenderer
+
+# Entity lists that the compact layout turns into columns + rows
+COMPACT_COLLECTIONS = ('units', 'buildings')
+
+def _encode_default(obj):
+    return DjangoJSONEncoder().default(obj)
+
+def packb(data):
+    """Encode ``data`` as MessagePack, handling the types DRF's JSON encoder does"""
+    return msgpack.packb(data, use_bin_type=True, default=_encode_default)
+
+def compact_rows(items):
+    """``[{'id': 1, 'x': 2}, ...]`` -> ``{'columns': ['id', 'x'], 'rows': [[1, 2], ...]}``"""
+    columns = list(items[0].keys()) if items else []
+    return {
+        'columns': columns,
+        'rows': [[item.get(column) for column in columns] for item in items]
+    }
+
+def compact_state_payload(payload):
+    """Rewrite unit and building lists in a state or patch payload positionally.
+
+    Full snapshots carry the lists under ``state``; patches carry new
+    entities under ``<collection>.added``. Changed entries stay as dicts
+    since they only hold the fields that moved.
+    """
+    payload = dict(payload)
+    if 'state' in payload:
+        state = dict(payload['state'])
+        for key in COMPACT_COLLECTIONS:
+            if key in state:
+                state[key] = compact_rows(state[key])
+        payload['state'] = state
+    for key in COMPACT_COLLECTIONS:
+        if key in payload:
+            payload[key] = {**payload[key], 'added': compact_rows(payload[key]['added'])}
+    return payload
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return packb(data)
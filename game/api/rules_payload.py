@@ -0,0 +1,32 @@
+"""The constants endpoint payload, encoded once at import.
+
+Rules only change with a deploy, so the JSON body, its gzip form and a
+content-hash ETag are computed a single time per process.
+"""
+import gzip
+import hashlib
+import json
+from game.core.constants import (
+    UNIT_TYPES,
+    BUILDING_TYPES,
+    TERRAIN_TYPES,
+    MAP_SIZE_CHOICES,
+    MAX_PLAYERS_CHOICES,
+)
+from game.core.game_rules import GAME_RULES
+
+RULES_PAYLOAD = {
+    'unit_types': UNIT_TYPES,
+    'building_types': BUILDING_TYPES,
+    'terrain_types': TERRAIN_TYPES,
+    'map_size_choices': MAP_SIZE_CHOICES,
+    'max_players_choices': MAX_PLAYERS_CHOICES,
+    'game_rules': GAME_RULES
+}
+
+RULES_JSON = json.dumps(RULES_PAYLOAD, separators=(',', ':')).encode('utf-8')
+RULES_JSON_GZIP = gzip.compress(RULES_JSON, mtime=0)
+RULES_ETAG = f'"{hashlib.sha256(RULES_JSON).hexdigest()[:32]}"'
+
+# Clients may reuse the payload for a day, then revalidate with the ETag
+RULES_CACHE_CONTROL = 'public, max-age=86400'
@@ -2,6 +2,7 @@ from .action import (
     BuildActionSerializer,
     MoveActionSerializer,
     AttackActionSerializer,
-    TrainActionSerializer
+    TrainActionSerializer,
+    ActionListSerializer
 )
 from .game import GameCreateSerializer, GameSerializer, PlayerSerializer
\ No newline at end of file
@@ -6,77 +6,72 @@ class BaseActionSerializer(serializers.Serializer):
     type = serializers.CharField()
 
 class BuildActionSerializer(BaseActionSerializer):
-    building_type = serializers.ChoiceField(choices=BUILDING_TYPES.keys())
+    building_type = serializers.ChoiceField(choices=[data['name'] for data in BUILDING_TYPES.values()])
     x = serializers.IntegerField(min_value=0)
     y = serializers.IntegerField(min_value=0)
 
-    def validate(self, data):
-        if data['building_type'] not in BUILDING_TYPES:
-            raise serializers.ValidationError(f"Invalid building type: {data['building_type']}")
-        return data
-
 class MoveActionSerializer(BaseActionSerializer):
     unit_id = serializers.IntegerField()
     x = serializers.IntegerField(min_value=0)
     y = serializers.IntegerField(min_value=0)
 
-    def validate_unit_id(self, value):
-        try:
-            Unit.objects.get(id=value)
-        except Unit.DoesNotExist:
-            raise serializers.ValidationError(f"Unit with id {value} does not exist")
-        return value
-
 class AttackActionSerializer(BaseActionSerializer):
     unit_id = serializers.IntegerField()
     target_x = serializers.IntegerField(min_value=0)
     target_y = serializers.IntegerField(min_value=0)
 
-    def validate_unit_id(self, value):
-        try:
-            Unit.objects.get(id=value)
-        except Unit.DoesNotExist:
-            raise serializers.ValidationError(f"Unit with id {value} does not exist")
-        return value
-
 class TrainActionSerializer(BaseActionSerializer):
     barracks_id = serializers.IntegerField()
-    unit_type = serializers.ChoiceField(choices=UNIT_TYPES.keys())
+    unit_type = serializers.ChoiceField(choices=[data['name'] for data in UNIT_TYPES.values()])
 
-    def validate(self, data):
-        if data['unit_type'] not in UNIT_TYPES:
-            raise serializers.ValidationError(f"Invalid unit type: {data['unit_type']}")
-        
-        try:
-            barracks = Building.objects.get(id=data['barracks_id'])
-            if barracks.building_type != 'barracks':
-                raise serializers.ValidationError("Building must be a barracks")
-        except Building.DoesNotExist:
-            raise serializers.ValidationError(f"Barracks with id {data['barracks_id']} does not exist")
-        
-        return data
+ACTION_SERIALIZERS = {
+    'build': BuildActionSerializer,
+    'move_unit': MoveActionSerializer,
+    'attack': AttackActionSerializer,
+    'train_unit': TrainActionSerializer,
+}
 
 class ActionListSerializer(serializers.Serializer):
+    """Validates a whole turn's actions with one query per entity table.
+
+    Each action's fields are checked without touching the database. The
+    unit and barracks ids from every action are then loaded with a single
+    ``in_bulk`` each, scoped to ``context['player']``, and the instances
+    are attached to the validated actions as ``unit`` / ``barracks`` so the
+    action handlers do not fetch them again.
+    """
     actions = serializers.ListField(
         child=serializers.DictField(),
         allow_empty=True
     )
 
     def validate_actions(self, value):
+        validated = []
         for action in value:
             action_type = action.get('type')
-            if action_type == 'build':
-                serializer = BuildActionSerializer(data=action)
-            elif action_type == 'move_unit':
-                serializer = MoveActionSerializer(data=action)
-            elif action_type == 'attack':
-                serializer = AttackActionSerializer(data=action)
-            elif action_type == 'train_unit':
-                serializer = TrainActionSerializer(data=action)
-            else:
+            serializer_class = ACTION_SERIALIZERS.get(action_type)
+            if serializer_class is None:
                 raise serializers.ValidationError(f"Invalid action type: {action_type}")
-
+            serializer = serializer_class(data=action)
             if not serializer.is_valid():
                 raise serializers.ValidationError(serializer.errors)
-        
-        return value
\ No newline at end of file
+            validated.append(dict(serializer.validated_data))
+
+        player = self.context['player']
+        unit_ids = {action['unit_id'] for action in validated if 'unit_id' in action}
+        barracks_ids = {action['barracks_id'] for action in validated if 'barracks_id' in action}
+        units = Unit.objects.filter(player=player).in_bulk(unit_ids) if unit_ids else {}
+        buildings = Building.objects.filter(player=player).in_bulk(barracks_ids) if barracks_ids else {}
+
+        for action in validated:
+            if 'unit_id' in action:
+                action['unit'] = units.get(action['unit_id'])
+                if action['unit'] is None:
+                    raise serializers.ValidationError(f"Unit with id {action['unit_id']} does not exist")
+            if 'barracks_id' in action:
+                action['barracks'] = buildings.get(action['barracks_id'])
+                if action['barracks'] is None:
+                    raise serializers.ValidationError(f"Barracks with id {action['barracks_id']} does not exist")
+                if action['barracks'].building_type != 'barracks':
+                    raise serializers.ValidationError("Building must be a barracks")
+        return validated
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from game.core.models import Game, Player, Unit, Building
+from game.core.constants import GAME_MIN_MAP_SIZE, GAME_MAX_MAP_SIZE
 
 class PlayerSerializer(serializers.ModelSerializer):
     username = serializers.CharField(source='user.username', read_only=True)
@@ -47,5 +48,5 @@ class GameSerializer(serializers.ModelSerializer):
 
 class GameCreateSerializer(serializers.Serializer):
     name = serializers.CharField(max_length=255)
-    map_size = serializers.IntegerField(min_value=10, max_value=30)
+    map_size = serializers.IntegerField(min_value=GAME_MIN_MAP_SIZE, max_value=GAME_MAX_MAP_SIZE)
     max_players = serializers.IntegerField(min_value=2, max_value=4)
\ No newline at end of file
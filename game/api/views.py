@@ -1,32 +1,28 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action, api_view
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.throttling import UserRateThrottle
+from rest_framework.renderers import JSONRenderer, BrowsableAPIRenderer
 from django.shortcuts import get_object_or_404
+from django.core.exceptions import ValidationError
 from django.db.models import Prefetch
 from django.db import transaction
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
 import logging
 
 from game.core.models import Game, Player, Unit, Building
-from game.services.game_service import GameService
-from game.services.player_service import PlayerService
+from game.services.registry import services
+from game.utils.game_helpers import calculate_visibility_map
+from game.utils.terrain import TerrainMap
+from game.middleware import accepts_encoding
 from game.mixins import GameServiceMixin
 from .serializers import GameCreateSerializer, GameSerializer, PlayerSerializer
-from .serializers import (
-    BuildActionSerializer,
-    MoveActionSerializer,
-    AttackActionSerializer,
-    TrainActionSerializer
-)
-from game.core.constants import (
-    UNIT_TYPES,
-    BUILDING_TYPES,
-    TERRAIN_TYPES,
-    MAP_SIZE_CHOICES,
-    MAX_PLAYERS_CHOICES,
-)
-from game.core.game_rules import GAME_RULES 
+from .renderers import MessagePackRenderer, compact_state_payload
+from .serializers import ActionListSerializer
+from .idempotency import IDEMPOTENCY_STORE, idempotent
+from .rules_payload import RULES_JSON, RULES_JSON_GZIP, RULES_ETAG, RULES_CACHE_CONTROL
 
 logger = logging.getLogger(__name__)
 
@@ -35,12 +31,9 @@ class GameViewSet(viewsets.ModelViewSet, GameServiceMixin):
     serializer_class = GameSerializer
     permission_classes = [IsAuthenticated]
     throttle_classes = [UserRateThrottle]
-
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        self.game_service = GameService()
-        self.player_service = PlayerService()
-        self.game_service.player_service = self.player_service
+    renderer_classes = [JSONRenderer, BrowsableAPIRenderer, MessagePackRenderer]
+    # 64 chunks of 16x16 tiles cover a 128x128 viewport
+    max_terrain_chunks = 64
 
     def get_queryset(self):
         return Game.objects.select_related(
@@ -52,6 +45,7 @@ class GameViewSet(viewsets.ModelViewSet, GameServiceMixin):
         ).all()
 
     @action(detail=False, methods=['post'])
+    @idempotent
     def create_game(self, request):
         serializer = GameCreateSerializer(data=request.data)
         if not serializer.is_valid():
@@ -67,13 +61,15 @@ class GameViewSet(viewsets.ModelViewSet, GameServiceMixin):
             logger.info(f"Game {game.name} created successfully by {request.user.username}"
             )
             return Response({
-                "message": "Game created successfully"
+                "message": "Game created successfully",
+                "game_id": game.id
             }, status=status.HTTP_201_CREATED)
         except Exception as e:
             logger.error(f"Error creating game: {str(e)}", exc_info=True)
             return Response({"error": "Error creating game"}, status=status.HTTP_400_BAD_REQUEST)
 
     @action(detail=True, methods=['post'])
+    @idempotent
     def join(self, request, pk=None):
         """Join a game"""
         game = self.get_object()
@@ -84,6 +80,7 @@ class GameViewSet(viewsets.ModelViewSet, GameServiceMixin):
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
     @action(detail=True, methods=['post'])
+    @idempotent
     def leave(self, request, pk=None):
         """Leave a game"""
         game = self.get_object()
@@ -92,6 +89,7 @@ class GameViewSet(viewsets.ModelViewSet, GameServiceMixin):
         return Response({'status': 'success'})
 
     @action(detail=True, methods=['post'])
+    @idempotent
     def next_turn(self, request, pk=None):
         """Advance to next turn"""
         game = self.get_object()
@@ -102,6 +100,7 @@ class GameViewSet(viewsets.ModelViewSet, GameServiceMixin):
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
     @action(detail=True, methods=['post'])
+    @idempotent
     def move_unit(self, request, pk=None):
         """Move a unit to new coordinates"""
         game = self.get_object()
@@ -118,6 +117,28 @@ class GameViewSet(viewsets.ModelViewSet, GameServiceMixin):
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
     @action(detail=True, methods=['post'])
+    @idempotent
+    def move_group(self, request, pk=None):
+        """Move several units toward one target"""
+        game = self.get_object()
+        player = get_object_or_404(Player, user=request.user, game=game)
+
+        try:
+            units = self.game_service.move_group(
+                game, player, request.data.get('unit_ids'),
+                int(request.data.get('x')), int(request.data.get('y')),
+            )
+        except (TypeError, ValueError):
+            return Response({'error': 'unit_ids, x and y are required'}, status=status.HTTP_400_BAD_REQUEST)
+        except ValidationError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'status': 'success',
+            'moved': [{'id': unit.id, 'x': unit.x_position, 'y': unit.y_position} for unit in units],
+        })
+
+    @action(detail=True, methods=['post'])
+    @idempotent
     def build_structure(self, request, pk=None):
         """Build a structure at specified coordinates"""
         game = self.get_object()
@@ -134,6 +155,7 @@ class GameViewSet(viewsets.ModelViewSet, GameServiceMixin):
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
     @action(detail=True, methods=['post'])
+    @idempotent
     def train_unit(self, request, pk=None):
         game = self.get_object()
         player = get_object_or_404(Player, user=request.user, game=game)
@@ -152,30 +174,19 @@ class GameViewSet(viewsets.ModelViewSet, GameServiceMixin):
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
     @action(detail=True, methods=['post'])
+    @idempotent
     def take_turn(self, request, pk=None):
         game = self.get_object()
         player = get_object_or_404(Player, user=request.user, game=game)
 
-        # Validate actions
-        actions = request.data.get("actions", [])
-        for action in actions:
-            action_type = action.get('type')
-            if action_type == 'build':
-                serializer = BuildActionSerializer(data=action)
-            elif action_type == 'move_unit':
-                serializer = MoveActionSerializer(data=action)
-            elif action_type == 'attack':
-                serializer = AttackActionSerializer(data=action)
-            elif action_type == 'train_unit':
-                serializer = TrainActionSerializer(data=action)
-            else:
-                return Response(
-                    {"error": f"Invalid action type: {action_type}"},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-
-            if not serializer.is_valid():
-                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        # Validate all actions, resolving their units and barracks in bulk
+        serializer = ActionListSerializer(
+            data={"actions": request.data.get("actions", [])},
+            context={"player": player}
+        )
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        actions = serializer.validated_data["actions"]
 
         try:
             result = self.game_service.process_turn_actions(game, player, actions)
@@ -192,21 +203,82 @@ class GameViewSet(viewsets.ModelViewSet, GameServiceMixin):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @action(detail=True, methods=['post'])
+    def preview(self, request, pk=None):
+        """Dry-run a list of actions against the cached state without saving anything"""
+        player = get_object_or_404(Player.objects.select_related('user'), user=request.user, game_id=pk)
+        actions = request.data.get('actions', [])
+        if not isinstance(actions, list):
+            return Response({'error': 'actions must be a list'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(services.preview.preview(player.game_id, player, actions))
+
     @action(detail=True, methods=['get'])
     def state(self, request, pk=None):
-        """Get current game state"""
-        game = self.get_object()
-        current_player = self.game_service.get_current_player(game)
-        active_players = self.game_service.get_active_players(game)
-        
+        """Get current game state, or a patch from ``?since=<version>``.
+
+        Send ``Accept: application/msgpack`` for MessagePack and
+        ``?layout=compact`` for positional unit and building rows.
+        """
+        # Only the id is needed; the state service loads what it sends
+        game = get_object_or_404(Game.objects.only('id'), pk=pk)
+        since = request.query_params.get('since')
+        try:
+            since = int(since) if since is not None else None
+        except ValueError:
+            return Response({'error': 'since must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+        payload = services.state_diff.get_state(game.id, request.user, since)
+        if request.query_params.get('layout') == 'compact':
+            payload = compact_state_payload(payload)
+        return Response(payload)
+
+    @action(detail=True, methods=['get'])
+    def terrain(self, request, pk=None):
+        """Terrain chunks covering ``?x0=&y0=&x1=&y1=`` (inclusive tiles), or
+        around the requesting player's units and buildings with ``?visible=1``
+        """
+        game = get_object_or_404(Game.objects.only('id', 'map_size', 'map_data'), id=pk)
+        terrain = TerrainMap.for_game(game)
+        if request.query_params.get('visible'):
+            player = get_object_or_404(Player, user=request.user, game=game)
+            coords = terrain.chunks_for_cells(calculate_visibility_map(game, player))
+        else:
+            try:
+                x0, y0, x1, y1 = (int(request.query_params[key]) for key in ('x0', 'y0', 'x1', 'y1'))
+            except (KeyError, ValueError):
+                return Response({'error': 'x0, y0, x1 and y1 are required integers'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            coords = terrain.chunks_in_rect(x0, y0, x1, y1)
+        if len(coords) > self.max_terrain_chunks:
+            return Response({'error': f'At most {self.max_terrain_chunks} chunks per request'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        chunks = terrain.load_chunks(coords)
         return Response({
-            'game_id': game.id,
-            'current_turn': game.current_turn,
-            'current_player': PlayerSerializer(current_player).data if current_player else None,
-            'players': PlayerSerializer(active_players, many=True).data,
-            'map_data': game.map_data
+            'size': terrain.size,
+            'chunk_size': terrain.chunk_size,
+            'version': terrain.version,
+            'chunks': [{'cx': cx, 'cy': cy, 'terrain': rows} for (cx, cy), rows in chunks.items()],
         })
 
+    @action(detail=True, methods=['get'])
+    def targets(self, request, pk=None):
+        """Enemies the unit ``?unit_id=`` can attack now: in range and in line of sight"""
+        game = self.get_object()
+        player = get_object_or_404(Player, user=request.user, game=game)
+        unit = get_object_or_404(Unit, id=request.query_params.get('unit_id'), player=player)
+
+        targets = services.combat.get_valid_targets(unit, game, services.combat.get_index(game))
+        return Response([
+            {
+                'id': target.id,
+                'type': 'unit' if isinstance(target, Unit) else 'building',
+                'x': target.x_position,
+                'y': target.y_position,
+            }
+            for target in targets
+        ])
+
     @action(detail=True, methods=['get'])
     def combat_stats(self, request, pk=None):
         game = self.get_object()
@@ -225,11 +297,31 @@ class GameViewSet(viewsets.ModelViewSet, GameServiceMixin):
     
     @action(detail=False, methods=['get'])
     def constants(self, request):
-        return Response({
-            'unit_types': UNIT_TYPES,
-            'building_types': BUILDING_TYPES,
-            'terrain_types': TERRAIN_TYPES,
-            'map_size_choices': MAP_SIZE_CHOICES,
-            'max_players_choices': MAX_PLAYERS_CHOICES,
-            'game_rules': GAME_RULES
-        })
+        """Static rule data, pre-encoded once and cached by ETag"""
+        if RULES_ETAG in request.headers.get('If-None-Match', ''):
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        elif accepts_encoding(request, 'gzip'):
+            response = HttpResponse(RULES_JSON_GZIP, content_type='application/json')
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response = HttpResponse(RULES_JSON, content_type='application/json')
+        response['ETag'] = RULES_ETAG
+        response['Cache-Control'] = RULES_CACHE_CONTROL
+        patch_vary_headers(response, ['Accept-Encoding'])
+        return response
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def idempotency_stats(self, request):
+        """Retry counters for the Idempotency-Key replay cache"""
+        return Response(IDEMPOTENCY_STORE.stats())
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def export(self, request):
+        """Stream finished games as NDJSON for offline analysis"""
+        include_active = request.query_params.get('include_active') == 'true'
+        response = StreamingHttpResponse(
+            services.export.iter_ndjson(include_active=include_active),
+            content_type='application/x-ndjson'
+        )
+        response['Content-Disposition'] = 'attachment; filename="games.ndjson"'
+        return response
@@ -1,14 +1,58 @@
 import json
+from urllib.parse import parse_qs
+import msgpack
 from channels.generic.websocket import AsyncWebsocketConsumer
-class ChatConsumer(AsyncWebsocketConsumer):
+from game.api.renderers import packb
+from game.signals import LOBBY_GROUP
+
+class GameEventConsumer(AsyncWebsocketConsumer):
+    """Forwards ``game_update`` events to the client as JSON or MessagePack"""
+
+    def read_format(self):
+        # Clients opt into binary MessagePack frames with ?format=msgpack
+        query = parse_qs(self.scope.get('query_string', b'').decode())
+        self.use_msgpack = query.get('format', ['json'])[0] == 'msgpack'
+
+    async def game_update(self, event):
+        await self.send_payload({
+            'type': 'game_update',
+            'update_type': event['update_type'],
+            'data': event['data']
+        })
+
+    async def send_payload(self, payload):
+        if self.use_msgpack:
+            await self.send(bytes_data=packb(payload))
+        else:
+            await self.send(text_data=json.dumps(payload))
+
+
+class LobbyConsumer(GameEventConsumer):
+    async def connect(self):
+        self.read_format()
+        await self.channel_layer.group_add(LOBBY_GROUP, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, close_code):
+        await self.channel_layer.group_discard(LOBBY_GROUP, self.channel_name)
+
+
+class ChatConsumer(GameEventConsumer):
     async def connect(self):
         self.game_id = self.scope['url_route']['kwargs']['game_id']
         self.room_group_name = f'chat_{self.game_id}'
+        self.game_group_name = f'game_{self.game_id}'
+        self.read_format()
         await self.channel_layer.group_add(self.room_group_name, self.channel_name)
+        await self.channel_layer.group_add(self.game_group_name, self.channel_name)
         await self.accept()
 
-    async def receive(self, text_data):
-        data = json.loads(text_data)
+    async def disconnect(self, close_code):
+        await self.channel_layer.group_discard(self.room_group_name, self.channel_name)
+        await self.channel_layer.group_discard(self.game_group_name, self.channel_name)
+
+    async def receive(self, text_data=None, bytes_data=None):
+        data = msgpack.unpackb(bytes_data, raw=False) if bytes_data is not None else json.loads(text_data)
         if data['type'] == 'chat_message':
             await self.channel_layer.group_send(
                 self.room_group_name,
@@ -18,3 +62,10 @@ class ChatConsumer(AsyncWebsocketConsumer):
                     'username': self.scope['user'].username
                 }
             )
+
+    async def chat_message(self, event):
+        await self.send_payload({
+            'type': 'chat_message',
+            'message': event['message'],
+            'username': event['username']
+        })
@@ -1,6 +1,8 @@
 # Game Configuration Constants
 GAME_MIN_MAP_SIZE = 10
-GAME_MAX_MAP_SIZE = 30
+GAME_MAX_MAP_SIZE = 256
+# Terrain is stored and served in square chunks of this many tiles a side
+MAP_CHUNK_SIZE = 16
 GAME_MIN_PLAYERS = 2
 GAME_MAX_PLAYERS = 4
 
@@ -9,6 +11,9 @@ MAP_SIZE_CHOICES = [
     (10, "Small (10x10)"),
     (15, "Medium (15x15)"),
     (20, "Large (20x20)"),
+    (64, "Huge (64x64)"),
+    (128, "Continental (128x128)"),
+    (256, "World (256x256)"),
 ]
 
 # Player Count Options
@@ -18,6 +23,14 @@ MAX_PLAYERS_CHOICES = [
     (4, "4 Players"),
 ]
 
+# Starting kit for every new player
+STARTING_UNITS = {
+    'infantry': 2,
+}
+STARTING_BUILDINGS = {
+    'base': 1,
+}
+
 # Unit Types and Stats
 UNIT_TYPES = {
     'INFANTRY': {
@@ -94,26 +107,38 @@ BUILDING_TYPES = {
     }
 }
 
-# Terrain Types
+# Terrain Types (combat_modifier scales damage dealt to targets on that terrain)
 TERRAIN_TYPES = {
     'PLAINS': {
         'name': 'plains',
         'movement_cost': 1,
-        'spawn_weight': 0.6
+        'combat_modifier': 1.0,
+        'spawn_weight': 0.6,
+        'blocks_sight': False,
+        'buildable': True
     },
     'FOREST': {
         'name': 'forest',
         'movement_cost': 2,
-        'spawn_weight': 0.2
+        'combat_modifier': 0.8,
+        'spawn_weight': 0.2,
+        'blocks_sight': True,
+        'buildable': True
     },
     'MOUNTAIN': {
         'name': 'mountain',
         'movement_cost': 3,
-        'spawn_weight': 0.1
+        'combat_modifier': 0.7,
+        'spawn_weight': 0.1,
+        'blocks_sight': True,
+        'buildable': False
     },
     'WATER': {
         'name': 'water',
         'movement_cost': 'unlimited',
-        'spawn_weight': 0.1
+        'combat_modifier': 0.5,
+        'spawn_weight': 0.1,
+        'blocks_sight': False,
+        'buildable': False
     }
 }
\ No newline at end of file
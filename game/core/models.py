@@ -2,8 +2,17 @@ from django.db import models
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
-from .constants import UNIT_TYPES, BUILDING_TYPES
+from .constants import UNIT_TYPES, BUILDING_TYPES, GAME_MIN_MAP_SIZE, GAME_MAX_MAP_SIZE
+from .rng import new_seed
 from django.utils import timezone
+import json
+import secrets
+import zlib
+from django.core.serializers.json import DjangoJSONEncoder
+
+def new_terrain_token():
+    return secrets.token_hex(8)
+
 
 class Game(models.Model):
     name = models.CharField(max_length=100)
@@ -13,16 +22,25 @@ class Game(models.Model):
     max_players = models.IntegerField(default=2)
     map_size = models.CharField(
         max_length=20,
-        validators=[MinValueValidator(10), MaxValueValidator(20)],
+        validators=[MinValueValidator(GAME_MIN_MAP_SIZE), MaxValueValidator(GAME_MAX_MAP_SIZE)],
         default=10,
     )
     map_data = models.JSONField(default=dict, blank=True)
     current_turn = models.IntegerField(default=1)
     current_player_index = models.IntegerField(default=0)
+    turn_started_at = models.DateTimeField(default=timezone.now)
+    # Turn number that closed the last round whose income was paid
+    last_settled_turn = models.IntegerField(default=0)
+    rng_seed = models.BigIntegerField(default=new_seed)
     
     class Meta:
         ordering = ['-created_at']
-        
+
+    def save(self, *args, **kwargs):
+        # Keys terrain caches together with the id, which SQLite may reuse
+        self.map_data.setdefault('terrain_token', new_terrain_token())
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.name} (Turn {self.current_turn})"
 
@@ -41,6 +59,9 @@ class Player(models.Model):
         return f"{self.user.username} (Player {self.player_number})"
 
 class GameEntity(models.Model):
+    # ``game`` duplicates ``player.game`` so per-game lookups (occupancy,
+    # targeting, turn resets) stay on a single indexed table.
+    game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name="%(class)ss")
     player = models.ForeignKey(Player, on_delete=models.CASCADE, related_name="%(class)ss")
     x_position = models.PositiveIntegerField()
     y_position = models.PositiveIntegerField()
@@ -50,6 +71,11 @@ class GameEntity(models.Model):
     class Meta:
         abstract = True
 
+    def save(self, *args, **kwargs):
+        if self.game_id is None:
+            self.game_id = self.player.game_id
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.__class__.__name__} at ({self.x_position}, {self.y_position})"
 
@@ -66,6 +92,13 @@ class Unit(GameEntity):
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['game', 'x_position', 'y_position'], name='unit_game_position_idx'),
+        ]
+
+    def get_combat_power(self):
+        """Attack plus defense, scaled by remaining health."""
+        return (self.attack + self.defense) * self.health // 100
 
 class Building(GameEntity):
     BUILDING_CHOICES = [(data['name'], data['display']) for data in BUILDING_TYPES.values()]
@@ -75,6 +108,26 @@ class Building(GameEntity):
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['game', 'x_position', 'y_position'], name='building_game_position_idx'),
+        ]
+
+class MapChunk(models.Model):
+    """One ``MAP_CHUNK_SIZE`` square of a game's terrain.
+
+    Chunked games keep only the map size and chunk size in ``map_data`` and
+    load terrain a chunk at a time through ``game.utils.terrain.TerrainMap``.
+    """
+    game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name="map_chunks")
+    cx = models.PositiveIntegerField()
+    cy = models.PositiveIntegerField()
+    terrain = models.JSONField()
+
+    class Meta:
+        unique_together = ['game', 'cx', 'cy']
+
+    def __str__(self):
+        return f"Chunk ({self.cx}, {self.cy}) of game {self.game_id}"
 
 class Turn(models.Model):
     game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name="turns")
@@ -90,3 +143,72 @@ class Turn(models.Model):
         
     def __str__(self):
         return f"Turn {self.turn_number} - {self.player.user.username}"
+
+
+class GameArchive(models.Model):
+    """Compressed final state and turn history of a finished game.
+
+    Once a game is archived its units, buildings and turns are removed from
+    the hot tables and the state API is served from ``data`` instead.
+    """
+    game = models.OneToOneField(Game, on_delete=models.CASCADE, related_name="archive")
+    archived_at = models.DateTimeField(default=timezone.now)
+    data = models.BinaryField()
+
+    def __str__(self):
+        return f"Archive of {self.game.name}"
+
+    @staticmethod
+    def pack(payload):
+        return zlib.compress(json.dumps(payload, cls=DjangoJSONEncoder).encode("utf-8"))
+
+    def unpack(self):
+        return json.loads(zlib.decompress(bytes(self.data)))
+
+    def get_state(self):
+        return self.unpack()["state"]
+
+    def get_history(self):
+        return self.unpack()["history"]
+
+
+class Job(models.Model):
+    """A unit of deferred work picked up by ``manage.py run_jobs`` workers.
+
+    Higher ``priority`` runs first. Jobs tied to a game run strictly in the
+    order they were enqueued, one at a time per game.
+    """
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    kind = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict, blank=True)
+    game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name="jobs", null=True, blank=True)
+    priority = models.IntegerField(default=0)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-priority", "id"]
+        indexes = [
+            models.Index(fields=["status", "-priority", "run_after"], name="job_ready_idx"),
+            models.Index(fields=["game", "status"], name="job_game_status_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.id} ({self.status})"
@@ -0,0 +1,23 @@
+"""Deterministic random streams derived from a game's stored seed.
+
+A stream is a private ``random.Random`` seeded from a hash of the game seed
+and a label path such as ``('map',)``. The same seed and labels always give
+the same rolls, and separate streams share no state, so replays need no
+locking.
+"""
+import hashlib
+import random
+import secrets
+
+def new_seed():
+    """A fresh 63-bit seed that fits a signed BigIntegerField"""
+    return secrets.randbits(63)
+
+def derive_seed(seed, *labels):
+    """Mix ``seed`` and ``labels`` into a child seed"""
+    material = ":".join(str(part) for part in (seed, *labels)).encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(material, digest_size=8).digest(), "big")
+
+def stream(seed, *labels):
+    """An independent ``random.Random`` for ``seed`` and ``labels``"""
+    return random.Random(derive_seed(seed, *labels))
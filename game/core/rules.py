@@ -0,0 +1,123 @@
+"""Rules tables compiled once from ``constants.py``.
+
+Every unit, building and terrain type gets a small integer code. Stats live
+in tuples indexed by that code, so hot paths do one dict lookup (name to
+code) and then tuple indexing, instead of scanning the constants dicts.
+"""
+from collections import namedtuple
+from .constants import UNIT_TYPES, BUILDING_TYPES, TERRAIN_TYPES
+
+UnitStats = namedtuple('UnitStats', [
+    'code', 'name', 'display', 'health', 'attack', 'defense',
+    'movement_range', 'attack_range', 'cost'
+])
+BuildingStats = namedtuple('BuildingStats', [
+    'code', 'name', 'display', 'health', 'resource_production', 'cost'
+])
+TerrainStats = namedtuple('TerrainStats', [
+    'code', 'name', 'movement_cost', 'passable', 'combat_modifier', 'blocks_sight', 'buildable'
+])
+
+
+class CompiledRules:
+    def __init__(self, unit_types, building_types, terrain_types):
+        self.units = tuple(
+            UnitStats(
+                code=code,
+                name=data['name'],
+                display=data['display'],
+                health=data['health'],
+                attack=data['attack'],
+                defense=data['defense'],
+                movement_range=data['movement_range'],
+                attack_range=data['attack_range'],
+                cost=data['cost'],
+            )
+            for code, data in enumerate(unit_types.values())
+        )
+        self.buildings = tuple(
+            BuildingStats(
+                code=code,
+                name=data['name'],
+                display=data['display'],
+                health=data['health'],
+                resource_production=data['resource_production'],
+                cost=data['cost'],
+            )
+            for code, data in enumerate(building_types.values())
+        )
+        self.terrains = tuple(
+            TerrainStats(
+                code=code,
+                name=data['name'],
+                movement_cost=data['movement_cost'],
+                passable=isinstance(data['movement_cost'], int),
+                combat_modifier=data.get('combat_modifier', 1.0),
+                blocks_sight=data.get('blocks_sight', False),
+                buildable=data.get('buildable', True),
+            )
+            for code, data in enumerate(terrain_types.values())
+        )
+
+        self.unit_codes = {stats.name: stats.code for stats in self.units}
+        self.building_codes = {stats.name: stats.code for stats in self.buildings}
+        self.terrain_codes = {stats.name: stats.code for stats in self.terrains}
+        self.max_attack_range = max(stats.attack_range for stats in self.units)
+
+        # damage_modifiers[unit_code][terrain_code]. Units may override the
+        # terrain's default with a 'terrain_modifiers' mapping in constants.
+        self.damage_modifiers = tuple(
+            tuple(
+                data.get('terrain_modifiers', {}).get(terrain.name, terrain.combat_modifier)
+                for terrain in self.terrains
+            )
+            for data in unit_types.values()
+        )
+
+    def unit(self, unit_type):
+        """Stats for a unit type name, or None if unknown"""
+        code = self.unit_codes.get(unit_type)
+        return None if code is None else self.units[code]
+
+    def building(self, building_type):
+        """Stats for a building type name, or None if unknown"""
+        code = self.building_codes.get(building_type)
+        return None if code is None else self.buildings[code]
+
+    def terrain(self, terrain_type):
+        """Stats for a terrain type name, or None if unknown"""
+        code = self.terrain_codes.get(terrain_type)
+        return None if code is None else self.terrains[code]
+
+    def unit_cost(self, unit_type):
+        stats = self.unit(unit_type)
+        return stats.cost if stats else 0
+
+    def building_cost(self, building_type):
+        stats = self.building(building_type)
+        return stats.cost if stats else 0
+
+    def attack_range(self, unit_type):
+        stats = self.unit(unit_type)
+        return stats.attack_range if stats else 1
+
+    def movement_cost(self, terrain_type):
+        stats = self.terrain(terrain_type)
+        return stats.movement_cost if stats else 1
+
+    def terrain_modifier(self, terrain_type):
+        stats = self.terrain(terrain_type)
+        return stats.combat_modifier if stats else 1.0
+
+    def damage_modifier(self, unit_type, terrain_type):
+        """Damage multiplier for ``unit_type`` attacking onto ``terrain_type``"""
+        unit_code = self.unit_codes.get(unit_type)
+        terrain_code = self.terrain_codes.get(terrain_type)
+        if terrain_code is None:
+            return 1.0
+        if unit_code is None:
+            return self.terrains[terrain_code].combat_modifier
+        return self.damage_modifiers[unit_code][terrain_code]
+
+
+RULES = CompiledRules(UNIT_TYPES, BUILDING_TYPES, TERRAIN_TYPES)
@@ -0,0 +1,51 @@
+"""Send read-only request traffic to a database replica.
+
+Reads go to the ``replica`` alias only inside a safe (GET/HEAD/OPTIONS)
+request routed by ``game.middleware.ReplicaRoutingMiddleware``; everything else -
+writes, unsafe requests, transactions, job workers, management commands -
+uses the primary. After a client's successful write the middleware sets a
+short-lived cookie that keeps that client's reads on the primary for
+``GAME_REPLICA_PIN_SECONDS``, which should exceed the replica's worst lag,
+so clients always read their own writes. Code whose reads feed shared
+caches (state versions) opts out with ``replica_reads(False)``.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA = 'replica'
+PIN_COOKIE = 'db_pin'
+
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+@contextmanager
+def replica_reads(allowed=True):
+    """Allow (or forbid) replica reads for the duration of a block"""
+    token = _replica_reads.set(allowed)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            # Follow relations on the database the instance was loaded from
+            return instance._state.db
+        if _replica_reads.get() and REPLICA in connections.settings and not connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return REPLICA
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
+
@@ -0,0 +1,38 @@
+"""SQLite backend accepting Django 5.1's ``init_command`` and ``transaction_mode``.
+
+``init_command`` runs ``;``-separated statements (PRAGMAs) on every new
+connection. ``transaction_mode = "IMMEDIATE"`` takes the write lock when a
+transaction begins, so a read-then-write transaction waits out
+``busy_timeout`` instead of failing with "database is locked" when it tries
+to upgrade its lock. Once on Django 5.1 the stock backend takes the same
+OPTIONS and this one can go.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    init_command = ''
+    transaction_mode = 'DEFERRED'
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        self.init_command = params.pop('init_command', '')
+        self.transaction_mode = (params.pop('transaction_mode', None) or 'DEFERRED').upper()
+        if self.transaction_mode not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(
+                f"transaction_mode must be one of {', '.join(TRANSACTION_MODES)}"
+            )
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for statement in self.init_command.split(';'):
+            if statement.strip():
+                conn.execute(statement)
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute(f"BEGIN {self.transaction_mode}")
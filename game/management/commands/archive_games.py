@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+
+from game.services.registry import services
+
+
+class Command(BaseCommand):
+    help = "Compact finished games into compressed archives and delete their hot rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than-days",
+            type=int,
+            default=0,
+            help="Only archive games created at least this many days ago",
+        )
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=None,
+            help="Maximum number of games to archive in this run",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="List the games that would be archived without changing anything",
+        )
+
+    def handle(self, *args, **options):
+        service = services.archive
+
+        if options["dry_run"]:
+            games = service.get_archivable_games(options["older_than_days"])
+            if options["limit"] is not None:
+                games = games[:options["limit"]]
+            for game in games:
+                self.stdout.write(f"Would archive {game.id}: {game.name}")
+            return
+
+        archives = service.archive_finished_games(
+            older_than_days=options["older_than_days"],
+            limit=options["limit"],
+        )
+        for archive in archives:
+            self.stdout.write(f"Archived {archive.game_id} ({len(archive.data)} bytes)")
+        self.stdout.write(self.style.SUCCESS(f"Archived {len(archives)} game(s)"))
@@ -0,0 +1,50 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from game.core.constants import GAME_MIN_MAP_SIZE, GAME_MAX_MAP_SIZE, GAME_MAX_PLAYERS
+from game.services.registry import services
+
+
+class Command(BaseCommand):
+    help = "Create many games at once (e.g. for a tournament) with bulk inserts"
+
+    def add_arguments(self, parser):
+        parser.add_argument("count", type=int, help="Number of games to create")
+        parser.add_argument(
+            "--users",
+            required=True,
+            help="Comma-separated usernames joined to every game; the first one is the creator",
+        )
+        parser.add_argument("--map-size", type=int, default=GAME_MIN_MAP_SIZE)
+        parser.add_argument("--max-players", type=int, default=None)
+        parser.add_argument("--name-prefix", default="Tournament game")
+
+    def handle(self, *args, **options):
+        usernames = [name.strip() for name in options["users"].split(",") if name.strip()]
+        users_by_name = get_user_model().objects.in_bulk(usernames, field_name="username")
+        missing = [name for name in usernames if name not in users_by_name]
+        if missing:
+            raise CommandError(f"Unknown users: {', '.join(missing)}")
+        users = [users_by_name[name] for name in usernames]
+
+        map_size = options["map_size"]
+        if not GAME_MIN_MAP_SIZE <= map_size <= GAME_MAX_MAP_SIZE:
+            raise CommandError(f"Map size must be between {GAME_MIN_MAP_SIZE} and {GAME_MAX_MAP_SIZE}")
+        max_players = options["max_players"] or len(users)
+        if max_players > GAME_MAX_PLAYERS:
+            raise CommandError(f"At most {GAME_MAX_PLAYERS} players per game")
+
+        started = time.perf_counter()
+        games = services.game.bulk_create_games(
+            {
+                "name": f"{options['name_prefix']} {number}",
+                "map_size": map_size,
+                "max_players": max_players,
+                "users": users,
+            }
+            for number in range(1, options["count"] + 1)
+        )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"Created {len(games)} games in {elapsed:.2f}s"))
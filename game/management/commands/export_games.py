@@ -0,0 +1,44 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from game.services.export_service import ExportService
+
+
+class Command(BaseCommand):
+    help = "Stream finished games, turns and entities as NDJSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            "-o",
+            default="-",
+            help="File to write to, or '-' for stdout",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="Rows fetched from the database per round trip",
+        )
+        parser.add_argument(
+            "--include-active",
+            action="store_true",
+            help="Also export games that are still in progress",
+        )
+
+    def handle(self, *args, **options):
+        service = ExportService(chunk_size=options["chunk_size"])
+        lines = service.iter_ndjson(include_active=options["include_active"])
+
+        if options["output"] == "-":
+            for line in lines:
+                sys.stdout.write(line)
+            return
+
+        count = 0
+        with open(options["output"], "w", encoding="utf-8") as output:
+            for line in lines:
+                output.write(line)
+                count += 1
+        self.stderr.write(self.style.SUCCESS(f"Wrote {count} records to {options['output']}"))
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+
+from game.services.job_queue import JobQueue
+
+
+class Command(BaseCommand):
+    help = "Run a worker that processes queued background jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Exit once the queue is empty instead of polling for new jobs",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Seconds to wait between polls when the queue is empty",
+        )
+        parser.add_argument(
+            "--max-jobs",
+            type=int,
+            default=None,
+            help="Exit after processing this many jobs",
+        )
+        parser.add_argument(
+            "--worker-id",
+            default=None,
+            help="Name recorded on claimed jobs (defaults to host:pid)",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            processed = JobQueue().work(
+                worker_id=options["worker_id"],
+                burst=options["burst"],
+                poll_interval=options["poll_interval"],
+                max_jobs=options["max_jobs"],
+            )
+        except KeyboardInterrupt:
+            return
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} job(s)"))
@@ -0,0 +1,35 @@
+import asyncio
+
+from channels.layers import InMemoryChannelLayer, get_channel_layer
+from django.core.management.base import BaseCommand, CommandError
+
+from game.services.turn_scheduler import TurnScheduler
+
+
+class Command(BaseCommand):
+    help = (
+        "Enforce turn time limits: send countdown ticks and end turns that run out. "
+        "Needs a channel layer shared with the web processes (set REDIS_URL)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--time-limit",
+            type=int,
+            default=None,
+            help="Seconds per turn (defaults to GAME_SETTINGS['TURN_TIME_LIMIT'])",
+        )
+
+    def handle(self, *args, **options):
+        # This process learns of new turns, and reaches WebSocket clients,
+        # only through the channel layer
+        if isinstance(get_channel_layer(), InMemoryChannelLayer):
+            raise CommandError(
+                "The turn timer needs a shared channel layer; "
+                "set REDIS_URL so CHANNEL_LAYERS uses Redis"
+            )
+        scheduler = TurnScheduler(time_limit=options["time_limit"])
+        try:
+            asyncio.run(scheduler.run())
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.SUCCESS(f"Stopped; {len(scheduler)} game(s) were being timed"))
@@ -1,4 +1,13 @@
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
 from django.shortcuts import render
+from django.utils.cache import patch_vary_headers
+from game.db.routers import PIN_COOKIE, replica_reads
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
 class GameErrorMiddleware:
     def __init__(self, get_response):
@@ -14,4 +23,103 @@ class GameErrorMiddleware:
                 'title': 'Game Error',
                 'message': str(exception)
             }, status=400)
-        return None
\ No newline at end of file
+        return None
+
+def accepted_encodings(header):
+    """``{coding: q}`` from an Accept-Encoding header"""
+    codings = {}
+    for part in header.split(','):
+        coding, *params = [piece.strip() for piece in part.split(';')]
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        codings[coding.lower()] = quality
+    return codings
+
+
+def encoding_quality(codings, coding):
+    """Quality a client gives ``coding``, falling back to its ``*`` entry"""
+    return codings.get(coding, codings.get('*', 0.0))
+
+
+def accepts_encoding(request, coding):
+    codings = accepted_encodings(request.headers.get('Accept-Encoding', ''))
+    return encoding_quality(codings, coding) > 0
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """GZipMiddleware for large API payloads, preferring brotli if installed.
+
+    Only JSON and MessagePack bodies of at least ``GAME_COMPRESSION_MIN_SIZE``
+    bytes are compressed; smaller ones cost more CPU than they save on the
+    wire. HTML stays uncompressed because pages carry a CSRF token next to
+    reflected game and user names (BREACH). Accept-Encoding q-values are
+    honoured, so ``gzip;q=0`` turns gzip off.
+    """
+    compressible_types = (
+        'application/json',
+        'application/msgpack',
+    )
+
+    def process_response(self, request, response):
+        if not self._should_compress(response):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        codings = accepted_encodings(request.headers.get('Accept-Encoding', ''))
+        br, gzip = encoding_quality(codings, 'br'), encoding_quality(codings, 'gzip')
+        if brotli is not None and br > 0 and br >= gzip:
+            return self._compress_brotli(response)
+        if gzip > 0:
+            # Django's gzip path, with its BREACH padding
+            return super().process_response(request, response)
+        return response
+
+    def _compress_brotli(self, response):
+        content = brotli.compress(response.content)
+        if len(content) >= len(response.content):
+            return response
+        response.content = content
+        response.headers['Content-Length'] = str(len(content))
+        response.headers['Content-Encoding'] = 'br'
+        # The body is no longer byte-identical, so a strong ETag must weaken
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        return response
+
+    def _should_compress(self, response):
+        if response.streaming or response.has_header('Content-Encoding'):
+            return False
+        if response.status_code != 200 or len(response.content) < getattr(settings, 'GAME_COMPRESSION_MIN_SIZE', 1024):
+            return False
+        content_type = response.get('Content-Type', '').split(';')[0].strip()
+        return content_type in self.compressible_types
+
+
+class ReplicaRoutingMiddleware:
+    """Let safe requests read from the replica unless the client recently wrote"""
+    safe_methods = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        safe = request.method in self.safe_methods
+        with replica_reads(safe and PIN_COOKIE not in request.COOKIES):
+            response = self.get_response(request)
+        if not safe and response.status_code < 400:
+            response.set_cookie(
+                PIN_COOKIE, '1',
+                max_age=getattr(settings, 'GAME_REPLICA_PIN_SECONDS', 5),
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
@@ -0,0 +1,74 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_entity_game(apps, schema_editor):
+    Player = apps.get_model("game", "Player")
+    for model_name in ("Unit", "Building"):
+        model = apps.get_model("game", model_name)
+        for game_id, player_ids in _player_ids_by_game(Player).items():
+            model.objects.filter(player_id__in=player_ids, game__isnull=True).update(game_id=game_id)
+
+
+def _player_ids_by_game(Player):
+    player_ids = {}
+    for player_id, game_id in Player.objects.values_list("id", "game_id"):
+        player_ids.setdefault(game_id, []).append(player_id)
+    return player_ids
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("game", "0007_alter_player_resources"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="unit",
+            name="game",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="%(class)ss",
+                to="game.game",
+            ),
+        ),
+        migrations.AddField(
+            model_name="building",
+            name="game",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="%(class)ss",
+                to="game.game",
+            ),
+        ),
+        migrations.RunPython(backfill_entity_game, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="unit",
+            name="game",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="%(class)ss",
+                to="game.game",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="building",
+            name="game",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="%(class)ss",
+                to="game.game",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="unit",
+            index=models.Index(fields=["game", "x_position", "y_position"], name="unit_game_position_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="building",
+            index=models.Index(fields=["game", "x_position", "y_position"], name="building_game_position_idx"),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.0.2 on 2026-10-19 16:32
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0008_gameentity_game'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GameArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('data', models.BinaryField()),
+                ('game', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='archive', to='game.game')),
+            ],
+        ),
+    ]
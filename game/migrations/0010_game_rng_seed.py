@@ -0,0 +1,28 @@
+# Generated by Django 5.0.2 on 2026-10-19 16:39
+
+import game.core.rng
+from django.db import migrations, models
+
+
+def seed_existing_games(apps, schema_editor):
+    # AddField evaluates the default once, so give each game its own seed
+    Game = apps.get_model("game", "Game")
+    for row in Game.objects.only("id"):
+        row.rng_seed = game.core.rng.new_seed()
+        row.save(update_fields=["rng_seed"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0009_gamearchive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='rng_seed',
+            field=models.BigIntegerField(default=game.core.rng.new_seed),
+        ),
+        migrations.RunPython(seed_existing_games, migrations.RunPython.noop),
+    ]
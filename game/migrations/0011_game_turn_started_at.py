@@ -0,0 +1,19 @@
+# Generated by Django 5.0.2 on 2026-10-19 16:45
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0010_game_rng_seed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='turn_started_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.2 on 2026-10-19 17:12
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0012_job'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='game',
+            name='map_size',
+            field=models.CharField(default=10, max_length=20, validators=[django.core.validators.MinValueValidator(10), django.core.validators.MaxValueValidator(256)]),
+        ),
+        migrations.CreateModel(
+            name='MapChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cx', models.PositiveIntegerField()),
+                ('cy', models.PositiveIntegerField()),
+                ('terrain', models.JSONField()),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='map_chunks', to='game.game')),
+            ],
+            options={
+                'unique_together': {('game', 'cx', 'cy')},
+            },
+        ),
+    ]
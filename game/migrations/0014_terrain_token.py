@@ -0,0 +1,23 @@
+import secrets
+
+from django.db import migrations
+
+
+def add_terrain_tokens(apps, schema_editor):
+    # Terrain caches are keyed by (id, token, version); ids alone can be reused
+    Game = apps.get_model("game", "Game")
+    for row in Game.objects.only("id", "map_data"):
+        if "terrain_token" not in row.map_data:
+            row.map_data["terrain_token"] = secrets.token_hex(8)
+            row.save(update_fields=["map_data"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0013_map_chunk'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_terrain_tokens, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.2 on 2026-10-19 17:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0014_terrain_token'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='last_settled_turn',
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -1,15 +1,17 @@
-from game.services.game_service import GameService
+from game.services.registry import services
 
 class GameServiceMixin:
+    """Views get the process-wide services from the registry"""
     _game_service = None
-    _service_class = GameService
 
     @property
     def game_service(self):
-        if self._game_service is None:
-            self._game_service = self._service_class()
-        return self._game_service
+        return self._game_service or services.game
 
     @game_service.setter
     def game_service(self, service):
         self._game_service = service
+
+    @property
+    def player_service(self):
+        return self.game_service.player_service
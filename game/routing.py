@@ -2,5 +2,6 @@ from django.urls import re_path
 from . import consumers
 
 websocket_urlpatterns = [
+    re_path(r"ws/lobby/$", consumers.LobbyConsumer.as_asgi()),
     re_path(r"ws/chat/(?P<game_id>\w+)/$", consumers.ChatConsumer.as_asgi()),
 ]
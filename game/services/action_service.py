@@ -4,17 +4,36 @@ from game.core.models import Building, Unit, Turn, Game, Player
 from game.utils.game_helpers import (
     is_valid_build_position,
     is_valid_move,
-    is_valid_attack,
-    calculate_damage,
-    advance_game_if_all_turns_complete
+    is_valid_attack
 )
 from game.utils.resource_helpers import get_building_cost, get_unit_cost
+from game.utils.spatial_index import build_spatial_index
 
 class BaseActionHandler:
     def __init__(self, player, combat_service):
         self.player = player
         self.game = player.game
         self.combat_service = combat_service
+        self._spatial_index = None
+
+    @property
+    def spatial_index(self):
+        """Entity positions for this turn, built on first use"""
+        if self._spatial_index is None:
+            self._spatial_index = build_spatial_index(self.game)
+        return self._spatial_index
+
+    def track_entity(self, entity):
+        """Keep the turn's spatial index in step with a moved or spawned entity"""
+        if self._spatial_index is not None:
+            self._spatial_index.add(entity)
+
+    def resolve_unit(self, action):
+        """The acting unit, as resolved by ActionListSerializer or fetched"""
+        unit = action.get('unit')
+        if unit is None:
+            unit = Unit.objects.get(id=action.get('unit_id'), player=self.player)
+        return unit
 
     def validate_resources(self, cost):
         if self.player.resources < cost:
@@ -48,11 +67,8 @@ class ActionService:
         if not game.is_active:
             raise ValueError("Game is not active")
 
-        current_player = game.get_current_player()
-        if current_player != player:
-            raise ValueError("Not your turn")
-
-        turn = Turn.objects.get_or_create(
+        # Whose turn it is was checked by GameService.process_turn_actions
+        turn, _ = Turn.objects.get_or_create(
             game=game,
             player=player,
             turn_number=game.current_turn
@@ -62,18 +78,27 @@ class ActionService:
             raise ValueError("Turn already completed")
 
         handler = BaseActionHandler(player, self.combat_service)
+        queued_attacks = []
         for action in actions:
             action_type = action.get('type')
             if action_type not in self.action_handlers:
                 raise ValueError(f"Invalid action type: {action_type}")
+            if action_type == 'attack':
+                queued_attacks.append(action)
+                continue
             self.action_handlers[action_type](handler, action)
 
+        # Attacks resolve together after movement, against one snapshot
+        if queued_attacks:
+            results = self.combat_service.resolve_attacks(game, player, queued_attacks, handler.spatial_index)
+            for result in results:
+                if not result['valid']:
+                    raise ValueError(result['error'])
+
         turn.completed = True
         turn.completed_at = timezone.now()
         turn.save()
 
-        advance_game_if_all_turns_complete(game)
-
         return True
 
     def process_action(self, game_id, user_or_player, action_type, action_data):
@@ -153,7 +178,7 @@ class ActionService:
 
     def _handle_move_action(self, handler, action):
         """Handle unit movement"""
-        unit = Unit.objects.get(id=action.get('unit_id'), player=handler.player)
+        unit = handler.resolve_unit(action)
         handler.validate_unit_action(unit, 'move')
 
         x, y = action.get('x'), action.get('y')
@@ -165,10 +190,11 @@ class ActionService:
         unit.y_position = y
         unit.has_moved = True
         unit.save()
+        handler.track_entity(unit)
 
     def _handle_attack_action(self, handler, action):
         """Handle unit attacks"""
-        unit = Unit.objects.get(id=action.get('unit_id'), player=handler.player)
+        unit = handler.resolve_unit(action)
         handler.validate_unit_action(unit, 'attack')
 
         target_x, target_y = action.get('target_x'), action.get('target_y')
@@ -203,7 +229,7 @@ class ActionService:
         barracks_id = action.get('barracks_id')
         unit_type = action.get('unit_type')
         
-        barracks = Building.objects.get(
+        barracks = action.get('barracks') or Building.objects.get(
             id=barracks_id,
             player=handler.player,
             building_type='barracks'
@@ -213,7 +239,7 @@ class ActionService:
         handler.validate_resources(cost)
 
         unit_stats = handler.combat_service.get_unit_stats(unit_type)
-        Unit.objects.create(
+        unit = Unit.objects.create(
             player=handler.player,
             unit_type=unit_type,
             x_position=barracks.x_position + 1,
@@ -224,6 +250,7 @@ class ActionService:
             movement_range=unit_stats.get('movement_range', 2),
             attack_range=unit_stats.get('attack_range', 1)
         )
+        handler.track_entity(unit)
 
         # Deduct resources
         handler.deduct_resources(cost)
\ No newline at end of file
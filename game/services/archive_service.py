@@ -0,0 +1,61 @@
+from datetime import timedelta
+from django.db import transaction
+from django.utils import timezone
+from game.core.models import Game, GameArchive, MapChunk, Unit, Building, Turn
+from game.signals import suppress_broadcasts
+from game.utils.terrain import TerrainMap
+from .state_service import GameStateService
+
+class ArchiveService:
+    def __init__(self, state_service=None):
+        self.state_service = state_service or GameStateService()
+
+    def get_archivable_games(self, older_than_days=0):
+        """Finished games that still have rows in the hot tables"""
+        cutoff = timezone.now() - timedelta(days=older_than_days)
+        return Game.objects.filter(
+            is_active=False,
+            archive__isnull=True,
+            created_at__lte=cutoff
+        ).order_by('id')
+
+    @transaction.atomic
+    def archive_game(self, game):
+        """Compact a finished game into a GameArchive and delete its hot rows"""
+        if game.is_active:
+            raise ValueError("Cannot archive an active game")
+        if GameArchive.objects.filter(game=game).exists():
+            raise ValueError("Game is already archived")
+
+        state = self.state_service.get_game_state(game.id, None)
+        # Archives are self-contained, so chunked terrain is stored whole
+        state['map_data']['terrain'] = TerrainMap.for_game(game).rows()
+        payload = {
+            'state': state,
+            'history': self._get_turn_history(game)
+        }
+        archive = GameArchive.objects.create(game=game, data=GameArchive.pack(payload))
+
+        with suppress_broadcasts():
+            Unit.objects.filter(game=game).delete()
+            Building.objects.filter(game=game).delete()
+            Turn.objects.filter(game=game).delete()
+            MapChunk.objects.filter(game=game).delete()
+            game.map_data = {}
+            game.save(update_fields=['map_data'])
+
+        return archive
+
+    def archive_finished_games(self, older_than_days=0, limit=None):
+        """Archive finished games one transaction at a time"""
+        games = self.get_archivable_games(older_than_days)
+        if limit is not None:
+            games = games[:limit]
+        return [self.archive_game(game) for game in games]
+
+    def _get_turn_history(self, game):
+        return list(
+            Turn.objects.filter(game=game).order_by('turn_number', 'player_id').values(
+                'turn_number', 'player_id', 'completed', 'created_at', 'completed_at'
+            )
+        )
@@ -1,17 +1,34 @@
 from django.db import transaction
 from django.core.exceptions import ValidationError
 from game.core.models import Unit, Building
-from game.core.game_rules import GAME_RULES
+from game.core.rules import RULES
+from game.signals import suppress_broadcasts
+from game.utils.lru_cache import LRUCache
+from game.utils.spatial_index import build_spatial_index, layout_version
+from game.utils.terrain_grids import TerrainGrids
+from channels.layers import get_channel_layer
+from asgiref.sync import async_to_sync
 
 class CombatService:
+    index_cache_size = 64
+    index_ttl = 60 * 60
+
     def __init__(self):
         self.player_service = None  # Will be set by dependency injection
+        # Spatial indexes shared by every request thread, one per game layout
+        self._indexes = LRUCache(max_size=self.index_cache_size, ttl=self.index_ttl)
+
+    def get_index(self, game):
+        """Shared spatial index of the game's current layout; callers must not modify it"""
+        key = (game.id, layout_version(game.id))
+        index = self._indexes.get(key)
+        if index is None:
+            index = build_spatial_index(game)
+            self._indexes.set(key, index)
+        return index
 
-    def validate_attack(self, attacker, target):
+    def validate_attack(self, attacker, target, sight=None):
         """Validate if an attack is legal"""
-        if not attacker.is_active:
-            raise ValidationError("Attacker unit is not active")
-            
         if attacker.has_attacked:
             raise ValidationError("Unit has already attacked this turn")
             
@@ -23,48 +40,45 @@ class CombatService:
         dy = abs(target.y_position - attacker.y_position)
         attack_range = max(dx, dy)
         
-        unit_stats = GAME_RULES['UNIT_TYPES'].get(attacker.unit_type, {})
-        max_range = unit_stats.get('range', 1)
-        
-        if attack_range > max_range:
+        if attack_range > RULES.attack_range(attacker.unit_type):
             raise ValidationError("Target is out of range")
 
+        sight = sight or TerrainGrids.for_game(attacker.game).sight
+        if not sight.has_line_of_sight(attacker.x_position, attacker.y_position,
+                                       target.x_position, target.y_position):
+            raise ValidationError("Target is not in line of sight")
+
     def calculate_damage(self, attacker, defender, terrain_type):
         """Calculate combat damage"""
-        # Get base stats
-        attacker_stats = GAME_RULES['UNIT_TYPES'].get(attacker.unit_type, {})
-        base_attack = attacker_stats.get('attack', 0)
-        
-        # Apply terrain modifiers
-        terrain_mod = self.get_terrain_modifier(terrain_type)
-        
-        # Calculate base damage
-        damage = round(base_attack * terrain_mod)
-        
+        return self.damage_for_type(attacker.unit_type, terrain_type)
+
+    def damage_for_type(self, unit_type, terrain_type):
+        """Damage a ``unit_type`` deals to a target standing on ``terrain_type``"""
+        return self._damage(unit_type, RULES.damage_modifier(unit_type, terrain_type))
+
+    def damage_at(self, unit_type, grids, x, y):
+        """Damage a ``unit_type`` deals to a target on tile (x, y) of ``grids``"""
+        return self._damage(unit_type, grids.damage_modifier(unit_type, x, y))
+
+    def _damage(self, unit_type, terrain_mod):
+        attacker_stats = RULES.unit(unit_type)
+        base_attack = attacker_stats.attack if attacker_stats else 0
         # Ensure minimum damage
-        return max(1, damage)
+        return max(1, round(base_attack * terrain_mod))
 
     def get_terrain_modifier(self, terrain_type):
         """Get terrain combat modifier"""
-        TERRAIN_MODIFIERS = {
-            'forest': 0.8,  # 20% reduction
-            'mountain': 0.7,  # 30% reduction
-            'water': 0.5,    # 50% reduction
-            'plains': 1.0    # No modification
-        }
-        return TERRAIN_MODIFIERS.get(terrain_type, 1.0)
+        return RULES.terrain_modifier(terrain_type)
 
     @transaction.atomic
-    def process_attack(self, attacker, target, game_map):
+    def process_attack(self, attacker, target):
         """Process an attack between units or against buildings"""
         # Validate the attack
         self.validate_attack(attacker, target)
         
-        # Get terrain at target location
-        terrain_type = game_map['terrain'][target.y_position * game_map['size'] + target.x_position]
-        
-        # Calculate and apply damage
-        damage = self.calculate_damage(attacker, target, terrain_type)
+        # Damage depends on the terrain at the target location
+        grids = TerrainGrids.for_game(attacker.game)
+        damage = self.damage_at(attacker.unit_type, grids, target.x_position, target.y_position)
         
         # Apply damage to target
         target.health -= damage
@@ -82,6 +96,113 @@ class CombatService:
             'target_health': max(0, target.health)
         }
 
+    def resolve_attacks(self, game, player, attacks, index=None):
+        """Resolve ``player``'s queued attacks for a turn simultaneously.
+
+        ``attacks`` is a list of ``{'unit_id', 'target_x', 'target_y'}``
+        dicts; units that do not belong to ``player`` are not found. Every attack is validated and its damage computed against the
+        state at the start of the batch, so a unit killed by an earlier
+        attack in the list still deals its own damage. If a unit is queued
+        twice, only its first attack counts. Damage to one target is summed,
+        targets reduced to 0 health are removed, and everything is written
+        with a few bulk queries. Returns one result dict per attack, in
+        input order. A caller's ``index`` is kept in step with the deaths.
+        """
+        if not attacks:
+            return []
+
+        if index is None:
+            index = build_spatial_index(game)
+        grids = TerrainGrids.for_game(game)
+
+        results = []
+        hits = []
+        damage_taken = {}
+        used_attackers = set()
+        for attack in attacks:
+            attacker = index.get(Unit, attack.get('unit_id'))
+            position = (attack.get('target_x'), attack.get('target_y'))
+            target = index.target_at(*position) if None not in position else None
+
+            error = self._batch_attack_error(player, attacker, target, used_attackers, grids.sight)
+            if error:
+                results.append({'unit_id': attack.get('unit_id'), 'valid': False, 'error': error})
+                continue
+
+            used_attackers.add(attacker.id)
+            x, y = position
+            damage = self.damage_at(attacker.unit_type, grids, x, y)
+            damage_taken[target] = damage_taken.get(target, 0) + damage
+            result = {
+                'unit_id': attacker.id,
+                'valid': True,
+                'damage': damage,
+                'target_id': target.id,
+                'target_type': 'unit' if isinstance(target, Unit) else 'building'
+            }
+            results.append(result)
+            hits.append((result, target))
+
+        destroyed = {target for target, damage in damage_taken.items() if damage >= target.health}
+        for target, damage in damage_taken.items():
+            target.health = max(0, target.health - damage)
+        for result, target in hits:
+            result['target_destroyed'] = target in destroyed
+            result['target_health'] = target.health
+        for attacker_id in used_attackers:
+            index.get(Unit, attacker_id).has_attacked = True
+        for target in destroyed:
+            index.remove(target)
+
+        self._persist_batch(game, used_attackers, damage_taken, destroyed)
+        return results
+
+    def _batch_attack_error(self, player, attacker, target, used_attackers, sight):
+        if attacker is None or attacker.player_id != player.id:
+            return "Unit not found"
+        if attacker.id in used_attackers:
+            return "Unit already attacks in this batch"
+        if attacker.has_attacked:
+            return "Unit has already attacked this turn"
+        if attacker.health <= 0:
+            return "Dead units cannot attack"
+        if target is None or target.player_id == attacker.player_id:
+            return "Invalid target"
+        dx = abs(target.x_position - attacker.x_position)
+        dy = abs(target.y_position - attacker.y_position)
+        if max(dx, dy) > RULES.attack_range(attacker.unit_type):
+            return "Target is out of range"
+        if not sight.has_line_of_sight(attacker.x_position, attacker.y_position,
+                                       target.x_position, target.y_position):
+            return "Target is not in line of sight"
+        return None
+
+    @transaction.atomic
+    def _persist_batch(self, game, used_attackers, damage_taken, destroyed):
+        with suppress_broadcasts():
+            Unit.objects.filter(id__in=used_attackers).update(has_attacked=True)
+            surviving = [target for target in damage_taken if target not in destroyed]
+            Unit.objects.bulk_update([t for t in surviving if isinstance(t, Unit)], ['health'], batch_size=500)
+            Building.objects.bulk_update([t for t in surviving if isinstance(t, Building)], ['health'], batch_size=500)
+            Unit.objects.filter(id__in=[t.id for t in destroyed if isinstance(t, Unit)]).delete()
+            Building.objects.filter(id__in=[t.id for t in destroyed if isinstance(t, Building)]).delete()
+
+        transaction.on_commit(lambda: self._broadcast_combat_resolved(game.id, len(damage_taken), len(destroyed)))
+
+    def _broadcast_combat_resolved(self, game_id, targets_hit, targets_destroyed):
+        channel_layer = get_channel_layer()
+        async_to_sync(channel_layer.group_send)(
+            f"game_{game_id}",
+            {
+                "type": "game_update",
+                "update_type": "combat_resolved",
+                "data": {
+                    "targets_hit": targets_hit,
+                    "targets_destroyed": targets_destroyed,
+                },
+            },
+        )
+
     def can_attack(self, attacker, target):
         """Check if a unit can attack a target"""
         try:
@@ -92,31 +213,30 @@ class CombatService:
 
     def get_attack_range(self, unit):
         """Get the attack range of a unit"""
-        unit_stats = GAME_RULES['UNIT_TYPES'].get(unit.unit_type, {})
-        return unit_stats.get('range', 1)
+        return RULES.attack_range(unit.unit_type)
+
+    def get_unit_stats(self, unit_type):
+        """Get the base stats for a unit type"""
+        stats = RULES.unit(unit_type)
+        return stats._asdict() if stats else {}
 
-    def get_valid_targets(self, unit, game):
-        """Get all valid targets for a unit"""
-        if not unit.is_active or unit.has_attacked:
+    def get_valid_targets(self, unit, game, index=None, sight=None):
+        """Get all enemies a unit can attack: in range and in line of sight"""
+        if unit.health <= 0 or unit.has_attacked:
             return []
-            
+
+        if index is None:
+            index = self.get_index(game)
+        sight = sight or TerrainGrids.for_game(game).sight
         attack_range = self.get_attack_range(unit)
-        valid_targets = []
-        
-        # Check units
-        for target in Unit.objects.filter(game=game, is_active=True):
-            if target.player_id != unit.player_id:  # Don't attack own units
-                dx = abs(target.x_position - unit.x_position)
-                dy = abs(target.y_position - unit.y_position)
-                if max(dx, dy) <= attack_range:
-                    valid_targets.append(target)
-                    
-        # Check buildings
-        for target in Building.objects.filter(game=game, is_active=True):
-            if target.player_id != unit.player_id:  # Don't attack own buildings
-                dx = abs(target.x_position - unit.x_position)
-                dy = abs(target.y_position - unit.y_position)
-                if max(dx, dy) <= attack_range:
-                    valid_targets.append(target)
-                    
-        return valid_targets
\ No newline at end of file
+        visible = set(sight.visible_cells(unit.x_position, unit.y_position, attack_range))
+        return [
+            enemy for enemy in index.enemies_within(unit.x_position, unit.y_position, attack_range, unit.player_id)
+            if (enemy.x_position, enemy.y_position) in visible
+        ]
+
+    def get_nearest_enemy(self, unit, game, index=None):
+        """Get the closest enemy entity to a unit, for AI target selection"""
+        if index is None:
+            index = self.get_index(game)
+        return index.nearest_enemy(unit.x_position, unit.y_position, unit.player_id)
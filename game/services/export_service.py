@@ -0,0 +1,113 @@
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+from game.core.models import Game, GameArchive, MapChunk, Unit, Building, Turn
+
+# Entity columns use the same keys as GameStateService so exported rows and
+# archived snapshots look alike.
+UNIT_EXPORT_FIELDS = {
+    'id': 'id',
+    'game_id': 'game_id',
+    'player_id': 'player_id',
+    'type': 'unit_type',
+    'x': 'x_position',
+    'y': 'y_position',
+    'health': 'health',
+    'attack': 'attack',
+    'defense': 'defense',
+    'movement_range': 'movement_range',
+    'attack_range': 'attack_range',
+}
+
+BUILDING_EXPORT_FIELDS = {
+    'id': 'id',
+    'game_id': 'game_id',
+    'player_id': 'player_id',
+    'type': 'building_type',
+    'x': 'x_position',
+    'y': 'y_position',
+    'health': 'health',
+    'resource_production': 'resource_production',
+}
+
+
+def _values_args(fields):
+    """Split an export mapping into ``values()`` field names and renames"""
+    names = [source for key, source in fields.items() if key == source]
+    renames = {key: F(source) for key, source in fields.items() if key != source}
+    return names, renames
+
+class ExportService:
+    """Streams finished games as NDJSON records for offline analysis.
+
+    Each table is read once with ``.iterator()`` (a server-side cursor on
+    PostgreSQL), so memory use stays flat however many games are exported.
+    Records carry a ``record`` key (game, map_chunk, turn, unit, building)
+    and a ``game_id`` to join on.
+    """
+    def __init__(self, chunk_size=2000):
+        self.chunk_size = chunk_size
+
+    def get_games(self, include_active=False):
+        games = Game.objects.all()
+        if not include_active:
+            games = games.filter(is_active=False)
+        return games
+
+    def iter_records(self, include_active=False):
+        """Yield export records table by table"""
+        games = self.get_games(include_active)
+
+        for game in games.order_by('id').values(
+            'id', 'name', 'created_at', 'is_active', 'max_players',
+            'map_size', 'map_data', 'current_turn', 'archive__archived_at'
+        ).iterator(chunk_size=self.chunk_size):
+            game['archived_at'] = game.pop('archive__archived_at')
+            yield {'record': 'game', **game}
+
+        for chunk in MapChunk.objects.filter(game__in=games).order_by('game_id', 'cy', 'cx').values(
+            'game_id', 'cx', 'cy', 'terrain'
+        ).iterator(chunk_size=self.chunk_size):
+            yield {'record': 'map_chunk', **chunk}
+
+        for turn in Turn.objects.filter(game__in=games).order_by('game_id', 'turn_number').values(
+            'game_id', 'player_id', 'turn_number', 'completed', 'created_at', 'completed_at'
+        ).iterator(chunk_size=self.chunk_size):
+            yield {'record': 'turn', **turn}
+
+        names, renames = _values_args(UNIT_EXPORT_FIELDS)
+        for unit in Unit.objects.filter(game__in=games).order_by('game_id', 'id').values(
+            *names, **renames
+        ).iterator(chunk_size=self.chunk_size):
+            yield {'record': 'unit', **unit}
+
+        names, renames = _values_args(BUILDING_EXPORT_FIELDS)
+        for building in Building.objects.filter(game__in=games).order_by('game_id', 'id').values(
+            *names, **renames
+        ).iterator(chunk_size=self.chunk_size):
+            yield {'record': 'building', **building}
+
+        yield from self._iter_archived_records(games)
+
+    def iter_ndjson(self, include_active=False):
+        """Yield one encoded NDJSON line per record"""
+        for record in self.iter_records(include_active):
+            yield json.dumps(record, cls=DjangoJSONEncoder) + '\n'
+
+    def _iter_archived_records(self, games):
+        """Archived games have no hot rows; expand their snapshots instead"""
+        # One archive is decompressed at a time, keeping memory bounded by
+        # the largest single game.
+        archives = GameArchive.objects.filter(game__in=games).order_by('game_id')
+        for archive in archives.iterator(chunk_size=1):
+            payload = archive.unpack()
+            game_id = archive.game_id
+            for turn in payload['history']:
+                yield {'record': 'turn', 'game_id': game_id, **turn}
+            for unit in payload['state']['units']:
+                yield {'record': 'unit', 'game_id': game_id, **self._pick(unit, UNIT_EXPORT_FIELDS)}
+            for building in payload['state']['buildings']:
+                yield {'record': 'building', 'game_id': game_id, **self._pick(building, BUILDING_EXPORT_FIELDS)}
+
+    def _pick(self, entity, fields):
+        return {key: entity.get(key) for key in fields if key != 'game_id'}
@@ -2,39 +2,121 @@ from django.db import transaction
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from django.core.exceptions import ValidationError
-from game.core.models import Game, Player, Unit, Building, Turn
+from game.core.models import Game, MapChunk, Player, Unit, Building, Turn
 from game.utils.game_helpers import (
     generate_map,
     is_valid_move,
     is_valid_build_position
 )
+from game.utils.pathfinding import CostGrid, flow_field
+from game.utils.spatial_index import bump_layout
+from game.utils.terrain import TerrainMap, build_map_chunks, chunked_map_data
 from game.core.game_rules import GAME_RULES
+from game.utils.resource_helpers import get_building_cost, get_unit_cost
 from .state_service import GameStateService
 from .player_service import PlayerService
 from .combat_service import CombatService
 from .action_service import ActionService
+from .random_service import RandomService
+from .job_queue import JobQueue
+from game.core.rng import new_seed
+from game.signals import LOBBY_GROUP, announce_turn_started
 
 class GameService:
-    def __init__(self):
-        self.combat_service = CombatService()
-        self.action_service = ActionService(self.combat_service)
-        self.state_service = GameStateService()
-        self.player_service = PlayerService()
+    def __init__(self, combat_service=None, action_service=None, state_service=None,
+                 player_service=None, random_service=None, job_queue=None):
+        self.combat_service = combat_service or CombatService()
+        self.action_service = action_service or ActionService(self.combat_service)
+        self.state_service = state_service or GameStateService()
+        self.player_service = player_service or PlayerService()
+        self.random_service = random_service or RandomService()
+        self.job_queue = job_queue or JobQueue()
 
     @transaction.atomic
     def create_game(self, user, name, map_size, max_players):
         """Create a new game with initial setup"""
+        seed = new_seed()
         game = Game.objects.create(
             name=name,
             map_size=map_size,
             max_players=max_players,
             created_by=user,
-            map_data=generate_map(map_size),
+            rng_seed=seed,
+            map_data=chunked_map_data(map_size),
         )
-        
+        terrain = generate_map(map_size, self.random_service.map_stream(seed))["terrain"]
+        MapChunk.objects.bulk_create(build_map_chunks(game, terrain))
+
         self.add_player(game, user)
         return game
 
+    @transaction.atomic
+    def bulk_create_games(self, games):
+        """Create many games with their players and starting entities at once.
+
+        ``games`` is an iterable of dicts with ``name``, ``map_size``,
+        ``max_players`` and ``users`` (the first user is the creator).
+        Rows are written with ``bulk_create`` so no per-row signals fire;
+        a single ``games_created`` event is sent to the lobby group instead.
+        """
+        starting_resources = GAME_RULES['GAME_SETTINGS']['STARTING_RESOURCES']
+        new_games, new_players, units, buildings = [], [], [], []
+        terrains = []
+        for spec in games:
+            users = list(spec['users'])
+            if not users:
+                raise ValidationError("Each game needs at least one player")
+            if len(users) > spec['max_players']:
+                raise ValidationError("More players than the game allows")
+
+            seed = new_seed()
+            game = Game(
+                name=spec['name'],
+                map_size=spec['map_size'],
+                max_players=spec['max_players'],
+                created_by=users[0],
+                rng_seed=seed,
+                map_data=chunked_map_data(spec['map_size']),
+            )
+            new_games.append(game)
+            # Starting tiles are cleared on the full grid before it is chunked
+            terrain = TerrainMap(generate_map(spec['map_size'], self.random_service.map_stream(seed)))
+            terrains.append(terrain)
+            for number, user in enumerate(users, start=1):
+                player = Player(game=game, user=user, player_number=number, resources=starting_resources)
+                player_units, player_buildings = self.player_service.build_starting_entities(
+                    player, terrain
+                )
+                new_players.append(player)
+                units.extend(player_units)
+                buildings.extend(player_buildings)
+
+        # Foreign keys to the freshly inserted parents are resolved by
+        # bulk_create, so each table is written in a handful of statements.
+        Game.objects.bulk_create(new_games, batch_size=500)
+        MapChunk.objects.bulk_create(
+            [chunk for game, terrain in zip(new_games, terrains) for chunk in build_map_chunks(game, terrain.rows())],
+            batch_size=500
+        )
+        Player.objects.bulk_create(new_players, batch_size=500)
+        Unit.objects.bulk_create(units, batch_size=500)
+        Building.objects.bulk_create(buildings, batch_size=500)
+
+        game_ids = [game.id for game in new_games]
+        # Lobby fan-out goes through the job queue so large batches return at once
+        self.job_queue.enqueue('broadcast', {
+            'group': LOBBY_GROUP,
+            'message': {
+                'type': 'game_update',
+                'update_type': 'games_created',
+                'data': {
+                    'count': len(game_ids),
+                    'game_ids': game_ids,
+                },
+            },
+        })
+        return new_games
+
     def get_game_state(self, game_id, user):
         """Get the current state of a game for a user"""
         return self.state_service.get_game_state(game_id, user)
@@ -94,10 +176,10 @@ class GameService:
         if current_player != player:
             raise ValidationError("Not your turn")
 
-        if not is_valid_build_position(game.map_data, x, y):
+        if not is_valid_build_position(x, y, game):
             raise ValidationError("Invalid build position")
 
-        cost = GAME_RULES['BUILDING_COSTS'][building_type]
+        cost = get_building_cost(building_type)
         if not self.player_service.has_enough_resources(player, cost):
             raise ValidationError("Not enough resources")
 
@@ -124,7 +206,7 @@ class GameService:
         if unit.has_moved:
             raise ValidationError("Unit has already moved this turn")
 
-        if not is_valid_move(unit, x, y, game.map_data):
+        if not is_valid_move(unit, x, y, game):
             raise ValidationError("Invalid move position")
 
         unit.x_position = x
@@ -133,6 +215,52 @@ class GameService:
         unit.save()
         return unit
 
+    @transaction.atomic
+    def move_group(self, game, player, unit_ids, x, y):
+        """Move several units toward one target along a shared flow field.
+
+        Units nearest the target move first; each walks up to its movement
+        range downhill and stops on the farthest free tile, so the group
+        gathers around the target instead of all claiming it.
+        """
+        if not game.is_active:
+            raise ValidationError("Game is not active")
+
+        current_player = self.get_current_player(game)
+        if current_player != player:
+            raise ValidationError("Not your turn")
+
+        unit_ids = set(unit_ids or ())
+        units = list(Unit.objects.filter(id__in=unit_ids, player=player, has_moved=False))
+        if not units or len(units) != len(unit_ids):
+            raise ValidationError("Unknown units or units that have already moved")
+
+        grid = CostGrid.for_game(game)
+        if not grid.passable(x, y):
+            raise ValidationError("Invalid move position")
+
+        occupied = {
+            grid.index(ux, uy)
+            for ux, uy in Unit.objects.filter(game=game).exclude(id__in=unit_ids)
+            .values_list('x_position', 'y_position')
+        }
+        starts = {unit.id: grid.index(unit.x_position, unit.y_position) for unit in units}
+        field = flow_field(grid, grid.index(x, y), set(starts.values()))
+
+        moved = []
+        for unit in sorted(units, key=lambda u: field.dist.get(starts[u.id], float('inf'))):
+            path = field.path(starts[unit.id], unit.movement_range)
+            stop = next((i for i in reversed(path) if i not in occupied), starts[unit.id])
+            occupied.add(stop)
+            if stop != starts[unit.id]:
+                unit.x_position, unit.y_position = grid.position(stop)
+                unit.has_moved = True
+                moved.append(unit)
+        Unit.objects.bulk_update(moved, ['x_position', 'y_position', 'has_moved'])
+        if moved:
+            bump_layout(game.id)
+        return moved
+
     def train_unit(self, building, unit_type):
         """Train a new unit at a building"""
         game = building.player.game
@@ -143,7 +271,7 @@ class GameService:
         if current_player != building.player:
             raise ValidationError("Not your turn")
 
-        cost = GAME_RULES['UNIT_COSTS'][unit_type]
+        cost = get_unit_cost(unit_type)
         if not self.player_service.has_enough_resources(building.player, cost):
             raise ValidationError("Not enough resources")
 
@@ -166,10 +294,18 @@ class GameService:
             
         game.current_turn += 1
         game.current_player_index = (game.current_player_index + 1) % active_players
+        game.turn_started_at = timezone.now()
         game.save()
+        announce_turn_started(game)
+        if game.current_player_index == 0:
+            # Every active player has had a turn: settle the round that just closed
+            self.job_queue.enqueue(
+                'settle_round', {'game_id': game.id, 'turn': game.current_turn - 1},
+                game=game, priority=10
+            )
 
         # Reset unit movement and attack flags
-        Unit.objects.filter(player__game=game).update(
+        Unit.objects.filter(game=game).update(
             has_moved=False,
             has_attacked=False
         )
@@ -179,6 +315,7 @@ class GameService:
         """Deactivate a game"""
         game.is_active = False
         game.save()
+        self.job_queue.enqueue('archive_game', {'game_id': game.id}, game=game, priority=-10)
 
     def get_current_player(self, game):
         """Get the current player in the game"""
@@ -0,0 +1,147 @@
+import logging
+import os
+import socket
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef
+from django.utils import timezone
+from game.core.models import Job
+
+logger = logging.getLogger(__name__)
+
+# kind -> callable(payload); filled in by @job_handler in game/services/jobs.py
+JOB_HANDLERS = {}
+
+def job_handler(kind):
+    """Register the decorated function as the handler for jobs of ``kind``"""
+    def register(func):
+        JOB_HANDLERS[kind] = func
+        return func
+    return register
+
+def _load_handlers():
+    from . import jobs  # noqa: F401  (registers the built-in handlers)
+
+
+class JobQueue:
+    """Database-backed queue for work that should not run inside a request.
+
+    Workers claim a job with a conditional UPDATE, so any number of them can
+    share the table without row locks. A job tied to a game is only claimable
+    once every earlier job for that game has finished, which keeps per-game
+    work in enqueue order. Failed jobs are retried with exponential backoff
+    until ``max_attempts`` is reached.
+    """
+    claim_batch = 10
+    retry_backoff = 2
+    stale_after = timedelta(minutes=10)
+
+    def enqueue(self, kind, payload=None, game=None, priority=0, delay=0, max_attempts=3):
+        """Queue a job; it becomes visible to workers when the transaction commits"""
+        job = Job.objects.create(
+            kind=kind,
+            payload=payload or {},
+            game=game,
+            priority=priority,
+            run_after=timezone.now() + timedelta(seconds=delay),
+            max_attempts=max_attempts,
+        )
+        if getattr(settings, 'GAME_JOBS_EAGER', False):
+            transaction.on_commit(lambda: self._run_eagerly(job.id))
+        return job
+
+    def enqueue_many(self, jobs):
+        """Bulk-insert unsaved Job instances"""
+        return Job.objects.bulk_create(jobs, batch_size=500)
+
+    def _run_eagerly(self, job_id):
+        claimed = Job.objects.filter(id=job_id, status=Job.QUEUED).update(
+            status=Job.RUNNING, locked_by='eager', locked_at=timezone.now(), attempts=F('attempts') + 1
+        )
+        if claimed:
+            self.run_job(Job.objects.get(id=job_id))
+
+    def ready_jobs(self, now=None):
+        """Queued jobs that are due and not waiting behind an earlier job of their game"""
+        now = now or timezone.now()
+        earlier_pending = Job.objects.filter(
+            game_id=OuterRef('game_id'),
+            id__lt=OuterRef('id'),
+            status__in=[Job.QUEUED, Job.RUNNING]
+        )
+        return Job.objects.filter(
+            status=Job.QUEUED, run_after__lte=now
+        ).filter(~Exists(earlier_pending)).order_by('-priority', 'id')
+
+    def claim(self, worker_id, limit=1):
+        """Take up to ``limit`` ready jobs for ``worker_id``.
+
+        The ready set holds at most one job per game, so a whole batch can be
+        claimed in one UPDATE without breaking per-game ordering.
+        """
+        now = timezone.now()
+        job_ids = list(self.ready_jobs(now).values_list('id', flat=True)[:limit])
+        if not job_ids:
+            return []
+        Job.objects.filter(id__in=job_ids, status=Job.QUEUED).update(
+            status=Job.RUNNING,
+            locked_by=worker_id,
+            locked_at=now,
+            attempts=F('attempts') + 1
+        )
+        # Another worker may have won some of the ids between the two queries
+        return list(Job.objects.filter(
+            id__in=job_ids, status=Job.RUNNING, locked_by=worker_id, locked_at=now
+        ).order_by('-priority', 'id'))
+
+    def run_job(self, job):
+        """Run a claimed job and record the outcome"""
+        _load_handlers()
+        try:
+            handler = JOB_HANDLERS[job.kind]
+            with transaction.atomic():
+                handler(job.payload)
+        except Exception as e:
+            logger.warning("Job %s (%s) failed on attempt %s: %s", job.id, job.kind, job.attempts, e)
+            job.last_error = repr(e)
+            job.locked_by = ''
+            if job.attempts >= job.max_attempts:
+                job.status = Job.FAILED
+                job.finished_at = timezone.now()
+            else:
+                job.status = Job.QUEUED
+                job.run_after = timezone.now() + timedelta(
+                    seconds=self.retry_backoff ** job.attempts
+                )
+        else:
+            job.status = Job.DONE
+            job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'last_error', 'locked_by', 'run_after', 'finished_at'])
+        return job.status == Job.DONE
+
+    def requeue_stale(self):
+        """Put back jobs whose worker died mid-run"""
+        cutoff = timezone.now() - self.stale_after
+        return Job.objects.filter(status=Job.RUNNING, locked_at__lt=cutoff).update(
+            status=Job.QUEUED, locked_by=''
+        )
+
+    def work(self, worker_id=None, burst=False, poll_interval=1.0, max_jobs=None):
+        """Claim and run jobs until stopped; with ``burst`` stop once the queue is empty"""
+        worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        processed = 0
+        while max_jobs is None or processed < max_jobs:
+            limit = self.claim_batch if max_jobs is None else min(self.claim_batch, max_jobs - processed)
+            jobs = self.claim(worker_id, limit)
+            if not jobs:
+                if burst:
+                    break
+                self.requeue_stale()
+                time.sleep(poll_interval)
+                continue
+            for job in jobs:
+                self.run_job(job)
+            processed += len(jobs)
+        return processed
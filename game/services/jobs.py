@@ -0,0 +1,28 @@
+"""Handlers for deferred game work run by :class:`JobQueue` workers."""
+from channels.layers import get_channel_layer
+from asgiref.sync import async_to_sync
+from game.core.models import Game
+from game.utils.game_helpers import collect_round_income
+from .registry import services
+from .job_queue import job_handler
+
+@job_handler('settle_round')
+def settle_round(payload):
+    """Pay the income of the round that closed with ``payload['turn']``, once"""
+    game = Game.objects.select_for_update().get(id=payload['game_id'])
+    # A re-run job (stale requeue or duplicate enqueue) finds the round recorded
+    if game.is_active and payload['turn'] > game.last_settled_turn:
+        collect_round_income(game)
+        game.last_settled_turn = payload['turn']
+        game.save(update_fields=['last_settled_turn'])
+
+@job_handler('archive_game')
+def archive_game(payload):
+    game = Game.objects.select_related('archive').get(id=payload['game_id'])
+    if not game.is_active and not hasattr(game, 'archive'):
+        services.archive.archive_game(game)
+
+@job_handler('broadcast')
+def broadcast(payload):
+    """Fan a message out to a channel group"""
+    async_to_sync(get_channel_layer().group_send)(payload['group'], payload['message'])
@@ -1,9 +1,15 @@
 from django.shortcuts import get_object_or_404
 from django.db import transaction
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 from game.core.models import Player, Game, Unit, Building
 from game.core.game_rules import GAME_RULES
+from game.core.constants import STARTING_UNITS, STARTING_BUILDINGS
+from game.core.rules import RULES
+from game.utils.game_helpers import get_starting_position, STARTING_UNIT_OFFSETS
+from game.utils.terrain import TerrainMap
 from django.core.exceptions import ValidationError
+from game.signals import announce_turn_started
 
 class PlayerService:
     def can_join_game(self, game, user):
@@ -28,10 +34,15 @@ class PlayerService:
             game=game,
             user=user,
             player_number=active_players.count() + 1,
-            resources=GAME_RULES.get("INITIAL_RESOURCES"),
+            resources=GAME_RULES['GAME_SETTINGS']['STARTING_RESOURCES'],
         )
         
         self._initialize_player_state(player)
+        if player.player_number == GAME_RULES['GAME_SETTINGS']['MIN_PLAYERS']:
+            # The game can start: its first turn is timed from now
+            game.turn_started_at = timezone.now()
+            game.save(update_fields=['turn_started_at'])
+            announce_turn_started(game)
         return player
 
     @transaction.atomic
@@ -59,25 +70,60 @@ class PlayerService:
     @transaction.atomic
     def _initialize_player_state(self, player):
         """Initialize a new player's starting units and buildings"""
-        starting_units = GAME_RULES.get("STARTING_UNITS", {})
-        for unit_type, count in starting_units.items():
+        game = player.game
+        terrain = TerrainMap.for_game(game)
+        units, buildings = self.build_starting_entities(player, terrain)
+        for building in buildings:
+            building.save()
+        for unit in units:
+            unit.save()
+        terrain.save()
+
+    def build_starting_entities(self, player, terrain):
+        """Build (unsaved) starting units and buildings around the player's start.
+
+        Tiles used by the starting kit are cleared to plains in ``terrain``,
+        a :class:`TerrainMap` the caller saves.
+        """
+        game = player.game
+        map_size = int(game.map_size)
+        position = get_starting_position(terrain, player.player_number, map_size)
+
+        buildings = []
+        for building_type, count in STARTING_BUILDINGS.items():
+            stats = RULES.building(building_type)
             for _ in range(count):
-                Unit.objects.create(
+                buildings.append(Building(
+                    game=game,
                     player=player,
-                    unit_type=unit_type,
-                    x_position=player.game.map_size // 2,
-                    y_position=player.game.map_size // 2
-                )
-                
-        starting_buildings = GAME_RULES.get("STARTING_BUILDINGS", {})
-        for building_type, count in starting_buildings.items():
+                    building_type=building_type,
+                    x_position=position["x"],
+                    y_position=position["y"],
+                    health=stats.health,
+                    resource_production=stats.resource_production
+                ))
+
+        units = []
+        offsets = iter(STARTING_UNIT_OFFSETS)
+        for unit_type, count in STARTING_UNITS.items():
+            stats = RULES.unit(unit_type)
             for _ in range(count):
-                Building.objects.create(
+                dx, dy = next(offsets)
+                x, y = position["x"] + dx, position["y"] + dy
+                terrain.set(x, y, "plains")
+                units.append(Unit(
+                    game=game,
                     player=player,
-                    building_type=building_type,
-                    x_position=player.game.map_size // 2,
-                    y_position=player.game.map_size // 2
-                )
+                    unit_type=unit_type,
+                    x_position=x,
+                    y_position=y,
+                    health=stats.health,
+                    attack=stats.attack,
+                    defense=stats.defense,
+                    movement_range=stats.movement_range,
+                    attack_range=stats.attack_range
+                ))
+        return units, buildings
 
     def is_player_in_game(self, user, game_id):
         """Check if user is a player in the game"""
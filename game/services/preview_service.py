@@ -0,0 +1,287 @@
+from game.core.rules import RULES
+from game.utils.lru_cache import LRUCache
+from game.utils.terrain import TerrainMap
+from game.utils.terrain_grids import TerrainGrids
+from .combat_service import CombatService
+from .state_diff_service import StateDiffService
+
+
+class StateIndex:
+    """Lookup tables over one immutable state snapshot, shared across previews"""
+
+    def __init__(self, state):
+        self.state = state
+        self.terrain = TerrainMap(state['map_data'], game_id=state['game_id'])
+        self.size = self.terrain.size
+        self.entities = {}
+        self.occupancy = {}
+        for kind in ('building', 'unit'):
+            for entity in state[f'{kind}s']:
+                key = (kind, entity['id'])
+                self.entities[key] = entity
+                # Units are written last so they win the tile, as attack targets do
+                self.occupancy[(entity['x'], entity['y'])] = key
+        self.players = {player['id']: player for player in state['players']}
+        self._grids = None
+
+    @property
+    def grids(self):
+        """The map's tile grids, fetched on the first lookup"""
+        if self._grids is None:
+            self._grids = TerrainGrids.for_terrain(self.terrain)
+        return self._grids
+
+
+class StateOverlay:
+    """Copy-on-write layer over a :class:`StateIndex`.
+
+    Reads fall through to the shared snapshot; the first write to an entity
+    or player copies just that dict into the overlay, so a preview costs
+    only what it touches and the snapshot is never modified.
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self._entities = {}
+        self._occupancy = {}
+        self._players = {}
+        self._next_id = -1
+
+    def get(self, kind, entity_id):
+        key = (kind, entity_id)
+        if key in self._entities:
+            return self._entities[key]
+        return self.index.entities.get(key)
+
+    def write(self, kind, entity_id):
+        key = (kind, entity_id)
+        if key not in self._entities:
+            self._entities[key] = dict(self.index.entities[key])
+        return self._entities[key]
+
+    def occupant(self, x, y):
+        key = self._occupancy.get((x, y), self.index.occupancy.get((x, y)))
+        return None if key is None else (key[0], self.get(*key))
+
+    def move(self, kind, entity_id, x, y):
+        entity = self.write(kind, entity_id)
+        self._occupancy[(entity['x'], entity['y'])] = None
+        self._occupancy[(x, y)] = (kind, entity_id)
+        entity['x'], entity['y'] = x, y
+        return entity
+
+    def spawn(self, kind, entity):
+        """Add a new entity under a temporary negative id"""
+        entity = {**entity, 'id': self._next_id}
+        self._next_id -= 1
+        self._entities[(kind, entity['id'])] = entity
+        self._occupancy[(entity['x'], entity['y'])] = (kind, entity['id'])
+        return entity
+
+    def remove(self, kind, entity_id):
+        """Free the tile of a destroyed entity"""
+        entity = self.get(kind, entity_id)
+        position = (entity['x'], entity['y'])
+        if self._occupancy.get(position, self.index.occupancy.get(position)) == (kind, entity_id):
+            self._occupancy[position] = None
+
+    def player(self, player_id):
+        if player_id not in self._players:
+            player = dict(self.index.players[player_id])
+            player['resources'] = player['resources'] or 0
+            self._players[player_id] = player
+        return self._players[player_id]
+
+
+class PreviewService:
+    """Dry-runs a turn's actions against the cached game state.
+
+    Actions are checked with the same rules the turn processor applies:
+    moves, builds and training in order, then every attack at once against
+    the resulting positions. Nothing is written to the database. Invalid
+    actions are reported and skipped, so later ones are still evaluated.
+    """
+    index_cache_size = 64
+    index_ttl = 60 * 60
+
+    def __init__(self, state_diff_service=None, combat_service=None):
+        self.state_diff_service = state_diff_service or StateDiffService()
+        self.combat_service = combat_service or CombatService()
+        # Shared by every request thread, hence the locked cache
+        self._indexes = LRUCache(max_size=self.index_cache_size, ttl=self.index_ttl)
+
+    def get_index(self, game_id, user):
+        """Version and :class:`StateIndex` of the game's latest cached state"""
+        version, state = self.state_diff_service.get_snapshot(game_id, user)
+        key = (game_id, version)
+        index = self._indexes.get(key)
+        if index is None:
+            index = StateIndex(state)
+            self._indexes.set(key, index)
+        return version, index
+
+    def preview(self, game_id, player, actions):
+        version, index = self.get_index(game_id, player.user)
+        overlay = StateOverlay(index)
+        results = [None] * len(actions)
+        attacks = []
+
+        for position, action in enumerate(actions):
+            action_type = action.get('type') if isinstance(action, dict) else None
+            if action_type == 'attack':
+                attacks.append((position, action))
+                continue
+            check = self._checks.get(action_type)
+            if check is None:
+                results[position] = {'valid': False, 'error': f"Invalid action type: {action_type}"}
+                continue
+            results[position] = check(self, overlay, player.id, action)
+        for position, result in self._check_attacks(overlay, player.id, attacks):
+            results[position] = result
+
+        for action, result in zip(actions, results):
+            result['type'] = action.get('type') if isinstance(action, dict) else None
+        return {
+            'version': version,
+            'actions': results,
+            'resources': overlay.player(player.id)['resources'],
+        }
+
+    def _invalid(self, error):
+        return {'valid': False, 'error': error}
+
+    def _own_unit(self, overlay, player_id, unit_id):
+        unit = overlay.get('unit', unit_id)
+        if unit is None or unit['player_id'] != player_id:
+            return None
+        return unit
+
+    def _free_tile_error(self, overlay, x, y):
+        size = overlay.index.size
+        if not (isinstance(x, int) and isinstance(y, int)) or not (0 <= x < size and 0 <= y < size):
+            return "Position is off the map"
+        if overlay.occupant(x, y) is not None:
+            return "Position is occupied"
+        return None
+
+    def _check_move(self, overlay, player_id, action):
+        unit = self._own_unit(overlay, player_id, action.get('unit_id'))
+        if unit is None:
+            return self._invalid("Unit not found")
+        if unit['has_moved']:
+            return self._invalid("Unit has already moved")
+        x, y = action.get('x'), action.get('y')
+        error = self._free_tile_error(overlay, x, y)
+        if error:
+            return self._invalid(error)
+        if abs(unit['x'] - x) + abs(unit['y'] - y) > unit['movement_range']:
+            return self._invalid("Target is beyond movement range")
+        if not overlay.index.grids.passable(x, y):
+            return self._invalid("Cannot move onto water")
+
+        unit = overlay.move('unit', unit['id'], x, y)
+        unit['has_moved'] = True
+        return {'valid': True, 'unit_id': unit['id'], 'position': [x, y]}
+
+    def _check_build(self, overlay, player_id, action):
+        stats = RULES.building(action.get('building_type'))
+        if stats is None:
+            return self._invalid(f"Invalid building type: {action.get('building_type')}")
+        x, y = action.get('x'), action.get('y')
+        error = self._free_tile_error(overlay, x, y)
+        if error:
+            return self._invalid(error)
+        if not overlay.index.grids.buildable(x, y):
+            return self._invalid("Cannot build on this terrain")
+        player = overlay.player(player_id)
+        if player['resources'] < stats.cost:
+            return self._invalid("Insufficient resources")
+
+        player['resources'] -= stats.cost
+        overlay.spawn('building', {
+            'type': stats.name, 'player_id': player_id, 'x': x, 'y': y,
+            'health': stats.health, 'resource_production': stats.resource_production,
+        })
+        return {'valid': True, 'position': [x, y], 'cost': stats.cost}
+
+    def _check_train(self, overlay, player_id, action):
+        barracks = overlay.get('building', action.get('barracks_id'))
+        if barracks is None or barracks['player_id'] != player_id or barracks['type'] != 'barracks':
+            return self._invalid("Barracks not found")
+        stats = RULES.unit(action.get('unit_type'))
+        if stats is None:
+            return self._invalid(f"Invalid unit type: {action.get('unit_type')}")
+        x, y = barracks['x'] + 1, barracks['y']
+        error = self._free_tile_error(overlay, x, y)
+        if error:
+            return self._invalid(error)
+        player = overlay.player(player_id)
+        if player['resources'] < stats.cost:
+            return self._invalid("Insufficient resources")
+
+        player['resources'] -= stats.cost
+        overlay.spawn('unit', {
+            'type': stats.name, 'player_id': player_id, 'x': x, 'y': y,
+            'health': stats.health, 'attack': stats.attack, 'defense': stats.defense,
+            'movement_range': stats.movement_range, 'attack_range': stats.attack_range,
+            'has_moved': False, 'has_attacked': False,
+        })
+        return {'valid': True, 'position': [x, y], 'cost': stats.cost}
+
+    def _check_attacks(self, overlay, player_id, attacks):
+        """Mirror CombatService.resolve_attacks: all attacks hit the same snapshot"""
+        checked = []
+        damage_taken = {}
+        used = set()
+        for position, action in attacks:
+            unit = self._own_unit(overlay, player_id, action.get('unit_id'))
+            tx, ty = action.get('target_x'), action.get('target_y')
+            occupant = overlay.occupant(tx, ty) if isinstance(tx, int) and isinstance(ty, int) else None
+            error = None
+            if unit is None:
+                error = "Unit not found"
+            elif unit['id'] in used:
+                error = "Unit already attacks in this batch"
+            elif unit['has_attacked']:
+                error = "Unit has already attacked this turn"
+            elif occupant is None or occupant[1]['player_id'] == player_id:
+                error = "Invalid target"
+            elif max(abs(tx - unit['x']), abs(ty - unit['y'])) > RULES.attack_range(unit['type']):
+                error = "Target is out of range"
+            elif not overlay.index.grids.sight.has_line_of_sight(unit['x'], unit['y'], tx, ty):
+                error = "Target is not in line of sight"
+            if error:
+                checked.append((position, self._invalid(error), None))
+                continue
+
+            used.add(unit['id'])
+            kind, target = occupant
+            damage = self.combat_service.damage_at(unit['type'], overlay.index.grids, tx, ty)
+            damage_taken[(kind, target['id'])] = damage_taken.get((kind, target['id']), 0) + damage
+            checked.append((position, {
+                'valid': True,
+                'unit_id': unit['id'],
+                'damage': damage,
+                'target_id': target['id'],
+                'target_type': kind,
+            }, (kind, target['id'])))
+
+        for unit_id in used:
+            overlay.write('unit', unit_id)['has_attacked'] = True
+        for (kind, target_id), damage in damage_taken.items():
+            target = overlay.write(kind, target_id)
+            target['health'] = max(0, target['health'] - damage)
+            if target['health'] == 0:
+                overlay.remove(kind, target_id)
+        for position, result, target_key in checked:
+            if target_key is not None:
+                health = overlay.get(*target_key)['health']
+                result['target_health'] = health
+                result['target_destroyed'] = health == 0
+            yield position, result
+
+    _checks = {
+        'move_unit': _check_move,
+        'build': _check_build,
+        'train_unit': _check_train,
+    }
@@ -0,0 +1,8 @@
+from game.core.rng import stream
+
+class RandomService:
+    """Hands out the seeded random streams a game rolls from"""
+
+    def map_stream(self, seed):
+        """Stream for terrain generation"""
+        return stream(seed, 'map')
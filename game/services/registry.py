@@ -0,0 +1,123 @@
+import threading
+from contextlib import contextmanager
+
+
+class ServiceRegistry:
+    """Builds each service once per process and hands out the shared instance.
+
+    Services are stateless between calls: anything request-specific (user,
+    player, game) is passed to their methods, and anything they keep is a
+    process-level cache. Factories receive the registry so a service can be
+    wired to the shared instances of the services it depends on.
+    """
+
+    def __init__(self):
+        self._factories = {}
+        self._instances = {}
+        self._lock = threading.RLock()
+
+    def register(self, name, factory):
+        """Register ``factory(registry)`` under ``name``, dropping any built instance"""
+        with self._lock:
+            self._factories[name] = factory
+            self._instances.pop(name, None)
+
+    def get(self, name):
+        instance = self._instances.get(name)
+        if instance is None:
+            with self._lock:
+                instance = self._instances.get(name)
+                if instance is None:
+                    instance = self._instances[name] = self._factories[name](self)
+        return instance
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        try:
+            return self.get(name)
+        except KeyError:
+            raise AttributeError(name) from None
+
+    @contextmanager
+    def override(self, name, instance):
+        """Swap in ``instance`` for ``name`` for the duration of a block (tests)"""
+        with self._lock:
+            previous = self._instances.get(name)
+            self._instances[name] = instance
+        try:
+            yield instance
+        finally:
+            with self._lock:
+                if previous is None:
+                    self._instances.pop(name, None)
+                else:
+                    self._instances[name] = previous
+
+    def reset(self):
+        """Forget every built instance; they are rebuilt on next use"""
+        with self._lock:
+            self._instances.clear()
+
+
+def _register_defaults(registry):
+    from .action_service import ActionService
+    from .archive_service import ArchiveService
+    from .combat_service import CombatService
+    from .export_service import ExportService
+    from .game_service import GameService
+    from .job_queue import JobQueue
+    from .player_service import PlayerService
+    from .preview_service import PreviewService
+    from .random_service import RandomService
+    from .state_diff_service import StateDiffService
+    from .state_service import GameStateService
+    from .turn_service import TurnService
+
+    defaults = {
+        'combat': lambda r: CombatService(),
+        'action': lambda r: ActionService(r.combat),
+        'player': lambda r: PlayerService(),
+        'random': lambda r: RandomService(),
+        'job_queue': lambda r: JobQueue(),
+        'turn': lambda r: TurnService(),
+        'state': lambda r: GameStateService(turn_service=r.turn),
+        'state_diff': lambda r: StateDiffService(r.state),
+        'preview': lambda r: PreviewService(r.state_diff, combat_service=r.combat),
+        'archive': lambda r: ArchiveService(state_service=r.state),
+        'export': lambda r: ExportService(),
+        'game': lambda r: GameService(
+            combat_service=r.combat,
+            action_service=r.action,
+            state_service=r.state,
+            player_service=r.player,
+            random_service=r.random,
+            job_queue=r.job_queue,
+        ),
+    }
+    # Explicit registrations made before first use take precedence
+    for name, factory in defaults.items():
+        registry._factories.setdefault(name, factory)
+
+
+class _DefaultRegistry(ServiceRegistry):
+    """The process registry; default services are registered on first use
+    so importing it does not import every service module"""
+
+    _defaults_registered = False
+
+    def get(self, name):
+        if not self._defaults_registered:
+            with self._lock:
+                if not self._defaults_registered:
+                    _register_defaults(self)
+                    self._defaults_registered = True
+        return super().get(name)
+
+
+services = _DefaultRegistry()
+
+
+def get_service(name):
+    """Shared instance of the service registered as ``name``"""
+    return services.get(name)
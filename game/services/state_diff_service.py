@@ -0,0 +1,137 @@
+import hashlib
+import json
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from .state_service import GameStateService
+
+# Collections in a game state that are diffed entity by entity
+KEYED_COLLECTIONS = ('players', 'units', 'buildings')
+
+def diff_collection(old_items, new_items):
+    """Patch turning one list of ``id``-keyed dicts into another"""
+    old_by_id = {item['id']: item for item in old_items}
+    new_by_id = {item['id']: item for item in new_items}
+
+    changed = []
+    for entity_id, new_item in new_by_id.items():
+        old_item = old_by_id.get(entity_id)
+        if old_item is None or old_item == new_item:
+            continue
+        fields = {key: value for key, value in new_item.items() if old_item.get(key) != value}
+        fields.update({key: None for key in old_item if key not in new_item})
+        changed.append({'id': entity_id, **fields})
+
+    return {
+        'added': [item for entity_id, item in new_by_id.items() if entity_id not in old_by_id],
+        'removed': [entity_id for entity_id in old_by_id if entity_id not in new_by_id],
+        'changed': changed
+    }
+
+def diff_states(old_state, new_state):
+    """Compact patch from ``old_state`` to ``new_state``.
+
+    Top-level values that differ go under ``set``; keyed collections get
+    added / removed / changed entries with only the fields that moved.
+    """
+    patch = {'set': {}}
+    for key, value in new_state.items():
+        if key in KEYED_COLLECTIONS:
+            collection_patch = diff_collection(old_state.get(key, []), value)
+            if any(collection_patch.values()):
+                patch[key] = collection_patch
+        elif old_state.get(key) != value:
+            patch['set'][key] = value
+    return patch
+
+
+class StateDiffService:
+    """Versions game states and serves patches between versions.
+
+    A version number is derived from the digest of the state it names, so
+    workers and threads that never coordinate still give one state one
+    number and never give two states the same one. The last
+    ``history_size`` snapshots of a game are kept in the cache. A client
+    that sends a version still in that window gets a patch; older or
+    unknown versions get the full snapshot. States are read like any
+    other safe request, so a lagging replica may serve an older turn; such
+    a state is answered but never replaces a newer head. Use a shared cache
+    backend (Redis) when running several workers so they share history.
+    """
+    history_size = 20
+    timeout = 60 * 60
+
+    def __init__(self, state_service=None):
+        self.state_service = state_service or GameStateService()
+
+    def get_state(self, game_id, user, since=None):
+        # Round-trip through JSON so live and cached states compare like the wire format
+        state = json.loads(json.dumps(
+            self.state_service.get_game_state(game_id, user), cls=DjangoJSONEncoder
+        ))
+        version = self._record(game_id, state)
+
+        if since is not None and since != version:
+            base = self._snapshot(game_id, since)
+            if base is not None:
+                return {
+                    'version': version,
+                    'base_version': since,
+                    'full': False,
+                    **diff_states(base, state)
+                }
+        if since == version:
+            return {'version': version, 'base_version': since, 'full': False, 'set': {}}
+        return {'version': version, 'full': True, 'state': state}
+
+    def get_snapshot(self, game_id, user=None):
+        """``(version, state)`` of the latest cached version, recording one if none is cached.
+
+        Cheap enough for hot paths like action previews, at the cost of
+        reflecting the state as of the most recent poll.
+        """
+        head = cache.get(self._head_key(game_id))
+        if head is not None:
+            state = self._snapshot(game_id, head['version'])
+            if state is not None:
+                return head['version'], state
+        response = self.get_state(game_id, user)
+        return response['version'], response['state']
+
+    def _snapshot(self, game_id, version):
+        """Cached state of ``version``, or None once it has left the history"""
+        return cache.get(self._snapshot_key(game_id, version))
+
+    def _version(self, digest):
+        # 48 bits of the digest: unique in practice, and exact as a JavaScript number
+        return int(digest[:12], 16)
+
+    def _record(self, game_id, state):
+        """Store ``state`` under its version and make it the head"""
+        digest = hashlib.sha1(json.dumps(state, sort_keys=True).encode('utf-8')).hexdigest()
+        version = self._version(digest)
+        head_key = self._head_key(game_id)
+        head = cache.get(head_key)
+        if head and head['version'] == version:
+            return version
+
+        snapshot = {self._snapshot_key(game_id, version): state}
+        turn = state.get('current_turn', 0)
+        if head and turn < head.get('turn', 0):
+            # A lagging replica read: serve it, but keep the newer head
+            cache.set_many(snapshot, self.timeout)
+            return version
+
+        history = [v for v in head['history'] if v != version] if head else []
+        history.append(version)
+        cache.set_many({
+            **snapshot,
+            head_key: {'version': version, 'turn': turn, 'history': history[-self.history_size:]}
+        }, self.timeout)
+        cache.delete_many([self._snapshot_key(game_id, v) for v in history[:-self.history_size]])
+        return version
+
+    def _head_key(self, game_id):
+        return f"game_state:{game_id}:head"
+
+    def _snapshot_key(self, game_id, version):
+        return f"game_state:{game_id}:v{version}"
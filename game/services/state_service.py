@@ -5,17 +5,20 @@ from django.utils import timezone
 from django.db import transaction
 from .base import BaseStateService
 from game.core.models import Game, Player, Unit, Building
+from game.signals import announce_turn_started
 from game.api.serializers.game import GameSerializer
 from game.core.game_rules import GAME_RULES
 from django.db import models
 
 class GameStateService(BaseStateService):
-    def __init__(self):
-        self.turn_service = TurnService()
+    def __init__(self, turn_service=None):
+        self.turn_service = turn_service or TurnService()
 
     def get_game_state(self, game_id, user):
         """Get complete game state"""
         game = self._get_game_with_relations(game_id)
+        if hasattr(game, 'archive'):
+            return game.archive.get_state()
         
         return {
             "game_id": game.id,
@@ -48,7 +51,9 @@ class GameStateService(BaseStateService):
         """Advance to the next turn"""
         game.current_turn += 1
         game.current_player_index = (game.current_player_index + 1) % self.get_active_players(game).count()
+        game.turn_started_at = timezone.now()
         game.save()
+        announce_turn_started(game)
 
     @transaction.atomic
     def deactivate_game(self, game):
@@ -59,7 +64,8 @@ class GameStateService(BaseStateService):
     def _get_game_with_relations(self, game_id):
         """Get game with all related data"""
         return Game.objects.select_related(
-            'created_by'
+            'created_by',
+            'archive'
         ).prefetch_related(
             'players__user',
             'players__units',
@@ -130,13 +136,24 @@ class GameStateService(BaseStateService):
         }
 
     def _get_map_data(self, game):
-        """Get map data including terrain and dimensions"""
-        return {
+        """Get map dimensions, plus the terrain itself for maps stored whole.
+
+        Chunked maps are fetched a viewport at a time from the terrain
+        endpoint, so only the chunk size is sent. The token and version
+        identify the terrain for caches.
+        """
+        map_data = {
             'size': game.map_size,
-            'terrain': game.map_data["terrain"],
             'width': game.map_size,
-            'height': game.map_size
+            'height': game.map_size,
+            'terrain_token': game.map_data.get('terrain_token'),
+            'terrain_version': game.map_data.get('terrain_version', 0),
         }
+        if 'terrain' in game.map_data:
+            map_data['terrain'] = game.map_data['terrain']
+        else:
+            map_data['chunk_size'] = game.map_data['chunk_size']
+        return map_data
 
     def _get_players_data(self, game):
         """Get data for all players in the game"""
@@ -172,7 +189,7 @@ class GameStateService(BaseStateService):
 
     def _get_units_data(self, game):
         """Get data for all units in the game"""
-        units = Unit.objects.filter(player__game=game).select_related('player')
+        units = Unit.objects.filter(game=game)
         return [
             {
                 'id': unit.id,
@@ -193,7 +210,7 @@ class GameStateService(BaseStateService):
 
     def _get_buildings_data(self, game):
         """Get data for all buildings in the game"""
-        buildings = Building.objects.filter(player__game=game).select_related('player')
+        buildings = Building.objects.filter(game=game)
         return [
             {
                 'id': building.id,
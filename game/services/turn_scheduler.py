@@ -0,0 +1,212 @@
+import asyncio
+import heapq
+import logging
+import time
+from asgiref.sync import async_to_sync, sync_to_async
+from channels.layers import get_channel_layer
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Count, Q
+from game.core.game_rules import GAME_RULES
+from game.core.models import Game
+from game.signals import TURN_TIMER_GROUP
+
+logger = logging.getLogger(__name__)
+
+# Heap entries whose seconds_left is EXPIRY end the turn instead of ticking
+EXPIRY = 0
+
+
+class TurnScheduler:
+    """Enforces the turn time limit for every active game from one timer heap.
+
+    The heap holds ``(when, game_id, turn, seconds_left)`` entries: one
+    expiry per game plus a countdown tick for each of ``tick_marks``. The
+    loop sleeps until the earliest entry is due or a new turn is announced,
+    so an idle scheduler costs nothing however many games it tracks.
+
+    Entries are never removed from the middle of the heap. A game's current
+    turn lives in ``_turns`` and entries for any other turn are dropped when
+    they surface. Expiry re-reads the game under a row lock, so a turn that
+    was ended elsewhere is only rescheduled, never ended twice.
+    """
+    tick_marks = (60, 30, 10)
+    retry_delay = 5
+
+    def __init__(self, game_service=None, time_limit=None, clock=time.time):
+        if game_service is None:
+            from .registry import services
+            game_service = services.game
+        self.game_service = game_service
+        self.time_limit = time_limit or GAME_RULES['GAME_SETTINGS']['TURN_TIME_LIMIT']
+        self.clock = clock
+        self.channel_layer = get_channel_layer()
+        self._heap = []
+        self._turns = {}
+        self._wakeup = None
+
+    def __len__(self):
+        return len(self._turns)
+
+    def _entries(self, game_id, turn, deadline):
+        now = self.clock()
+        yield (deadline, game_id, turn, EXPIRY)
+        for seconds_left in self.tick_marks:
+            when = deadline - seconds_left
+            if when > now and seconds_left < self.time_limit:
+                yield (when, game_id, turn, seconds_left)
+
+    def schedule(self, game_id, turn, started_at):
+        """Track ``turn`` of a game, replacing any earlier turn"""
+        if self._turns.get(game_id, (0,))[0] >= turn:
+            return
+        deadline = started_at + self.time_limit
+        self._turns[game_id] = (turn, deadline)
+        entries = list(self._entries(game_id, turn, deadline))
+        # Wake the loop if this game is now due before whatever it sleeps on
+        if self._wakeup is not None and (not self._heap or min(entries)[0] < self._heap[0][0]):
+            self._wakeup.set()
+        for entry in entries:
+            heapq.heappush(self._heap, entry)
+        self._compact()
+
+    def cancel(self, game_id):
+        self._turns.pop(game_id, None)
+
+    def load(self):
+        """Rebuild the heap from the database, e.g. after a restart"""
+        games = (
+            Game.objects.filter(is_active=True, archive__isnull=True)
+            .annotate(active_players=Count('players', filter=Q(players__is_active=True)))
+            .filter(active_players__gte=GAME_RULES['GAME_SETTINGS']['MIN_PLAYERS'])
+            .values_list('id', 'current_turn', 'turn_started_at')
+        )
+        self._turns = {}
+        for game_id, turn, started_at in games.iterator(chunk_size=2000):
+            self._turns[game_id] = (turn, started_at.timestamp() + self.time_limit)
+        self._heap = [
+            entry
+            for game_id, (turn, deadline) in self._turns.items()
+            for entry in self._entries(game_id, turn, deadline)
+        ]
+        heapq.heapify(self._heap)
+        return len(self._turns)
+
+    def _is_current(self, entry):
+        current = self._turns.get(entry[1])
+        return current is not None and current[0] == entry[2]
+
+    def _compact(self):
+        """Drop stale entries once they outnumber live ones"""
+        live_limit = len(self._turns) * (len(self.tick_marks) + 1)
+        if len(self._heap) > 2 * live_limit + 64:
+            self._heap = [entry for entry in self._heap if self._is_current(entry)]
+            heapq.heapify(self._heap)
+
+    def next_due(self):
+        """Time of the earliest live entry, or None if nothing is scheduled"""
+        while self._heap and not self._is_current(self._heap[0]):
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now=None):
+        """Remove and return the live ``(game_id, turn, seconds_left)`` entries due by ``now``"""
+        now = self.clock() if now is None else now
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            entry = heapq.heappop(self._heap)
+            if self._is_current(entry):
+                due.append(entry[1:])
+        return due
+
+    def expire(self, game_id, turn):
+        """End ``turn`` of a game if it is still running.
+
+        Returns ``(turn, started_at)`` for the turn now in play, or None if
+        the game should no longer be timed. Runs in a worker thread, so it
+        leaves the heap alone and the caller schedules the result.
+        """
+        with transaction.atomic():
+            game = Game.objects.select_for_update().filter(id=game_id, is_active=True).first()
+            if game is None:
+                return None
+            timed_out = game.current_turn == turn
+            if timed_out:
+                try:
+                    self.game_service.next_turn(game)
+                except ValidationError:
+                    logger.info("Game %s has no active players; no longer timing it", game_id)
+                    return None
+        if timed_out:
+            self.broadcast(game_id, 'turn_timeout', {'turn_number': turn})
+        return game.current_turn, game.turn_started_at.timestamp()
+
+    def broadcast(self, game_id, update_type, data):
+        async_to_sync(self.channel_layer.group_send)(
+            f"game_{game_id}",
+            {"type": "game_update", "update_type": update_type, "data": data},
+        )
+
+    async def tick(self, game_id, turn, seconds_left):
+        await self.channel_layer.group_send(
+            f"game_{game_id}",
+            {
+                "type": "game_update",
+                "update_type": "turn_timer",
+                "data": {
+                    "turn_number": turn,
+                    "seconds_left": seconds_left,
+                    "deadline": self._turns[game_id][1],
+                },
+            },
+        )
+
+    async def run(self):
+        """Serve deadlines until cancelled"""
+        self._wakeup = asyncio.Event()
+        count = await sync_to_async(self.load)()
+        logger.info("Turn timer tracking %s game(s)", count)
+        listener = asyncio.create_task(self._listen())
+        try:
+            while True:
+                for game_id, turn, seconds_left in self.pop_due():
+                    if seconds_left == EXPIRY:
+                        await self._expire(game_id, turn)
+                    else:
+                        await self.tick(game_id, turn, seconds_left)
+                await self._sleep()
+        finally:
+            listener.cancel()
+
+    async def _expire(self, game_id, turn):
+        try:
+            current = await sync_to_async(self.expire)(game_id, turn)
+        except Exception:
+            logger.exception("Could not end turn %s of game %s; retrying", turn, game_id)
+            heapq.heappush(self._heap, (self.clock() + self.retry_delay, game_id, turn, EXPIRY))
+            return
+        if current is None:
+            self.cancel(game_id)
+        else:
+            self.schedule(game_id, *current)
+
+    async def _sleep(self):
+        due = self.next_due()
+        timeout = None if due is None else max(0, due - self.clock())
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _listen(self):
+        """Pick up turns started by other processes"""
+        channel = await self.channel_layer.new_channel()
+        await self.channel_layer.group_add(TURN_TIMER_GROUP, channel)
+        try:
+            while True:
+                message = await self.channel_layer.receive(channel)
+                if message.get("type") == "turn_started":
+                    self.schedule(message["game_id"], message["turn"], message["started_at"])
+        finally:
+            await self.channel_layer.group_discard(TURN_TIMER_GROUP, channel)
@@ -2,13 +2,48 @@ from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.db import transaction
 from .core.models import Game, Unit, Building, Turn
+from .utils.spatial_index import bump_layout
+
+# Channel group the turn timer process listens on for new turns
+TURN_TIMER_GROUP = "turn_timer"
+# Channel group lobby sockets join to hear about new games
+LOBBY_GROUP = "lobby"
+
+_broadcasts_suppressed = ContextVar("broadcasts_suppressed", default=False)
+
+
+@contextmanager
+def suppress_broadcasts():
+    """Skip per-row channel broadcasts for bulk work inside the block"""
+    token = _broadcasts_suppressed.set(True)
+    try:
+        yield
+    finally:
+        _broadcasts_suppressed.reset(token)
+
+
+def announce_turn_started(game):
+    """Tell the turn timer about a new turn once the transaction commits"""
+    message = {
+        "type": "turn_started",
+        "game_id": game.id,
+        "turn": game.current_turn,
+        "started_at": game.turn_started_at.timestamp(),
+    }
+    channel_layer = get_channel_layer()
+    transaction.on_commit(
+        lambda: async_to_sync(channel_layer.group_send)(TURN_TIMER_GROUP, message)
+    )
 
 
 @receiver(post_save, sender=Turn)
 def turn_completed(sender, instance, created, **kwargs):
     """Signal to notify when a turn is completed"""
-    if instance.completed:
+    if instance.completed and not _broadcasts_suppressed.get():
         channel_layer = get_channel_layer()
         async_to_sync(channel_layer.group_send)(
             f"game_{instance.game.id}",
@@ -27,9 +62,12 @@ def turn_completed(sender, instance, created, **kwargs):
 @receiver([post_save, post_delete], sender=Building)
 def entity_changed(sender, instance, **kwargs):
     """Signal to notify when units or buildings are changed"""
+    bump_layout(instance.game_id)
+    if _broadcasts_suppressed.get():
+        return
     channel_layer = get_channel_layer()
     async_to_sync(channel_layer.group_send)(
-        f"game_{instance.player.game.id}",
+        f"game_{instance.game_id}",
         {
             "type": "game_update",
             "update_type": "entity_changed",
@@ -44,6 +82,8 @@ def entity_changed(sender, instance, **kwargs):
 @receiver(post_save, sender=Game)
 def game_updated(sender, instance, **kwargs):
     """Signal to notify when game state changes"""
+    if _broadcasts_suppressed.get():
+        return
     channel_layer = get_channel_layer()
     async_to_sync(channel_layer.group_send)(
         f"game_{instance.id}",
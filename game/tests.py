@@ -1,3 +1,966 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+import gzip
+import shutil
+import tempfile
+import json
+import asyncio
 
-# Create your tests here.
+import msgpack
+from asgiref.sync import async_to_sync, sync_to_async
+from asgiref.testing import ApplicationCommunicator
+from channels.layers import get_channel_layer
+from channels.routing import URLRouter
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management.base import CommandError
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.db import connections
+from django.core.management import call_command
+
+from game.core.models import Game, GameArchive, Job, MapChunk, Player, Unit, Building, Turn
+from game.services.archive_service import ArchiveService
+from game.services.export_service import ExportService
+from game.services.game_service import GameService
+from game.services.combat_service import CombatService
+from game.utils.spatial_index import SpatialIndex, build_spatial_index
+from game.utils.game_helpers import generate_map, is_valid_build_position, is_valid_move
+from game.utils.terrain import TerrainMap, build_map_chunks, chunked_map_data
+from game.utils.pathfinding import ClusterGraph, CostGrid, flow_field
+from game.utils.line_of_sight import SightMask
+from game.utils.terrain_grids import TerrainGrids
+from game.services.random_service import RandomService
+from game.services.state_diff_service import StateDiffService, diff_states
+from game.services.preview_service import PreviewService
+from game.api.idempotency import IDEMPOTENCY_STORE
+from game.middleware import CompressionMiddleware
+from game.services.turn_scheduler import TurnScheduler
+from game.routing import websocket_urlpatterns
+from game.signals import TURN_TIMER_GROUP
+from game.services.registry import ServiceRegistry, services
+from game.services.job_queue import JobQueue, job_handler
+from game.api.serializers import ActionListSerializer
+from game.core.constants import MAP_CHUNK_SIZE, STARTING_UNITS, STARTING_BUILDINGS, UNIT_TYPES, TERRAIN_TYPES
+from game.core.rules import RULES
+from game.services.state_service import GameStateService
+
+
+def create_game_with_players(map_size=10, players=2):
+    User = get_user_model()
+    game = Game.objects.create(
+        name="Test game",
+        map_size=map_size,
+        max_players=players,
+        map_data={"size": map_size, "terrain": [["plains"] * map_size for _ in range(map_size)]},
+    )
+    for number in range(1, players + 1):
+        user = User.objects.create_user(username=f"game{game.id}_player{number}", password="password")
+        Player.objects.create(game=game, user=user, player_number=number, resources=100)
+    return game
+
+
+class GameEntityTests(TestCase):
+    def setUp(self):
+        self.game = create_game_with_players()
+        self.player = self.game.players.first()
+
+    def test_entity_game_defaults_to_player_game(self):
+        unit = Unit.objects.create(player=self.player, unit_type="infantry", x_position=1, y_position=1)
+        building = Building.objects.create(player=self.player, building_type="farm", x_position=2, y_position=2)
+
+        self.assertEqual(unit.game_id, self.game.id)
+        self.assertEqual(building.game_id, self.game.id)
+
+    def test_game_related_entities(self):
+        Unit.objects.create(player=self.player, unit_type="infantry", x_position=1, y_position=1)
+        other_game = create_game_with_players()
+        Unit.objects.create(player=other_game.players.first(), unit_type="infantry", x_position=1, y_position=1)
+
+        self.assertEqual(self.game.units.count(), 1)
+        self.assertEqual(Unit.objects.filter(game=self.game, x_position=1, y_position=1).count(), 1)
+
+
+class ArchiveServiceTests(TestCase):
+    def setUp(self):
+        self.game = create_game_with_players()
+        self.player = self.game.players.first()
+        Unit.objects.create(player=self.player, unit_type="infantry", x_position=1, y_position=1)
+        Building.objects.create(player=self.player, building_type="farm", x_position=2, y_position=2)
+        Turn.objects.create(game=self.game, player=self.player, turn_number=1, completed=True)
+
+    def test_archive_replaces_hot_rows_and_serves_state(self):
+        self.game.is_active = False
+        self.game.save()
+        state_before = GameStateService().get_game_state(self.game.id, None)
+
+        archive = ArchiveService().archive_game(self.game)
+
+        self.assertFalse(Unit.objects.filter(game=self.game).exists())
+        self.assertFalse(Building.objects.filter(game=self.game).exists())
+        self.assertFalse(Turn.objects.filter(game=self.game).exists())
+        self.assertEqual(len(archive.get_history()), 1)
+        self.assertEqual(GameStateService().get_game_state(self.game.id, None), state_before)
+
+    def test_active_games_are_not_archived(self):
+        with self.assertRaises(ValueError):
+            ArchiveService().archive_game(self.game)
+        self.assertFalse(ArchiveService().get_archivable_games().exists())
+
+
+class ExportServiceTests(TestCase):
+    def setUp(self):
+        self.finished = create_game_with_players()
+        self.finished.is_active = False
+        self.finished.save()
+        Unit.objects.create(player=self.finished.players.first(), unit_type="infantry", x_position=1, y_position=1)
+
+        self.archived = create_game_with_players()
+        Unit.objects.create(player=self.archived.players.first(), unit_type="archer", x_position=3, y_position=3)
+        self.archived.is_active = False
+        self.archived.save()
+        ArchiveService().archive_game(self.archived)
+
+        self.active = create_game_with_players()
+        Unit.objects.create(player=self.active.players.first(), unit_type="infantry", x_position=1, y_position=1)
+
+    def test_exports_finished_and_archived_games(self):
+        records = [json.loads(line) for line in ExportService(chunk_size=1).iter_ndjson()]
+
+        games = {r["id"] for r in records if r["record"] == "game"}
+        units = [(r["game_id"], r["type"]) for r in records if r["record"] == "unit"]
+        self.assertEqual(games, {self.finished.id, self.archived.id})
+        self.assertCountEqual(units, [(self.finished.id, "infantry"), (self.archived.id, "archer")])
+
+    def test_export_endpoint_requires_admin(self):
+        user = self.finished.players.first().user
+        self.client.force_login(user)
+        self.assertEqual(self.client.get("/api/games/export").status_code, 403)
+
+        user.is_staff = True
+        user.save()
+        response = self.client.get("/api/games/export")
+        self.assertEqual(response.status_code, 200)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertTrue(all(json.loads(line)["record"] for line in lines))
+
+
+class GameCreationTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.users = [User.objects.create_user(username=f"creator{n}", password="password") for n in range(2)]
+
+    def test_create_game_sets_up_starting_kit(self):
+        game = GameService().create_game(self.users[0], "Single", 10, 2)
+
+        player = game.players.get()
+        self.assertEqual(player.units.count(), sum(STARTING_UNITS.values()))
+        self.assertEqual(player.buildings.count(), sum(STARTING_BUILDINGS.values()))
+        base = player.buildings.first()
+        game.refresh_from_db()
+        self.assertEqual(TerrainMap.for_game(game).get(base.x_position, base.y_position), "plains")
+
+    def test_bulk_create_games(self):
+        games = GameService().bulk_create_games(
+            {"name": f"Bulk {n}", "map_size": 12, "max_players": 2, "users": self.users}
+            for n in range(5)
+        )
+
+        self.assertEqual(Game.objects.count(), 5)
+        self.assertEqual(Player.objects.filter(game__in=games).count(), 10)
+        self.assertEqual(Unit.objects.filter(game__in=games).count(), 10 * sum(STARTING_UNITS.values()))
+        for unit in Unit.objects.filter(game=games[0]).select_related("player"):
+            self.assertEqual(unit.player.game_id, unit.game_id)
+
+    def test_lobby_sockets_hear_about_bulk_created_games(self):
+        async def run():
+            communicator = ApplicationCommunicator(URLRouter(websocket_urlpatterns), {
+                "type": "websocket", "path": "/ws/lobby/", "query_string": b"", "headers": [],
+            })
+            await communicator.send_input({"type": "websocket.connect"})
+            self.assertEqual((await communicator.receive_output(1))["type"], "websocket.accept")
+
+            @sync_to_async
+            def create_games():
+                games = GameService().bulk_create_games(
+                    {"name": f"Lobby {n}", "map_size": 12, "max_players": 2, "users": self.users}
+                    for n in range(2)
+                )
+                JobQueue().work("test", burst=True)
+                return [game.id for game in games]
+
+            game_ids = await create_games()
+            message = json.loads((await communicator.receive_output(1))["text"])
+            await communicator.send_input({"type": "websocket.disconnect", "code": 1000})
+            await communicator.wait(1)
+            return game_ids, message
+
+        game_ids, message = async_to_sync(run)()
+        self.assertEqual(message["update_type"], "games_created")
+        self.assertEqual(message["data"], {"count": 2, "game_ids": game_ids})
+
+
+class ChunkedTerrainTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="mapper", password="password")
+        self.game = GameService().create_game(self.user, "Large", 64, 2)
+        self.game.refresh_from_db()
+
+    def test_large_games_store_terrain_in_chunks(self):
+        self.assertNotIn("terrain", self.game.map_data)
+        self.assertEqual(self.game.map_chunks.count(), (64 // MAP_CHUNK_SIZE) ** 2)
+        terrain = TerrainMap.for_game(self.game)
+        self.assertEqual(len(terrain.rows()), 64)
+        self.assertTrue(all(len(row) == 64 for row in terrain.rows()))
+
+    def test_save_writes_tiles_and_bumps_version(self):
+        terrain = TerrainMap.for_game(self.game)
+        version = terrain.version
+        terrain.set(40, 33, "mountain")
+        terrain.save()
+
+        self.game.refresh_from_db()
+        reloaded = TerrainMap.for_game(self.game)
+        self.assertEqual(reloaded.version, version + 1)
+        self.assertEqual(reloaded.get(40, 33), "mountain")
+
+    def test_terrain_endpoint_returns_viewport_chunks(self):
+        self.client.force_login(self.user)
+        response = self.client.get(f"/api/games/{self.game.id}/terrain", {"x0": 0, "y0": 0, "x1": 20, "y1": 10})
+        self.assertEqual(response.status_code, 200)
+        chunks = response.json()["chunks"]
+        self.assertEqual(sorted((c["cx"], c["cy"]) for c in chunks), [(0, 0), (1, 0)])
+        self.assertEqual(len(chunks[0]["terrain"]), MAP_CHUNK_SIZE)
+
+        response = self.client.get(f"/api/games/{self.game.id}/terrain", {"x0": 0})
+        self.assertEqual(response.status_code, 400)
+
+
+class PathfindingTests(TestCase):
+    def setUp(self):
+        # A water wall down column 20 with one gap at y=35
+        self.rows = [["plains"] * 40 for _ in range(40)]
+        for y in range(40):
+            if y != 35:
+                self.rows[y][20] = "water"
+
+    def test_flow_field_routes_through_the_gap(self):
+        grid = CostGrid.from_rows(self.rows)
+        start, target = grid.index(5, 5), grid.index(30, 5)
+        path = flow_field(grid, target, {start}).path(start, 200)
+
+        self.assertEqual(path[-1], target)
+        self.assertIn(grid.index(20, 35), path)
+        self.assertTrue(all(grid.costs[i] is not None for i in path))
+
+    def test_incremental_graph_matches_full_rebuild(self):
+        before = ClusterGraph(CostGrid.from_rows(self.rows))
+        self.rows[35][20] = "water"
+        self.rows[10][20] = "plains"
+        grid = CostGrid.from_rows(self.rows)
+
+        incremental, full = ClusterGraph(grid, previous=before), ClusterGraph(grid)
+        self.assertEqual(incremental._borders, full._borders)
+        self.assertEqual(incremental._intra, full._intra)
+
+    def test_move_group_gathers_units_around_target(self):
+        game = create_game_with_players(map_size=20)
+        player = game.players.order_by("player_number").first()
+        units = [
+            Unit.objects.create(player=player, unit_type="infantry", x_position=x, y_position=1)
+            for x in range(1, 7)
+        ]
+
+        moved = GameService().move_group(game, player, [u.id for u in units], 10, 10)
+
+        self.assertEqual(len(moved), len(units))
+        positions = set(Unit.objects.filter(player=player).values_list("x_position", "y_position"))
+        self.assertEqual(len(positions), len(units))
+        for before in units:
+            after = Unit.objects.get(id=before.id)
+            self.assertTrue(after.has_moved)
+            self.assertLessEqual(
+                abs(after.x_position - before.x_position) + abs(after.y_position - before.y_position),
+                before.movement_range,
+            )
+            self.assertLess(
+                abs(after.x_position - 10) + abs(after.y_position - 10),
+                abs(before.x_position - 10) + abs(before.y_position - 10),
+            )
+
+
+class LineOfSightTests(TestCase):
+    def setUp(self):
+        self.game = create_game_with_players()
+        self.player, self.other = self.game.players.order_by("player_number")
+        self.archer = Unit.objects.create(player=self.player, unit_type="archer", x_position=1, y_position=1)
+        self.enemy = Unit.objects.create(player=self.other, unit_type="infantry", x_position=4, y_position=1)
+        terrain = TerrainMap.for_game(self.game)
+        terrain.set(2, 1, "forest")
+        terrain.save()
+
+    def test_visible_cells_match_single_ray_checks(self):
+        rows = [["plains"] * 9 for _ in range(9)]
+        rows[4][5] = rows[2][3] = "mountain"
+        sight = SightMask.from_rows(rows)
+
+        visible = set(sight.visible_cells(4, 4, 3))
+        for x in range(1, 8):
+            for y in range(1, 8):
+                if (x, y) != (4, 4):
+                    self.assertEqual((x, y) in visible, sight.has_line_of_sight(4, 4, x, y), (x, y))
+        self.assertNotIn((7, 4), visible)
+        self.assertIn((5, 4), visible)
+
+    def test_forest_blocks_ranged_attacks(self):
+        with self.assertRaisesMessage(ValidationError, "line of sight"):
+            CombatService().validate_attack(self.archer, self.enemy)
+        result = CombatService().resolve_attacks(
+            self.game, self.archer.player, [{"unit_id": self.archer.id, "target_x": 4, "target_y": 1}]
+        )[0]
+        self.assertEqual(result["error"], "Target is not in line of sight")
+
+        self.enemy.x_position, self.enemy.y_position = 1, 4
+        self.enemy.save()
+        CombatService().validate_attack(self.archer, self.enemy)
+
+    def test_targets_endpoint_lists_enemies_in_sight(self):
+        Unit.objects.create(player=self.other, unit_type="infantry", x_position=1, y_position=3)
+        self.client.force_login(self.player.user)
+        response = self.client.get(f"/api/games/{self.game.id}/targets", {"unit_id": self.archer.id})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(t["x"], t["y"]) for t in response.json()], [(1, 3)])
+
+
+class TerrainGridsTests(TestCase):
+    def test_grids_match_the_rules_tile_by_tile(self):
+        # Three chunks per side, the last one narrower
+        rows = generate_map(40, RandomService().map_stream(7))["terrain"]
+        rows[0][0] = "lava"
+        grids = TerrainGrids.from_rows(rows)
+
+        for y, row in enumerate(rows):
+            for x, name in enumerate(row):
+                stats = RULES.terrain(name)
+                self.assertEqual(grids.movement_cost(x, y), RULES.movement_cost(name) if (stats is None or stats.passable) else None)
+                self.assertEqual(grids.passable(x, y), name != "water")
+                self.assertEqual(grids.buildable(x, y), name not in ("water", "mountain"))
+                self.assertEqual(grids.blocks_sight(x, y), name in ("forest", "mountain"))
+                for unit_type in ("archer", "siege", None):
+                    self.assertEqual(grids.damage_modifier(unit_type, x, y), RULES.damage_modifier(unit_type, name))
+        self.assertIsNone(grids.terrain(0, 0))
+        self.assertFalse(grids.passable(40, 0))
+        self.assertEqual(grids.movement_costs(), [grids.movement_cost(x, y) for y in range(40) for x in range(40)])
+
+    def test_single_tile_checks_build_only_their_chunk(self):
+        rows = generate_map(40, RandomService().map_stream(7))["terrain"]
+        game = Game.objects.create(name="Chunked", map_size=40, max_players=2, map_data=chunked_map_data(40))
+        MapChunk.objects.bulk_create(build_map_chunks(game, rows))
+
+        grids = TerrainGrids.for_game(game)
+        with self.assertNumQueries(1):
+            self.assertEqual(grids.passable(35, 20), rows[20][35] != "water")
+            grids.blocks_sight(36, 21)
+        self.assertEqual(set(grids._chunks), {(2, 1)})
+
+    def test_terrain_writes_refresh_the_grids(self):
+        game = create_game_with_players()
+        unit = Unit.objects.create(player=game.players.first(), unit_type="infantry", x_position=1, y_position=1)
+        self.assertTrue(is_valid_build_position(5, 5, game))
+        self.assertTrue(is_valid_move(unit, 2, 1, game))
+
+        terrain = TerrainMap.for_game(game)
+        terrain.set(5, 5, "mountain")
+        terrain.set(2, 1, "water")
+        terrain.save()
+
+        self.assertFalse(is_valid_build_position(5, 5, game))
+        self.assertFalse(is_valid_move(unit, 2, 1, game))
+        self.assertEqual(TerrainGrids.for_game(game).movement_cost(5, 5), RULES.movement_cost("mountain"))
+
+
+class CompiledRulesTests(TestCase):
+    def test_tables_match_constants(self):
+        for data in UNIT_TYPES.values():
+            stats = RULES.unit(data['name'])
+            self.assertEqual(RULES.units[RULES.unit_codes[data['name']]], stats)
+            self.assertEqual(stats.cost, data['cost'])
+            self.assertEqual(stats.attack_range, data['attack_range'])
+        for data in TERRAIN_TYPES.values():
+            self.assertEqual(RULES.movement_cost(data['name']), data['movement_cost'])
+
+    def test_unknown_types_fall_back(self):
+        self.assertIsNone(RULES.unit('dragon'))
+        self.assertEqual(RULES.unit_cost('dragon'), 0)
+        self.assertEqual(RULES.movement_cost('lava'), 1)
+        self.assertEqual(RULES.damage_modifier('archer', 'lava'), 1.0)
+
+    def test_damage_modifier_matrix(self):
+        self.assertEqual(RULES.damage_modifier('archer', 'forest'), 0.8)
+        self.assertFalse(RULES.terrain('water').passable)
+
+
+class BatchCombatTests(TestCase):
+    def setUp(self):
+        self.game = create_game_with_players()
+        self.attacker_player, self.defender_player = self.game.players.all()
+
+    def add_unit(self, player, x, y, unit_type="infantry", **fields):
+        return Unit.objects.create(player=player, unit_type=unit_type, x_position=x, y_position=y, **fields)
+
+    def test_attacks_resolve_simultaneously(self):
+        first = self.add_unit(self.attacker_player, 1, 1)
+        second = self.add_unit(self.attacker_player, 3, 1)
+        target = self.add_unit(self.defender_player, 2, 1, health=15)
+        counter = self.add_unit(self.defender_player, 4, 1)
+
+        results = CombatService().resolve_attacks(self.game, self.attacker_player, [
+            {"unit_id": first.id, "target_x": 2, "target_y": 1},
+            {"unit_id": second.id, "target_x": 2, "target_y": 1},
+        ])
+
+        self.assertTrue(all(result["valid"] for result in results))
+        self.assertTrue(all(result["target_destroyed"] for result in results))
+        self.assertFalse(Unit.objects.filter(id=target.id).exists())
+        self.assertTrue(Unit.objects.get(id=first.id).has_attacked)
+        self.assertEqual(Unit.objects.get(id=counter.id).health, 100)
+
+    def test_invalid_attacks_are_reported_in_order(self):
+        attacker = self.add_unit(self.attacker_player, 1, 1)
+        friendly = self.add_unit(self.attacker_player, 1, 2)
+        self.add_unit(self.defender_player, 8, 8)
+
+        enemy = self.add_unit(self.defender_player, 2, 2)
+
+        results = CombatService().resolve_attacks(self.game, self.attacker_player, [
+            {"unit_id": attacker.id, "target_x": 1, "target_y": 2},
+            {"unit_id": attacker.id, "target_x": 8, "target_y": 8},
+            {"unit_id": 9999, "target_x": 8, "target_y": 8},
+            {"unit_id": enemy.id, "target_x": 1, "target_y": 2},
+        ])
+
+        self.assertEqual(
+            [r["error"] for r in results],
+            ["Invalid target", "Target is out of range", "Unit not found", "Unit not found"],
+        )
+        self.assertFalse(Unit.objects.get(id=attacker.id).has_attacked)
+        self.assertEqual(Unit.objects.get(id=friendly.id).health, 100)
+
+
+class SpatialIndexTests(TestCase):
+    def setUp(self):
+        self.game = create_game_with_players(map_size=30)
+        self.player, self.enemy = self.game.players.all()
+
+    def test_range_and_nearest_queries(self):
+        own = Unit.objects.create(player=self.player, unit_type="archer", x_position=10, y_position=10, attack_range=3)
+        near = Unit.objects.create(player=self.enemy, unit_type="infantry", x_position=12, y_position=13)
+        far = Building.objects.create(player=self.enemy, building_type="farm", x_position=25, y_position=2)
+        index = build_spatial_index(self.game)
+
+        self.assertEqual(index.enemies_within(10, 10, 3, self.player.id), [near])
+        self.assertEqual(index.nearest_enemy(10, 10, self.player.id), near)
+        self.assertEqual(CombatService().get_valid_targets(own, self.game, index), [near])
+
+        index.remove(near)
+        self.assertEqual(index.nearest_enemy(10, 10, self.player.id), far)
+        near.x_position = 0
+        index.move(near)
+        self.assertEqual(index.nearest_enemy(10, 10, self.player.id), near)
+        self.assertEqual(index.at(0, 13), [near])
+
+    def test_combat_index_is_shared_until_the_layout_changes(self):
+        service = CombatService()
+        own = Unit.objects.create(player=self.player, unit_type="archer", x_position=10, y_position=10, attack_range=3)
+        enemy = Unit.objects.create(player=self.enemy, unit_type="infantry", x_position=20, y_position=20)
+        index = service.get_index(self.game)
+        self.assertIs(service.get_index(self.game), index)
+        self.assertEqual(service.get_valid_targets(own, self.game), [])
+
+        enemy.x_position, enemy.y_position = 12, 12
+        enemy.save()
+        self.assertIsNot(service.get_index(self.game), index)
+        self.assertEqual(service.get_nearest_enemy(own, self.game), enemy)
+        self.assertEqual(service.get_valid_targets(own, self.game), [enemy])
+
+    def test_within_matches_brute_force(self):
+        class Entity:
+            class _meta:
+                model_name = "entity"
+
+            def __init__(self, pk, x, y):
+                self.pk, self.x_position, self.y_position, self.player_id = pk, x, y, 1
+
+        entities = [Entity(n, (n * 7) % 40, (n * 13) % 40) for n in range(200)]
+        index = SpatialIndex(cell_size=5)
+        for entity in entities:
+            index.add(entity)
+
+        for radius in (0, 1, 4, 11):
+            expected = {e.pk for e in entities if max(abs(e.x_position - 20), abs(e.y_position - 17)) <= radius}
+            self.assertEqual({e.pk for e in index.within(20, 17, radius)}, expected)
+
+
+class RandomServiceTests(TestCase):
+    def test_map_generation_is_reproducible(self):
+        service = RandomService()
+        self.assertEqual(generate_map(15, service.map_stream(42)), generate_map(15, service.map_stream(42)))
+        self.assertNotEqual(generate_map(15, service.map_stream(42)), generate_map(15, service.map_stream(43)))
+
+
+class StateDiffTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.game = create_game_with_players()
+        self.player = self.game.players.first()
+        self.unit = Unit.objects.create(player=self.player, unit_type="infantry", x_position=1, y_position=1)
+        self.client.force_login(self.player.user)
+
+    def test_diff_states(self):
+        old = {"current_turn": 1, "units": [{"id": 1, "x": 1}, {"id": 2, "x": 5}]}
+        new = {"current_turn": 2, "units": [{"id": 1, "x": 2}, {"id": 3, "x": 7}]}
+
+        self.assertEqual(diff_states(old, new), {
+            "set": {"current_turn": 2},
+            "units": {"added": [{"id": 3, "x": 7}], "removed": [2], "changed": [{"id": 1, "x": 2}]},
+        })
+
+    def test_state_endpoint_serves_patches(self):
+        url = f"/api/games/{self.game.id}/state"
+        full = self.client.get(url).json()
+        self.assertTrue(full["full"])
+
+        self.unit.x_position = 2
+        self.unit.save()
+        patch = self.client.get(url, {"since": full["version"]}).json()
+
+        self.assertFalse(patch["full"])
+        self.assertNotEqual(patch["version"], full["version"])
+        self.assertEqual(patch["units"]["changed"], [{"id": self.unit.id, "x": 2}])
+        self.assertTrue(self.client.get(url, {"since": 999}).json()["full"])
+
+    def test_versions_follow_state_content(self):
+        service = StateDiffService()
+        first = service.get_state(self.game.id, None)["version"]
+        Unit.objects.filter(id=self.unit.id).update(x_position=2)
+        service.get_state(self.game.id, None)
+        Unit.objects.filter(id=self.unit.id).update(x_position=1)
+        self.assertEqual(service.get_state(self.game.id, None)["version"], first)
+
+        # A base that has left the cache gets the full state
+        cache.delete(service._snapshot_key(self.game.id, first))
+        Unit.objects.filter(id=self.unit.id).update(x_position=3)
+        self.assertTrue(service.get_state(self.game.id, None, since=first)["full"])
+
+
+class WireFormatTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.game = create_game_with_players()
+        self.player = self.game.players.first()
+        Unit.objects.create(player=self.player, unit_type="infantry", x_position=1, y_position=1)
+        self.client.force_login(self.player.user)
+        self.url = f"/api/games/{self.game.id}/state"
+
+    def test_state_as_msgpack(self):
+        response = self.client.get(self.url, HTTP_ACCEPT="application/msgpack")
+
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+        self.assertEqual(msgpack.unpackb(response.content, raw=False), self.client.get(self.url).json())
+
+    def test_compact_layout(self):
+        state = self.client.get(self.url, {"layout": "compact"}).json()["state"]
+
+        units = state["units"]
+        self.assertEqual(len(units["rows"]), 1)
+        row = dict(zip(units["columns"], units["rows"][0]))
+        self.assertEqual((row["x"], row["y"], row["type"]), (1, 1, "infantry"))
+
+
+class CompressionTests(TestCase):
+    def setUp(self):
+        self.game = create_game_with_players()
+        self.player = self.game.players.first()
+        self.client.force_login(self.player.user)
+
+    def test_constants_cached_by_etag(self):
+        url = "/api/games/constants"
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("unit_types", json.loads(gzip.decompress(response.content)))
+        self.assertIn("Accept-Encoding", response["Vary"])
+
+        cached = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.content, b"")
+
+    def test_state_compressed_above_threshold(self):
+        url = f"/api/games/{self.game.id}/state"
+        with override_settings(GAME_COMPRESSION_MIN_SIZE=10 ** 6):
+            plain = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertFalse(plain.has_header("Content-Encoding"))
+
+        with override_settings(GAME_COMPRESSION_MIN_SIZE=0):
+            compressed = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(compressed["Content-Encoding"], "gzip")
+        self.assertEqual(json.loads(gzip.decompress(compressed.content))["version"], plain.json()["version"])
+
+    @override_settings(GAME_COMPRESSION_MIN_SIZE=0)
+    def test_refused_encodings_and_html_stay_uncompressed(self):
+        url = f"/api/games/{self.game.id}/state"
+        self.assertFalse(self.client.get(url, HTTP_ACCEPT_ENCODING="gzip;q=0, br;q=0").has_header("Content-Encoding"))
+        self.assertFalse(self.client.get("/api/games/constants", HTTP_ACCEPT_ENCODING="gzip;q=0").has_header("Content-Encoding"))
+
+        page = CompressionMiddleware(lambda request: HttpResponse("<p>game</p>" * 500))(
+            RequestFactory().get("/", HTTP_ACCEPT_ENCODING="gzip")
+        )
+        self.assertFalse(page.has_header("Content-Encoding"))
+
+
+class TurnSchedulerTests(TestCase):
+    def setUp(self):
+        self.game = create_game_with_players()
+        self.started = self.game.turn_started_at.timestamp()
+        self.scheduler = TurnScheduler(time_limit=100, clock=lambda: self.started)
+
+    def test_load_rebuilds_heap_from_database(self):
+        Game.objects.create(name="Empty", map_size=10, max_players=2)
+
+        self.assertEqual(self.scheduler.load(), 1)
+        self.assertEqual(self.scheduler.next_due(), self.started + 40)
+        self.assertEqual(self.scheduler.pop_due(self.started + 100), [
+            (self.game.id, 1, 60), (self.game.id, 1, 30), (self.game.id, 1, 10), (self.game.id, 1, 0)
+        ])
+
+    def test_stale_turn_entries_are_skipped(self):
+        self.scheduler.schedule(self.game.id, 1, self.started)
+        self.scheduler.schedule(self.game.id, 2, self.started + 50)
+
+        due = self.scheduler.pop_due(self.started + 150)
+        self.assertEqual({turn for _, turn, _ in due}, {2})
+
+    def test_expire_ends_only_the_running_turn(self):
+        self.assertEqual(self.scheduler.expire(self.game.id, 1)[0], 2)
+        self.assertEqual(self.scheduler.expire(self.game.id, 1)[0], 2)
+
+        self.game.refresh_from_db()
+        self.assertEqual(self.game.current_turn, 2)
+
+    def test_game_reaching_min_players_is_scheduled(self):
+        User = get_user_model()
+        layer = get_channel_layer()
+        channel = async_to_sync(layer.new_channel)()
+        async_to_sync(layer.group_add)(TURN_TIMER_GROUP, channel)
+        service = GameService()
+        game = service.create_game(User.objects.create_user(username="host"), "Lobby game", 20, 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            service.add_player(game, User.objects.create_user(username="guest"))
+
+        async def receive():
+            return await asyncio.wait_for(layer.receive(channel), 1)
+
+        message = async_to_sync(receive)()
+        self.scheduler.schedule(message["game_id"], message["turn"], message["started_at"])
+        self.assertEqual(message["game_id"], game.id)
+        self.assertGreater(message["started_at"], game.created_at.timestamp())
+        self.assertIn(game.id, self.scheduler._turns)
+
+    def test_command_refuses_in_memory_channel_layer(self):
+        with self.assertRaisesMessage(CommandError, "REDIS_URL"):
+            call_command("run_turn_timer")
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        self.queue = JobQueue()
+        self.game = create_game_with_players()
+        self.calls = []
+        job_handler("record")(lambda payload: self.calls.append(payload["n"]))
+
+    def test_jobs_of_one_game_run_in_enqueue_order(self):
+        self.queue.enqueue("record", {"n": 1}, game=self.game)
+        self.queue.enqueue("record", {"n": 2}, game=self.game, priority=5)
+        self.queue.enqueue("record", {"n": 3}, priority=1)
+
+        self.assertEqual([job.payload["n"] for job in self.queue.claim("w", limit=10)], [3, 1])
+        self.assertEqual(self.queue.claim("w2", limit=10), [])
+        self.assertEqual(self.queue.work("w", burst=True), 0)
+
+    def test_failed_job_is_retried_then_marked_failed(self):
+        job_handler("broken")(lambda payload: 1 / 0)
+        job = self.queue.enqueue("broken", max_attempts=2)
+
+        self.queue.work("w", burst=True)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+        self.assertIn("ZeroDivisionError", job.last_error)
+
+        Job.objects.filter(id=job.id).update(run_after=job.created_at)
+        self.queue.work("w", burst=True)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+
+    def test_deactivated_game_is_archived_by_worker(self):
+        GameService().deactivate_game(self.game)
+        self.assertFalse(GameArchive.objects.filter(game=self.game).exists())
+
+        self.assertEqual(self.queue.work("w", burst=True), 1)
+        self.assertTrue(GameArchive.objects.filter(game=self.game).exists())
+
+    def test_round_income_is_paid_by_worker_once_round_closes(self):
+        service = GameService()
+        first, second = self.game.players.order_by("player_number")
+        service.process_turn_actions(self.game, first, [])
+        self.assertFalse(Job.objects.filter(kind="settle_round").exists())
+
+        service.process_turn_actions(self.game, second, [])
+        job = Job.objects.get(kind="settle_round")
+        self.assertEqual(job.payload["turn"], 2)
+
+        self.assertEqual(self.queue.work("w", burst=True), 1)
+        self.assertEqual(
+            list(self.game.players.order_by("player_number").values_list("resources", flat=True)), [105, 105]
+        )
+
+        # A job re-run after a worker died, or enqueued twice, pays nothing more
+        Job.objects.filter(id=job.id).update(status=Job.QUEUED)
+        self.assertEqual(self.queue.work("w", burst=True), 1)
+        self.assertEqual(
+            list(self.game.players.order_by("player_number").values_list("resources", flat=True)), [105, 105]
+        )
+
+    def test_rounds_ended_by_next_turn_are_settled(self):
+        service = GameService()
+        service.next_turn(self.game)
+        self.assertFalse(Job.objects.filter(kind="settle_round").exists())
+        service.next_turn(self.game)
+
+        self.assertEqual(Job.objects.get(kind="settle_round").payload["turn"], 2)
+        self.queue.work("w", burst=True)
+        self.game.refresh_from_db()
+        self.assertEqual(self.game.last_settled_turn, 2)
+
+
+class ActionValidationTests(TestCase):
+    def setUp(self):
+        self.game = create_game_with_players()
+        self.player = self.game.players.first()
+        self.units = [
+            Unit.objects.create(player=self.player, unit_type="infantry", x_position=n % 10, y_position=n // 10)
+            for n in range(25)
+        ]
+        self.barracks = Building.objects.create(player=self.player, building_type="barracks", x_position=9, y_position=9)
+
+    def validate(self, actions):
+        serializer = ActionListSerializer(data={"actions": actions}, context={"player": self.player})
+        return serializer.is_valid(), serializer
+
+    def test_batch_resolves_entities_in_two_queries(self):
+        actions = [{"type": "move_unit", "unit_id": unit.id, "x": 1, "y": 1} for unit in self.units]
+        actions += [{"type": "attack", "unit_id": unit.id, "target_x": 2, "target_y": 2} for unit in self.units[:24]]
+        actions.append({"type": "train_unit", "barracks_id": self.barracks.id, "unit_type": "infantry"})
+
+        with self.assertNumQueries(2):
+            valid, serializer = self.validate(actions)
+
+        self.assertTrue(valid)
+        validated = serializer.validated_data["actions"]
+        self.assertEqual(validated[0]["unit"], self.units[0])
+        self.assertEqual(validated[-1]["barracks"], self.barracks)
+
+    def test_units_of_other_players_are_rejected(self):
+        other = self.game.players.exclude(id=self.player.id).first()
+        enemy = Unit.objects.create(player=other, unit_type="infantry", x_position=5, y_position=5)
+
+        valid, serializer = self.validate([{"type": "move_unit", "unit_id": enemy.id, "x": 1, "y": 1}])
+
+        self.assertFalse(valid)
+        self.assertIn(str(enemy.id), str(serializer.errors))
+
+
+class PreviewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.game = create_game_with_players()
+        self.player, self.other = self.game.players.order_by("player_number")
+        self.unit = Unit.objects.create(player=self.player, unit_type="infantry", x_position=1, y_position=1)
+        self.enemy = Unit.objects.create(player=self.other, unit_type="infantry", x_position=2, y_position=2)
+        self.service = PreviewService()
+
+    def test_actions_see_earlier_actions_without_saving(self):
+        preview = self.service.preview(self.game.id, self.player, [
+            {"type": "move_unit", "unit_id": self.unit.id, "x": 1, "y": 3},
+            {"type": "move_unit", "unit_id": self.unit.id, "x": 1, "y": 4},
+            {"type": "build", "building_type": "farm", "x": 1, "y": 3},
+        ])
+
+        self.assertTrue(preview["actions"][0]["valid"])
+        self.assertEqual(preview["actions"][1]["error"], "Unit has already moved")
+        self.assertEqual(preview["actions"][2]["error"], "Position is occupied")
+        self.unit.refresh_from_db()
+        self.assertEqual((self.unit.x_position, self.unit.y_position), (1, 1))
+
+    def test_attack_estimates_damage(self):
+        result = self.service.preview(self.game.id, self.player, [
+            {"type": "attack", "unit_id": self.unit.id, "target_x": 2, "target_y": 2},
+        ])["actions"][0]
+
+        expected = CombatService().damage_for_type("infantry", "plains")
+        self.assertEqual(result["damage"], expected)
+        self.assertEqual(result["target_health"], max(0, self.enemy.health - expected))
+        self.enemy.refresh_from_db()
+        self.assertEqual(self.enemy.health, RULES.unit("infantry").health)
+
+    def test_preview_endpoint(self):
+        self.client.force_login(self.player.user)
+        response = self.client.post(
+            f"/api/games/{self.game.id}/preview",
+            {"actions": [{"type": "build", "building_type": "farm", "x": 5, "y": 5}]},
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertIn("version", body)
+        self.assertEqual(body["resources"], 100 - RULES.building("farm").cost)
+        self.assertFalse(Building.objects.filter(game=self.game).exists())
+
+
+class IdempotencyTests(TestCase):
+    def setUp(self):
+        IDEMPOTENCY_STORE.cache.clear()
+        IDEMPOTENCY_STORE.reset_stats()
+        self.game = create_game_with_players()
+        self.player = self.game.players.first()
+        self.unit = Unit.objects.create(player=self.player, unit_type="infantry", x_position=1, y_position=1)
+        self.client.force_login(self.player.user)
+        self.url = f"/api/games/{self.game.id}/move_unit"
+
+    def move(self, x, key="retry-1"):
+        return self.client.post(
+            self.url, {"unit_id": self.unit.id, "x": x, "y": 1},
+            content_type="application/json", HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_retry_replays_stored_response(self):
+        first = self.move(2)
+        with self.assertNumQueries(2):  # session and user lookups only
+            retry = self.move(2)
+
+        self.assertEqual(retry.status_code, first.status_code)
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(IDEMPOTENCY_STORE.stats()["hit_rate"], 0.5)
+
+    def test_key_reused_with_different_body(self):
+        self.move(2)
+        self.assertEqual(self.move(3).status_code, 422)
+        self.assertEqual(self.move(3, key="retry-2").status_code, self.move(2, key="retry-3").status_code)
+
+
+class ServiceRegistryTests(TestCase):
+    def test_services_are_shared_and_wired_together(self):
+        game_service = services.game
+
+        self.assertIs(services.get("game"), game_service)
+        self.assertIs(game_service.combat_service, services.combat)
+        self.assertIs(game_service.action_service.combat_service, services.combat)
+        self.assertIs(services.preview.state_diff_service.state_service, game_service.state_service)
+
+    def test_override_and_lazy_factories(self):
+        registry = ServiceRegistry()
+        built = []
+        registry.register("thing", lambda r: built.append(object()) or built[-1])
+
+        self.assertEqual(built, [])
+        self.assertIs(registry.thing, registry.thing)
+        with registry.override("thing", "stub"):
+            self.assertEqual(registry.thing, "stub")
+        self.assertIs(registry.thing, built[0])
+        self.assertEqual(len(built), 1)
+
+
+class DatabaseProfileTests(TestCase):
+    def test_sqlite_connection_options(self):
+        from django.db import connection
+
+        if connection.vendor != "sqlite":
+            self.skipTest("SQLite profile only")
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA busy_timeout")
+            self.assertEqual(cursor.fetchone()[0], 5000)
+        self.assertEqual(connection.transaction_mode, "IMMEDIATE")
+
+
+class ReplicaRoutingTests(TransactionTestCase):
+    """Routing against a second local SQLite database standing in for a replica.
+
+    The alias is added after the test runner has set up its databases, so
+    replica writes are not rolled back; replicate() rewrites the tables.
+    A TransactionTestCase, since the router keeps reads inside an atomic
+    block (which TestCase wraps every test in) on the primary.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.replica_dir = tempfile.mkdtemp()
+        connections.settings["replica"] = dict(
+            connections.settings["default"], NAME=f"{cls.replica_dir}/replica.sqlite3"
+        )
+        call_command("migrate", database="replica", verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        connections["replica"].close()
+        del connections["replica"]
+        del connections.settings["replica"]
+        shutil.rmtree(cls.replica_dir)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.game = create_game_with_players()
+        self.player = self.game.players.first()
+        self.client.force_login(self.player.user)
+        self.url = f"/api/games/{self.game.id}"
+        self.replicate()
+
+    def replicate(self):
+        """Bring the replica up to date with the primary"""
+        from django.contrib.sessions.models import Session
+
+        for model in (get_user_model(), Session, Game, Player):
+            model.objects.using("replica").all().delete()
+        for model in (get_user_model(), Session, Game, Player):
+            model.objects.using("replica").bulk_create(model.objects.using("default").all())
+
+    def test_safe_reads_use_replica_and_writes_pin_to_primary(self):
+        Game.objects.filter(id=self.game.id).update(name="Renamed")
+        self.assertEqual(self.client.get(self.url).json()["name"], "Test game")
+
+        response = self.client.post(f"{self.url}/preview", {"actions": []}, content_type="application/json")
+        self.assertEqual(response.cookies["db_pin"]["max-age"], 5)
+        self.assertEqual(self.client.get(self.url).json()["name"], "Renamed")
+
+        # Once the pin expires reads may be stale again until replication catches up
+        del self.client.cookies["db_pin"]
+        self.assertEqual(self.client.get(self.url).json()["name"], "Test game")
+        self.replicate()
+        self.assertEqual(self.client.get(self.url).json()["name"], "Renamed")
+
+    def test_state_reads_never_move_the_head_back(self):
+        cache.clear()
+        Game.objects.filter(id=self.game.id).update(current_turn=2, name="Renamed")
+        self.replicate()
+        head = self.client.get(f"{self.url}/state").json()["version"]
+
+        # The replica falls a turn behind: the poll is served from it
+        Game.objects.using("replica").filter(id=self.game.id).update(current_turn=1, name="Stale")
+        stale = self.client.get(f"{self.url}/state").json()
+        self.assertEqual(stale["state"]["name"], "Stale")
+        self.assertEqual(services.state_diff.get_snapshot(self.game.id)[0], head)
+
+    def test_reads_outside_requests_use_primary(self):
+        Game.objects.filter(id=self.game.id).update(name="Renamed")
+        self.assertEqual(Game.objects.get(id=self.game.id).name, "Renamed")
@@ -1,34 +1,30 @@
-import random
+from collections import Counter
 from django.utils import timezone
 from game.core.models import Game, Player, Unit, Building, Turn
 from game.core.constants import TERRAIN_TYPES
+from game.core.rules import RULES
+from .terrain_grids import TerrainGrids
 
-def generate_map(size):
-    """Generate a random map with various terrain types."""
+def generate_map(size, rng):
+    """Generate a random map with various terrain types from ``rng``, the game's map stream."""
     terrain_types = list(TERRAIN_TYPES.values())
     weights = [t['spawn_weight'] for t in terrain_types]
-    map_data = {"size": size, "terrain": []}
-    
-    for _ in range(size):
-        row = []
-        for _ in range(size):
-            terrain = random.choices(
-                [t['name'] for t in terrain_types], 
-                weights=weights
-            )[0]
-            row.append(terrain)
-        map_data["terrain"].append(row)
-    return map_data
+    tiles = rng.choices(
+        [t['name'] for t in terrain_types],
+        weights=weights,
+        k=size * size
+    )
+    return {"size": size, "terrain": [tiles[row:row + size] for row in range(0, size * size, size)]}
 
 def get_terrain_movement_cost(terrain):
     """Get movement cost for a terrain type."""
-    for terrain_data in TERRAIN_TYPES.values():
-        if terrain_data['name'] == terrain:
-            return terrain_data['movement_cost']
-    return 1
+    return RULES.movement_cost(terrain)
 
-def get_starting_position(map_data, player_number, map_size):
-    """Determine starting position based on player number."""
+# Tiles around the starting base where starting units are placed
+STARTING_UNIT_OFFSETS = [(1, 0), (0, 1), (1, 1), (-1, 0), (0, -1), (-1, -1), (1, -1), (-1, 1)]
+
+def get_starting_position(terrain, player_number, map_size):
+    """Determine starting position based on player number, clearing it to plains in ``terrain``."""
     positions = [
         {"x": 1, "y": 1},
         {"x": map_size - 2, "y": map_size - 2},  
@@ -37,7 +33,7 @@ def get_starting_position(map_data, player_number, map_size):
     ]
     idx = min(player_number - 1, len(positions) - 1)
     position = positions[idx]
-    map_data.terrain[position["y"]][position["x"]] = "plains"
+    terrain.set(position["x"], position["y"], "plains")
     return position
 
 def is_player_turn(game, player):
@@ -52,7 +48,8 @@ def is_player_turn(game, player):
 
 def is_valid_move(unit, x, y, game):
     """Check if a move is valid."""
-    if x < 0 or y < 0 or x >= game.map_size or y >= game.map_size:
+    map_size = int(game.map_size)
+    if x < 0 or y < 0 or x >= map_size or y >= map_size:
         return False
     distance = abs(unit.x_position - x) + abs(unit.y_position - y)
     if distance > unit.movement_range:
@@ -61,56 +58,39 @@ def is_valid_move(unit, x, y, game):
         return False
     if Building.objects.filter(game=game, x_position=x, y_position=y).exists():
         return False
-    map_data = game.get_map()
-    terrain = map_data["terrain"][y][x]
-    if terrain == "water":
-        return False
-    return True
+    return TerrainGrids.for_game(game).passable(x, y)
 
-def is_valid_attack(unit, target):
-    """Check if an attack is valid."""
+def is_valid_attack(unit, target, sight=None):
+    """Check if an attack is valid: in range, with nothing blocking sight in between."""
     distance = abs(unit.x_position - target.x_position) + abs(unit.y_position - target.y_position)
-    return distance <= unit.attack_range
-
-def calculate_damage(attacker, defender):
-    """Calculate damage for an attack."""
-    if hasattr(defender, "defense"):
-        base_damage = max(1, attacker.attack - defender.defense)
-    else:
-        base_damage = attacker.attack
-    return base_damage + random.randint(0, 3)
+    if distance > unit.attack_range:
+        return False
+    sight = sight or TerrainGrids.for_game(unit.game).sight
+    return sight.has_line_of_sight(unit.x_position, unit.y_position, target.x_position, target.y_position)
 
 def is_valid_build_position(x, y, game):
     """Check if a position is valid for building."""
-    if x < 0 or y < 0 or x >= game.map_size or y >= game.map_size:
+    map_size = int(game.map_size)
+    if x < 0 or y < 0 or x >= map_size or y >= map_size:
         return False
     if Unit.objects.filter(game=game, x_position=x, y_position=y).exists():
         return False
     if Building.objects.filter(game=game, x_position=x, y_position=y).exists():
         return False
-    map_data = game.get_map()
-    terrain = map_data["terrain"][y][x]
-    if terrain in ["water", "mountain"]:
-        return False
-    return True
-
-def advance_game_if_all_turns_complete(game):
-    """Advance the game if all players have completed their turn."""
-    player_count = Player.objects.filter(game=game).count()
-    completed_turns = Turn.objects.filter(
-        game=game, turn_number=game.current_turn, completed=True
-    ).count()
+    return TerrainGrids.for_game(game).buildable(x, y)
 
-    if completed_turns >= player_count:
-        Unit.objects.filter(game=game).update(has_moved=False, has_attacked=False)
-        for player in Player.objects.filter(game=game):
-            base_income = 5
-            farm_income = Building.objects.filter(player=player, building_type="farm").count() * 3
-            mine_income = Building.objects.filter(player=player, building_type="mine").count() * 5
-            player.resources += base_income + farm_income + mine_income
-            player.save()
-        game.current_turn += 1
-        game.save()
+def collect_round_income(game):
+    """Pay every player their base, farm and mine income for a finished round."""
+    building_counts = Counter(
+        Building.objects.filter(game=game, building_type__in=["farm", "mine"])
+        .values_list("player_id", "building_type")
+    )
+    for player in Player.objects.filter(game=game):
+        base_income = 5
+        farm_income = building_counts[(player.id, "farm")] * 3
+        mine_income = building_counts[(player.id, "mine")] * 5
+        player.resources += base_income + farm_income + mine_income
+        player.save()
 
 def _add_visible_cells(x, y, visibility_range, game_size, visible_cells):
     """Helper function to add visible cells for a given position."""
@@ -129,5 +109,5 @@ def calculate_visibility_map(game, player):
     entities.extend(Building.objects.filter(player=player))
     for entity in entities:
         x, y = entity.x_position, entity.y_position
-        _add_visible_cells(x, y, visibility_range, game.map_size, visible_cells)
+        _add_visible_cells(x, y, visibility_range, int(game.map_size), visible_cells)
     return list(visible_cells)
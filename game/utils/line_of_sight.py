@@ -0,0 +1,110 @@
+"""Line of sight for ranged attacks.
+
+The tiles a sight line crosses depend only on the offset between the two
+ends, so the Bresenham path of every offset within the longest attack range
+is computed once at import. A game's terrain is reduced to a "blocks sight"
+grid (forest and mountain), kept with the map's other tile grids in
+:mod:`game.utils.terrain_grids`. Checking one target
+then costs one lookup per tile between the two ends, and
+:meth:`SightMask.visible_cells` answers "every tile in range and in sight"
+with one bitmask per ray against the blockers around the shooter.
+"""
+from game.core.rules import RULES
+
+BLOCKS_SIGHT = {t.name for t in RULES.terrains if t.blocks_sight}
+
+
+def bresenham(dx, dy):
+    """Offsets strictly between (0, 0) and (dx, dy) on the Bresenham line"""
+    points = []
+    x = y = 0
+    step_x = 1 if dx > 0 else -1
+    step_y = 1 if dy > 0 else -1
+    ax, ay = abs(dx), abs(dy)
+    error = ax - ay
+    while (x, y) != (dx, dy):
+        doubled = 2 * error
+        if doubled >= -ay:
+            error -= ay
+            x += step_x
+        if doubled <= ax:
+            error += ax
+            y += step_y
+        if (x, y) != (dx, dy):
+            points.append((x, y))
+    return tuple(points)
+
+
+def _ray_tables(max_range):
+    """Per range: ``(dx, dy, bits)`` for each offset within it (Chebyshev),
+    ``bits`` marking the ray's tiles in a (2r+1)-wide window around the shooter"""
+    rays = {
+        (dx, dy): bresenham(dx, dy)
+        for dy in range(-max_range, max_range + 1)
+        for dx in range(-max_range, max_range + 1)
+        if (dx, dy) != (0, 0)
+    }
+    tables = {}
+    for attack_range in range(1, max_range + 1):
+        width = 2 * attack_range + 1
+        tables[attack_range] = tuple(
+            (dx, dy, sum(1 << ((py + attack_range) * width + px + attack_range) for px, py in ray))
+            for (dx, dy), ray in rays.items()
+            if max(abs(dx), abs(dy)) <= attack_range
+        )
+    return rays, tables
+
+
+RAYS, RAY_TABLES = _ray_tables(RULES.max_attack_range)
+
+
+class SightMask:
+    """Which tiles of one map block sight"""
+
+    def __init__(self, size, blocked):
+        self.size = size
+        # Row-major, 1 where the tile blocks sight
+        self.blocked = blocked
+
+    @classmethod
+    def from_rows(cls, rows):
+        return cls(len(rows), bytes(tile in BLOCKS_SIGHT for row in rows for tile in row))
+
+    def blocks(self, x, y):
+        return 0 <= x < self.size and 0 <= y < self.size and bool(self.blocked[y * self.size + x])
+
+    def has_line_of_sight(self, x0, y0, x1, y1):
+        """Whether nothing between the two tiles blocks sight; the ends never do"""
+        dx, dy = x1 - x0, y1 - y0
+        ray = RAYS.get((dx, dy))
+        if ray is None:
+            ray = bresenham(dx, dy)
+        size, blocked = self.size, self.blocked
+        return not any(blocked[(y0 + py) * size + x0 + px] for px, py in ray)
+
+    def _window(self, x, y, attack_range):
+        """Bitmask of the blocking tiles in the square of ``attack_range`` around (x, y)"""
+        size, blocked = self.size, self.blocked
+        width = 2 * attack_range + 1
+        bits = 0
+        for row, ty in enumerate(range(y - attack_range, y + attack_range + 1)):
+            if not 0 <= ty < size:
+                continue
+            base = ty * size
+            for column, tx in enumerate(range(x - attack_range, x + attack_range + 1)):
+                if 0 <= tx < size and blocked[base + tx]:
+                    bits |= 1 << (row * width + column)
+        return bits
+
+    def visible_cells(self, x, y, attack_range):
+        """Every on-map tile within ``attack_range`` of (x, y) that is in sight"""
+        attack_range = min(attack_range, RULES.max_attack_range)
+        if attack_range < 1:
+            return []
+        window = self._window(x, y, attack_range)
+        size = self.size
+        return [
+            (x + dx, y + dy)
+            for dx, dy, ray in RAY_TABLES[attack_range]
+            if not ray & window and 0 <= x + dx < size and 0 <= y + dy < size
+        ]
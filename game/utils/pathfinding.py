@@ -0,0 +1,349 @@
+"""Group pathfinding over a game's movement-cost grid.
+
+``CostGrid`` flattens the terrain into the cost of entering each tile, with
+water and buildings as walls. ``ClusterGraph`` splits the grid into square
+clusters joined by portals (the middle of every open run along a shared
+border) and precomputes the cost between the portals of each cluster, so a
+long trip is first planned over a few hundred portals instead of every
+tile. ``FlowField`` then runs one Dijkstra outward from the target across
+the clusters on that plan; every unit of a group walks the field downhill,
+so moving a hundred units costs one search rather than a hundred.
+
+All three are cached per (terrain, building layout): any
+terrain write or building placement produces a new key, and the graph for
+the new key is rebuilt only in the clusters that changed.
+"""
+from collections import defaultdict
+from heapq import heappop, heappush
+from game.core.constants import MAP_CHUNK_SIZE
+from game.core.models import Building
+from .lru_cache import LRUCache
+from .terrain import TerrainMap
+from .terrain_grids import TerrainGrids
+
+_grid_cache = LRUCache(max_size=64, ttl=3600)
+_graph_cache = LRUCache(max_size=64, ttl=3600)
+# game_id -> most recent ClusterGraph, the base for incremental rebuilds
+_latest_graph = LRUCache(max_size=64, ttl=3600)
+_field_cache = LRUCache(max_size=256, ttl=600)
+
+
+class CostGrid:
+    """Entering cost of every tile, row-major; None marks a wall"""
+
+    def __init__(self, size, costs, key=None):
+        self.size = size
+        self.costs = costs
+        self.key = key
+
+    @classmethod
+    def from_grids(cls, grids, blocked=(), key=None):
+        size = grids.size
+        costs = grids.movement_costs()
+        for x, y in blocked:
+            if 0 <= x < size and 0 <= y < size:
+                costs[y * size + x] = None
+        return cls(size, costs, key)
+
+    @classmethod
+    def from_rows(cls, rows, blocked=(), key=None):
+        return cls.from_grids(TerrainGrids.from_rows(rows), blocked, key)
+
+    @classmethod
+    def for_game(cls, game):
+        """The game's grid, with its buildings as walls, from cache if unchanged"""
+        blocked = tuple(sorted(
+            Building.objects.filter(game=game).values_list('x_position', 'y_position')
+        ))
+        terrain = TerrainMap.for_game(game)
+        grids = TerrainGrids.for_terrain(terrain)
+        if terrain.cache_key is None:
+            return cls.from_grids(grids, blocked)
+        key = terrain.cache_key + (hash(blocked),)
+        grid = _grid_cache.get(key)
+        if grid is None:
+            grid = cls.from_grids(grids, blocked, key)
+            _grid_cache.set(key, grid)
+        return grid
+
+    def index(self, x, y):
+        return y * self.size + x
+
+    def position(self, index):
+        return index % self.size, index // self.size
+
+    def passable(self, x, y):
+        return 0 <= x < self.size and 0 <= y < self.size and self.costs[y * self.size + x] is not None
+
+    def neighbours(self, index):
+        size = self.size
+        x = index % size
+        if x > 0:
+            yield index - 1
+        if x < size - 1:
+            yield index + 1
+        if index >= size:
+            yield index - size
+        if index < size * (size - 1):
+            yield index + size
+
+
+def _search(grid, sources, labels=None, allowed=None, reverse=False):
+    """Dijkstra from ``sources`` (indexes) over passable tiles.
+
+    Forward distances are the cost of walking from a source to each tile;
+    with ``reverse`` they are the cost of walking from each tile to the
+    nearest source. With ``labels`` only tiles whose label is in
+    ``allowed`` are searched.
+    """
+    costs, size = grid.costs, grid.size
+    last_row = size * size - size
+    dist = {}
+    heap = [(0, source) for source in sources]
+    while heap:
+        d, current = heappop(heap)
+        if current in dist:
+            continue
+        dist[current] = d
+        x = current % size
+        for neighbour in (
+            current - 1 if x else -1,
+            current + 1 if x < size - 1 else -1,
+            current - size,
+            current + size if current < last_row else -1,
+        ):
+            if neighbour < 0 or neighbour in dist:
+                continue
+            cost = costs[neighbour]
+            if cost is None or (labels is not None and labels[neighbour] not in allowed):
+                continue
+            heappush(heap, (d + (costs[current] if reverse else cost), neighbour))
+    return dist
+
+
+class ClusterGraph:
+    """Portal graph over square clusters of a grid.
+
+    Clusters are numbered row-major, ``cy * per_side + cx``.
+    """
+
+    def __init__(self, grid, cluster_size=MAP_CHUNK_SIZE, previous=None):
+        self.grid = grid
+        self.cluster_size = cluster_size
+        self.per_side = (grid.size + cluster_size - 1) // cluster_size
+        size = grid.size
+        # Cluster number of every tile
+        self.labels = [
+            (index // size // cluster_size) * self.per_side + index % size // cluster_size
+            for index in range(size * size)
+        ]
+        # (cluster, right or lower neighbour) -> [(tile, tile across)]
+        self._borders = {}
+        # cluster -> {portal: {portal: forward cost}}
+        self._intra = {}
+
+        dirty = self._changed_clusters(previous)
+        for a, b in self._all_borders():
+            if dirty is None or a in dirty or b in dirty:
+                self._borders[(a, b)] = self._find_portals(a, b)
+            else:
+                self._borders[(a, b)] = previous._borders[(a, b)]
+
+        self._across = defaultdict(list)
+        self._nodes = defaultdict(set)
+        for pairs in self._borders.values():
+            for first, second in pairs:
+                self._across[first].append(second)
+                self._across[second].append(first)
+                self._nodes[self.labels[first]].add(first)
+                self._nodes[self.labels[second]].add(second)
+
+        # Portals on a rebuilt border change the edges of both its clusters
+        stale = None if dirty is None else dirty | {c for d in dirty for c in self._adjacent(d)}
+        for cluster in range(self.per_side * self.per_side):
+            if stale is None or cluster in stale:
+                self._intra[cluster] = self._connect(cluster)
+            else:
+                self._intra[cluster] = previous._intra[cluster]
+
+    def _changed_clusters(self, previous):
+        """Clusters whose tiles differ from ``previous``, or None to rebuild all"""
+        if (previous is None or previous.grid.size != self.grid.size
+                or previous.cluster_size != self.cluster_size):
+            return None
+        old, labels = previous.grid.costs, self.labels
+        return {labels[index] for index, cost in enumerate(self.grid.costs) if cost != old[index]}
+
+    def _adjacent(self, cluster):
+        cy, cx = divmod(cluster, self.per_side)
+        if cx > 0:
+            yield cluster - 1
+        if cx < self.per_side - 1:
+            yield cluster + 1
+        if cy > 0:
+            yield cluster - self.per_side
+        if cy < self.per_side - 1:
+            yield cluster + self.per_side
+
+    def _all_borders(self):
+        per_side = self.per_side
+        for cluster in range(per_side * per_side):
+            if cluster % per_side < per_side - 1:
+                yield cluster, cluster + 1
+            if cluster // per_side < per_side - 1:
+                yield cluster, cluster + per_side
+
+    def _find_portals(self, a, b):
+        size, cs, costs = self.grid.size, self.cluster_size, self.grid.costs
+        ay, ax = divmod(a, self.per_side)
+        if b == a + 1:
+            x = (ax + 1) * cs
+            pairs = [(y * size + x - 1, y * size + x) for y in range(ay * cs, min(size, (ay + 1) * cs))]
+        else:
+            y = (ay + 1) * cs
+            pairs = [((y - 1) * size + x, y * size + x) for x in range(ax * cs, min(size, (ax + 1) * cs))]
+
+        portals, run = [], []
+        for pair in pairs + [None]:
+            if pair is not None and costs[pair[0]] is not None and costs[pair[1]] is not None:
+                run.append(pair)
+            elif run:
+                portals.append(run[len(run) // 2])
+                run = []
+        return portals
+
+    def _connect(self, cluster):
+        nodes = self._nodes.get(cluster, ())
+        allowed = (cluster,)
+        edges = {}
+        for node in nodes:
+            dist = _search(self.grid, [node], self.labels, allowed)
+            edges[node] = {other: dist[other] for other in nodes if other != node and other in dist}
+        return edges
+
+    def _incoming(self, node):
+        """``(portal, cost)`` for every portal with an edge into ``node``"""
+        for other, row in self._intra[self.labels[node]].items():
+            if node in row:
+                yield other, row[node]
+        cost = self.grid.costs[node]
+        for other in self._across[node]:
+            yield other, cost
+
+    def corridor(self, starts, target):
+        """Clusters on the portal route from each start tile to ``target``.
+
+        Starts are grouped by cluster and routed from the portal that is
+        cheapest for the group; starts that cannot reach the target add
+        nothing.
+        """
+        labels = self.labels
+        goal = labels[target]
+        reach = _search(self.grid, [target], labels, (goal,), reverse=True)
+        dist, toward = {}, {}
+        heap = [(reach[node], node, None) for node in self._nodes.get(goal, ()) if node in reach]
+        while heap:
+            d, node, following = heappop(heap)
+            if node in dist:
+                continue
+            dist[node], toward[node] = d, following
+            for other, cost in self._incoming(node):
+                if other not in dist:
+                    heappush(heap, (d + cost, other, node))
+
+        by_cluster = defaultdict(list)
+        for start in starts:
+            by_cluster[labels[start]].append(start)
+        clusters = {goal}
+        for cluster, cells in by_cluster.items():
+            if cluster == goal:
+                continue
+            local = _search(self.grid, cells, labels, (cluster,))
+            candidates = [
+                (local[node] + dist[node], node)
+                for node in self._nodes.get(cluster, ()) if node in local and node in dist
+            ]
+            if not candidates:
+                continue
+            node = min(candidates)[1]
+            while node is not None:
+                clusters.add(labels[node])
+                node = toward[node]
+        return clusters
+
+    @classmethod
+    def for_grid(cls, grid):
+        """The cached graph for a game's grid; uncached grids get a fresh one"""
+        if grid.key is None:
+            return cls(grid)
+        graph = _graph_cache.get(grid.key)
+        if graph is None:
+            game_id = grid.key[0]
+            graph = cls(grid, previous=_latest_graph.get(game_id))
+            _graph_cache.set(grid.key, graph)
+            _latest_graph.set(game_id, graph)
+        return graph
+
+
+class FlowField:
+    """Remaining cost to ``target`` from each tile, limited to the
+    ``clusters`` of ``graph`` when both are given"""
+
+    def __init__(self, grid, target, graph=None, clusters=None):
+        self.grid = grid
+        self.target = target
+        if clusters is None:
+            self.dist = _search(grid, [target], reverse=True)
+        else:
+            self.dist = _search(grid, [target], graph.labels, clusters, reverse=True)
+
+    def reaches(self, index):
+        return index in self.dist
+
+    def path(self, start, steps):
+        """Up to ``steps`` tiles walked downhill from ``start``, start included"""
+        dist = self.dist
+        path = [start]
+        current = start
+        for _ in range(steps):
+            if current == self.target or current not in dist:
+                break
+            current = min(
+                (n for n in self.grid.neighbours(current) if n in dist),
+                key=dist.__getitem__,
+                default=current,
+            )
+            if dist[current] >= dist[path[-1]]:
+                break
+            path.append(current)
+        return path
+
+
+def flow_field(grid, target, starts):
+    """A field toward ``target`` that reaches every start tile that can get there.
+
+    The search covers only the clusters on the portal route, unless that
+    route spans most of the map anyway; if it misses a start tile (a route
+    that doubles back through another cluster) the field is widened to the
+    whole map.
+    """
+    key = (grid.key, target, frozenset(starts)) if grid.key else None
+    field = _field_cache.get(key) if key else None
+    if field is not None:
+        return field
+
+    graph = ClusterGraph.for_grid(grid)
+    clusters = frozenset(graph.corridor(starts, target))
+    if len(clusters) * 2 > graph.per_side * graph.per_side:
+        clusters = None
+    field_key = (grid.key, target, clusters) if grid.key else None
+    field = _field_cache.get(field_key) if field_key else None
+    if field is None:
+        field = FlowField(grid, target, graph, clusters)
+        if clusters is not None and not all(field.reaches(start) for start in starts):
+            field = FlowField(grid, target)
+        if field_key:
+            _field_cache.set(field_key, field)
+    if key:
+        _field_cache.set(key, field)
+    return field
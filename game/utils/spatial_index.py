@@ -0,0 +1,145 @@
+import uuid
+from collections import defaultdict
+from django.core.cache import cache
+from django.db import transaction
+from game.core.models import Unit, Building
+
+LAYOUT_TTL = 60 * 60
+
+class SpatialIndex:
+    """Uniform grid of buckets over the entity positions of one game.
+
+    Range and nearest-neighbour queries only visit the buckets that overlap
+    the search square, so their cost follows local density rather than the
+    total number of entities. Distances are Chebyshev (``max(dx, dy)``),
+    matching attack range checks. Callers keep the index current with
+    ``add`` (spawn), ``move`` and ``remove`` (death).
+    """
+    def __init__(self, cell_size=8):
+        self.cell_size = cell_size
+        self._cells = defaultdict(dict)
+        self._positions = {}
+        self._extent = 0
+
+    def __len__(self):
+        return len(self._positions)
+
+    @staticmethod
+    def _key(entity):
+        return (entity._meta.model_name, entity.pk)
+
+    def _cell(self, x, y):
+        return (x // self.cell_size, y // self.cell_size)
+
+    def add(self, entity):
+        """Insert an entity, or re-bucket it if it is already indexed"""
+        key = self._key(entity)
+        if key in self._positions:
+            self._discard(key)
+        position = (entity.x_position, entity.y_position)
+        self._positions[key] = position
+        self._cells[self._cell(*position)][key] = entity
+        self._extent = max(self._extent, *position)
+
+    move = add
+
+    def remove(self, entity):
+        self._discard(self._key(entity))
+
+    def _discard(self, key):
+        position = self._positions.pop(key, None)
+        if position is None:
+            return
+        cell_key = self._cell(*position)
+        cell = self._cells[cell_key]
+        cell.pop(key, None)
+        if not cell:
+            del self._cells[cell_key]
+
+    def get(self, model, pk):
+        """The indexed instance of ``model`` with primary key ``pk``, or None"""
+        key = (model._meta.model_name, pk)
+        position = self._positions.get(key)
+        if position is None:
+            return None
+        return self._cells[self._cell(*position)][key]
+
+    def target_at(self, x, y):
+        """The entity an attack on (x, y) hits: units before buildings"""
+        entities = sorted(self.at(x, y), key=lambda e: not isinstance(e, Unit))
+        return entities[0] if entities else None
+
+    def at(self, x, y):
+        """Entities standing exactly on (x, y)"""
+        cell = self._cells.get(self._cell(x, y), {})
+        return [e for e in cell.values() if e.x_position == x and e.y_position == y]
+
+    def within(self, x, y, radius):
+        """Yield entities within Chebyshev distance ``radius`` of (x, y)"""
+        min_cx, min_cy = self._cell(max(0, x - radius), max(0, y - radius))
+        max_cx, max_cy = self._cell(x + radius, y + radius)
+        for cx in range(min_cx, max_cx + 1):
+            for cy in range(min_cy, max_cy + 1):
+                cell = self._cells.get((cx, cy))
+                if not cell:
+                    continue
+                for entity in cell.values():
+                    if max(abs(entity.x_position - x), abs(entity.y_position - y)) <= radius:
+                        yield entity
+
+    def enemies_within(self, x, y, radius, player_id):
+        """Entities not owned by ``player_id`` within ``radius`` of (x, y)"""
+        return [e for e in self.within(x, y, radius) if e.player_id != player_id]
+
+    def nearest(self, x, y, predicate=None, max_radius=None):
+        """Closest entity to (x, y) matching ``predicate``, or None.
+
+        Searches squares of doubling radius; anything found inside a square
+        is guaranteed to be the global nearest.
+        """
+        limit = self._extent + max(x, y) if max_radius is None else max_radius
+        radius = min(self.cell_size, limit)
+        while True:
+            candidates = [
+                e for e in self.within(x, y, radius)
+                if predicate is None or predicate(e)
+            ]
+            if candidates:
+                return min(candidates, key=lambda e: (
+                    max(abs(e.x_position - x), abs(e.y_position - y)), e.pk
+                ))
+            if radius >= limit:
+                return None
+            radius = min(radius * 2, limit)
+
+    def nearest_enemy(self, x, y, player_id, max_radius=None):
+        return self.nearest(x, y, lambda e: e.player_id != player_id, max_radius)
+
+
+def build_spatial_index(game, cell_size=8):
+    """Index every living unit and building in a game (two queries)"""
+    index = SpatialIndex(cell_size)
+    for unit in Unit.objects.filter(game=game, health__gt=0):
+        index.add(unit)
+    for building in Building.objects.filter(game=game, health__gt=0):
+        index.add(building)
+    return index
+
+
+def _layout_key(game_id):
+    return f"entity_layout:{game_id}"
+
+
+def layout_version(game_id):
+    """Token naming the current positions of a game's units and buildings"""
+    version = uuid.uuid4().hex
+    if cache.add(_layout_key(game_id), version, LAYOUT_TTL):
+        return version
+    return cache.get(_layout_key(game_id), version)
+
+
+def bump_layout(game_id):
+    """Give a game a new layout version after entities are created, moved or removed"""
+    cache.set(_layout_key(game_id), uuid.uuid4().hex, LAYOUT_TTL)
+    # Again on commit: an index built from a read taken before then is stale
+    transaction.on_commit(lambda: cache.set(_layout_key(game_id), uuid.uuid4().hex, LAYOUT_TTL))
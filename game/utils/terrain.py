@@ -0,0 +1,196 @@
+"""Chunked terrain storage.
+
+New games keep their terrain in ``MapChunk`` rows of ``MAP_CHUNK_SIZE``
+squares; ``map_data`` holds only ``size``, ``chunk_size`` and a
+``terrain_version`` bumped on every terrain write. Games created before
+chunking still carry the whole grid in ``map_data['terrain']``.
+:class:`TerrainMap` reads both, loading chunks on demand through a
+process-wide LRU so a lookup costs one chunk, not the whole map.
+"""
+from django.db import transaction
+from game.core.constants import MAP_CHUNK_SIZE
+from game.core.models import Game, MapChunk, new_terrain_token
+from .lru_cache import LRUCache
+
+# (TerrainMap.cache_key, cx, cy) -> rows; entries are never mutated
+_chunk_cache = LRUCache(max_size=4096, ttl=3600)
+
+
+def split_into_chunks(rows, chunk_size=MAP_CHUNK_SIZE):
+    """``{(cx, cy): rows}`` for a full terrain grid"""
+    size = len(rows)
+    return {
+        (cx, cy): [row[cx * chunk_size:(cx + 1) * chunk_size] for row in rows[cy * chunk_size:(cy + 1) * chunk_size]]
+        for cy in range((size + chunk_size - 1) // chunk_size)
+        for cx in range((size + chunk_size - 1) // chunk_size)
+    }
+
+
+def chunked_map_data(size, chunk_size=MAP_CHUNK_SIZE):
+    return {'size': size, 'chunk_size': chunk_size, 'terrain_version': 0, 'terrain_token': new_terrain_token()}
+
+
+def build_map_chunks(game, rows, chunk_size=MAP_CHUNK_SIZE):
+    """Unsaved MapChunk rows for ``game`` holding the grid ``rows``"""
+    return [
+        MapChunk(game=game, cx=cx, cy=cy, terrain=chunk)
+        for (cx, cy), chunk in split_into_chunks(rows, chunk_size).items()
+    ]
+
+
+class TerrainMap:
+    """Terrain of one game, read and written a chunk at a time"""
+
+    def __init__(self, map_data, game_id=None, game=None):
+        self.game = game
+        self.game_id = game_id if game_id is not None else getattr(game, 'id', None)
+        self.map_data = map_data
+        self.size = int(map_data['size'])
+        self._rows = map_data.get('terrain')
+        self.chunk_size = map_data.get('chunk_size') or MAP_CHUNK_SIZE
+        self.version = map_data.get('terrain_version', 0)
+        self.token = map_data.get('terrain_token')
+        self._chunks = {}
+        self._copied = set()
+        self._writes = {}
+
+    @classmethod
+    def for_game(cls, game):
+        return cls(game.map_data, game=game)
+
+    @property
+    def cache_key(self):
+        """Identifies this exact terrain across processes, or None if it cannot be"""
+        if self.game_id is None or self.token is None:
+            return None
+        return (self.game_id, self.token, self.version)
+
+    @property
+    def is_chunked(self):
+        return self._rows is None
+
+    @property
+    def chunks_per_side(self):
+        return (self.size + self.chunk_size - 1) // self.chunk_size
+
+    def in_bounds(self, x, y):
+        return 0 <= x < self.size and 0 <= y < self.size
+
+    def get(self, x, y):
+        if self._rows is not None:
+            return self._rows[y][x]
+        cx, cy = x // self.chunk_size, y // self.chunk_size
+        return self.chunk(cx, cy)[y - cy * self.chunk_size][x - cx * self.chunk_size]
+
+    def set(self, x, y, terrain):
+        if self._rows is not None:
+            self._rows[y][x] = terrain
+            return
+        cx, cy = x // self.chunk_size, y // self.chunk_size
+        if (cx, cy) not in self._copied:
+            # Cached rows are shared, so copy before the first write
+            self._chunks[(cx, cy)] = [list(row) for row in self.chunk(cx, cy)]
+            self._copied.add((cx, cy))
+        self._chunks[(cx, cy)][y - cy * self.chunk_size][x - cx * self.chunk_size] = terrain
+        self._writes[((cx, cy), x, y)] = terrain
+
+    def chunk(self, cx, cy):
+        """Rows of one chunk, loading it if needed"""
+        rows = self._chunks.get((cx, cy))
+        if rows is None:
+            rows = self.load_chunks([(cx, cy)])[(cx, cy)]
+        return rows
+
+    def load_chunks(self, coords):
+        """``{(cx, cy): rows}`` for ``coords``, fetching missing chunks in one query"""
+        coords = [c for c in coords if 0 <= c[0] < self.chunks_per_side and 0 <= c[1] < self.chunks_per_side]
+        if self._rows is not None:
+            size = self.chunk_size
+            return {
+                (cx, cy): [row[cx * size:(cx + 1) * size] for row in self._rows[cy * size:(cy + 1) * size]]
+                for cx, cy in coords
+            }
+
+        missing = []
+        for cx, cy in coords:
+            if (cx, cy) not in self._chunks:
+                rows = _chunk_cache.get((self.cache_key, cx, cy))
+                if rows is None:
+                    missing.append((cx, cy))
+                else:
+                    self._chunks[(cx, cy)] = rows
+        if missing:
+            wanted = set(missing)
+            cys = {cy for _, cy in missing}
+            cxs = {cx for cx, _ in missing}
+            for cx, cy, rows in MapChunk.objects.filter(
+                game_id=self.game_id, cx__in=cxs, cy__in=cys
+            ).values_list('cx', 'cy', 'terrain'):
+                if (cx, cy) in wanted:
+                    self._chunks[(cx, cy)] = rows
+                    if self.cache_key is not None:
+                        _chunk_cache.set((self.cache_key, cx, cy), rows)
+        return {c: self._chunks[c] for c in coords}
+
+    def chunks_in_rect(self, x0, y0, x1, y1):
+        """Chunk coordinates covering the tiles ``x0..x1, y0..y1`` (inclusive)"""
+        last = self.size - 1
+        x0, x1 = max(0, min(x0, x1)), min(last, max(x0, x1))
+        y0, y1 = max(0, min(y0, y1)), min(last, max(y0, y1))
+        size = self.chunk_size
+        return [
+            (cx, cy)
+            for cy in range(y0 // size, y1 // size + 1)
+            for cx in range(x0 // size, x1 // size + 1)
+        ]
+
+    def chunks_for_cells(self, cells):
+        """Chunk coordinates containing any of the ``(x, y)`` cells"""
+        size = self.chunk_size
+        return sorted({(x // size, y // size) for x, y in cells})
+
+    def rows(self):
+        """The whole grid; only for export and archiving"""
+        if self._rows is not None:
+            return self._rows
+        every = [(cx, cy) for cy in range(self.chunks_per_side) for cx in range(self.chunks_per_side)]
+        chunks = self.load_chunks(every)
+        size = self.chunk_size
+        return [
+            [tile for cx in range(self.chunks_per_side) for tile in chunks[(cx, y // size)][y % size]]
+            for y in range(self.size)
+        ]
+
+    def save(self):
+        """Write changed tiles and bump the version so cached chunks go stale.
+
+        Only the tiles passed to :meth:`set` are written, onto freshly read
+        chunks under a lock on the game row, so concurrent writers to the
+        same chunk do not overwrite each other.
+        """
+        if self._rows is not None:
+            self.version += 1
+            self.map_data['terrain_version'] = self.version
+            self.game.save(update_fields=['map_data'])
+            return
+        if not self._writes:
+            return
+        dirty = {coords for coords, _, _ in self._writes}
+        with transaction.atomic():
+            game = Game.objects.select_for_update().only('map_data').get(id=self.game_id)
+            chunks = [
+                chunk for chunk in MapChunk.objects.filter(
+                    game_id=self.game_id, cx__in={cx for cx, _ in dirty}, cy__in={cy for _, cy in dirty}
+                ) if (chunk.cx, chunk.cy) in dirty
+            ]
+            by_coords = {(chunk.cx, chunk.cy): chunk for chunk in chunks}
+            for ((cx, cy), x, y), terrain in self._writes.items():
+                by_coords[(cx, cy)].terrain[y - cy * self.chunk_size][x - cx * self.chunk_size] = terrain
+            MapChunk.objects.bulk_update(chunks, ['terrain'])
+            self.version = game.map_data.get('terrain_version', 0) + 1
+            game.map_data['terrain_version'] = self.version
+            game.save(update_fields=['map_data'])
+        self.map_data['terrain_version'] = self.version
+        for coords in dirty:
+            self._chunks[coords] = by_coords[coords].terrain
+        self._writes.clear()
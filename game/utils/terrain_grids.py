@@ -0,0 +1,186 @@
+"""Per-tile rule grids derived from a map's terrain, one chunk at a time.
+
+Each terrain chunk's names are translated a single time into a row-major
+block of terrain codes; movement cost, damage modifier and the passable,
+buildable and sight-blocking flags are then table lookups by code, the
+flags via ``bytes.translate``. Chunk grids are built only when a lookup
+touches their chunk and are cached per terrain (``TerrainMap.cache_key``),
+so they follow ``map_data`` and a terrain write only costs rebuilding the
+chunks read afterwards. Movement, building, combat, line of sight and
+pathfinding all read tiles through :class:`TerrainGrids`.
+"""
+from game.core.rules import RULES
+from .line_of_sight import SightMask
+from .lru_cache import LRUCache
+from .terrain import TerrainMap
+
+# (TerrainMap.cache_key, cx, cy) -> ChunkGrids; entries are never mutated
+_chunk_grids_cache = LRUCache(max_size=4096, ttl=3600)
+
+# Code for names the rules do not know; they behave like the old fallbacks
+# (cost 1, modifier 1.0, passable and buildable, never blocking sight)
+UNKNOWN = 255
+
+
+def _flag_table(flag):
+    table = bytearray(256)
+    table[UNKNOWN] = flag(None)
+    for stats in RULES.terrains:
+        table[stats.code] = flag(stats)
+    return bytes(table)
+
+
+_PASSABLE = _flag_table(lambda t: t is None or t.passable)
+_BUILDABLE = _flag_table(lambda t: t is None or (t.passable and t.buildable))
+_BLOCKS_SIGHT = _flag_table(lambda t: t is not None and t.blocks_sight)
+_MOVEMENT_COSTS = {t.code: t.movement_cost if t.passable else None for t in RULES.terrains}
+_MOVEMENT_COSTS[UNKNOWN] = 1
+_DEFENSE_MODIFIERS = {t.code: t.combat_modifier for t in RULES.terrains}
+_DEFENSE_MODIFIERS[UNKNOWN] = 1.0
+# unit name -> damage modifier by terrain code, with UNKNOWN at 1.0
+_DAMAGE_MODIFIERS = {
+    stats.name: tuple(row[code] if code < len(row) else 1.0 for code in range(256))
+    for stats, row in zip(RULES.units, RULES.damage_modifiers)
+}
+
+
+class ChunkGrids:
+    """Rule grids of one terrain chunk, indexed ``local_y * width + local_x``"""
+    __slots__ = ('width', 'codes', 'passable', 'buildable', 'blocks_sight',
+                 'movement_costs', 'defense_modifiers')
+
+    def __init__(self, rows):
+        codes = RULES.terrain_codes
+        self.width = len(rows[0]) if rows else 0
+        self.codes = bytes(codes.get(tile, UNKNOWN) for row in rows for tile in row)
+        self.passable = self.codes.translate(_PASSABLE)
+        self.buildable = self.codes.translate(_BUILDABLE)
+        self.blocks_sight = self.codes.translate(_BLOCKS_SIGHT)
+        # None where the tile cannot be entered
+        self.movement_costs = [_MOVEMENT_COSTS[code] for code in self.codes]
+        # Damage scale for targets on the tile, before unit-specific overrides
+        self.defense_modifiers = [_DEFENSE_MODIFIERS[code] for code in self.codes]
+
+
+class _SightView:
+    """Row-major "blocks sight" flags of a map, read through its chunk grids"""
+
+    def __init__(self, grids):
+        self.grids = grids
+
+    def __getitem__(self, index):
+        y, x = divmod(index, self.grids.size)
+        chunk, local = self.grids._locate(x, y)
+        return chunk.blocks_sight[local]
+
+
+class TerrainGrids:
+    """Rule grids of one map, built lazily for the chunks that are read"""
+
+    def __init__(self, terrain):
+        self.terrain_map = terrain
+        self.size = terrain.size
+        self.chunk_size = terrain.chunk_size
+        self._chunks = {}
+        self.sight = SightMask(self.size, _SightView(self))
+
+    @classmethod
+    def from_rows(cls, rows):
+        return cls(TerrainMap({'size': len(rows), 'terrain': rows}))
+
+    @classmethod
+    def for_terrain(cls, terrain):
+        """Grids of a :class:`TerrainMap`; chunk grids come from cache if its terrain is unchanged"""
+        return cls(terrain)
+
+    @classmethod
+    def for_game(cls, game):
+        return cls.for_terrain(TerrainMap.for_game(game))
+
+    def load_chunks(self, coords):
+        """Make sure the chunk grids of ``coords`` are built, fetching missing chunks in one query"""
+        key = self.terrain_map.cache_key
+        missing = []
+        for position in coords:
+            if position in self._chunks:
+                continue
+            chunk = _chunk_grids_cache.get((key,) + position) if key is not None else None
+            if chunk is None:
+                missing.append(position)
+            else:
+                self._chunks[position] = chunk
+        if missing:
+            for position, rows in self.terrain_map.load_chunks(missing).items():
+                chunk = self._chunks[position] = ChunkGrids(rows)
+                if key is not None:
+                    _chunk_grids_cache.set((key,) + position, chunk)
+
+    def _locate(self, x, y):
+        """``(chunk grids, index within the chunk)`` of tile (x, y)"""
+        cx, local_x = divmod(x, self.chunk_size)
+        cy, local_y = divmod(y, self.chunk_size)
+        chunk = self._chunks.get((cx, cy))
+        if chunk is None:
+            self.load_chunks([(cx, cy)])
+            chunk = self._chunks[(cx, cy)]
+        return chunk, local_y * chunk.width + local_x
+
+    def in_bounds(self, x, y):
+        return 0 <= x < self.size and 0 <= y < self.size
+
+    def terrain(self, x, y):
+        """Terrain name of a tile, or None if the rules do not know it"""
+        chunk, index = self._locate(x, y)
+        code = chunk.codes[index]
+        return None if code == UNKNOWN else RULES.terrains[code].name
+
+    def movement_cost(self, x, y):
+        chunk, index = self._locate(x, y)
+        return chunk.movement_costs[index]
+
+    def defense_modifier(self, x, y):
+        chunk, index = self._locate(x, y)
+        return chunk.defense_modifiers[index]
+
+    def passable(self, x, y):
+        if not (0 <= x < self.size and 0 <= y < self.size):
+            return False
+        chunk, index = self._locate(x, y)
+        return chunk.passable[index] == 1
+
+    def buildable(self, x, y):
+        if not (0 <= x < self.size and 0 <= y < self.size):
+            return False
+        chunk, index = self._locate(x, y)
+        return chunk.buildable[index] == 1
+
+    def blocks_sight(self, x, y):
+        if not (0 <= x < self.size and 0 <= y < self.size):
+            return False
+        chunk, index = self._locate(x, y)
+        return chunk.blocks_sight[index] == 1
+
+    def damage_modifier(self, unit_type, x, y):
+        """Damage multiplier for ``unit_type`` attacking onto tile (x, y)"""
+        chunk, index = self._locate(x, y)
+        modifiers = _DAMAGE_MODIFIERS.get(unit_type)
+        if modifiers is None:
+            return chunk.defense_modifiers[index]
+        return modifiers[chunk.codes[index]]
+
+    def movement_costs(self):
+        """Row-major entering cost of every tile, for map-wide searches.
+
+        Builds the grids of every chunk, so keep it to callers that really
+        walk the whole map (group pathfinding).
+        """
+        per_side = self.terrain_map.chunks_per_side
+        self.load_chunks([(cx, cy) for cy in range(per_side) for cx in range(per_side)])
+        size = self.chunk_size
+        costs = []
+        for y in range(self.size):
+            cy, local_y = divmod(y, size)
+            for cx in range(per_side):
+                chunk = self._chunks[(cx, cy)]
+                costs.extend(chunk.movement_costs[local_y * chunk.width:(local_y + 1) * chunk.width])
+        return costs
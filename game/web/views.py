@@ -15,7 +15,6 @@ from asgiref.sync import async_to_sync
 from game.core.models import Game, Player, Unit
 from game.core.game_rules import GAME_RULES
 from game.forms import GameCreationForm
-from game.services.game_service import GameService
 from game.api.serializers.game import GameSerializer
 from game.mixins import GameServiceMixin
 
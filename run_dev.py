@@ -18,6 +18,12 @@ def run_daphne():
     daphne_cmd = ["daphne", "-b", "0.0.0.0", "-p", "8001", "strategy_game.asgi:application"]
     return subprocess.Popen(daphne_cmd)
 
+def run_job_worker():
+    """Run a worker for queued jobs (round income, archiving, lobby events)"""
+    print("Starting job worker...")
+    worker_cmd = ["python", "manage.py", "run_jobs"]
+    return subprocess.Popen(worker_cmd)
+
 def run_tailwind():
     """Run Tailwind CSS compiler"""
     print("Starting Tailwind CSS compiler...")
@@ -54,10 +60,14 @@ def main():
 
         daphne_process = run_daphne()
         processes.append(daphne_process)
+
+        worker_process = run_job_worker()
+        processes.append(worker_process)
         
         print("\nDevelopment servers are running!")
         print("Django server (HTTP): http://localhost:8000")
         print("Daphne server (WebSocket): ws://localhost:8001")
+        print("Job worker: manage.py run_jobs")
         print("\nPress Ctrl+C to stop all servers...")
         
         for process in processes:
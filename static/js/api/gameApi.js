@@ -1,6 +1,7 @@
 class GameApi {
     constructor() {
         this.baseUrl = '/api/games';
+        this.maxRetries = 2;
     }
 
     async fetchHandler(endpoint, options = {}) {
@@ -10,11 +11,24 @@ class GameApi {
                 'X-CSRFToken': this.getCsrfToken()
             }
         };
+        const isMutation = options.method && options.method !== 'GET';
+        if (isMutation) {
+            // Retries reuse the key so the server replays instead of re-running the action
+            defaultOptions.headers['Idempotency-Key'] = crypto.randomUUID();
+        }
 
-        const response = await fetch(
-            `${this.baseUrl}${endpoint}`,
-            { ...defaultOptions, ...options }
-        );
+        let response;
+        for (let attempt = 0; ; attempt++) {
+            try {
+                response = await fetch(
+                    `${this.baseUrl}${endpoint}`,
+                    { ...defaultOptions, ...options }
+                );
+                break;
+            } catch (error) {
+                if (!isMutation || attempt >= this.maxRetries) throw error;
+            }
+        }
 
         if (!response.ok) {
             const error = await response.json();
@@ -28,8 +42,17 @@ class GameApi {
         return await this.fetchHandler("/constants");
     }
 
-    async getGameState(gameId) {
-        return await this.fetchHandler(`/${gameId}/state/`);
+    async getGameState(gameId, since = null) {
+        const query = since === null ? '' : `?since=${since}`;
+        return await this.fetchHandler(`/${gameId}/state/${query}`);
+    }
+
+    async getTerrainChunks(gameId, { x0, y0, x1, y1 }) {
+        return await this.fetchHandler(`/${gameId}/terrain/?x0=${x0}&y0=${y0}&x1=${x1}&y1=${y1}`);
+    }
+
+    async getTargets(gameId, unitId) {
+        return await this.fetchHandler(`/${gameId}/targets/?unit_id=${unitId}`);
     }
 
     async moveUnit(gameId, unitId, x, y) {
@@ -39,6 +62,13 @@ class GameApi {
         });
     }
 
+    async moveGroup(gameId, unitIds, x, y) {
+        return await this.fetchHandler(`/${gameId}/move_group/`, {
+            method: 'POST',
+            body: JSON.stringify({ unit_ids: unitIds, x, y }),
+        });
+    }
+
     async buildStructure(gameId, buildingType, x, y) {
         console.log("Building structure:", { buildingType, x, y });
         return await this.fetchHandler(`/${gameId}/build_structure/`, {
@@ -61,6 +91,13 @@ class GameApi {
         });
     }
 
+    async previewActions(gameId, actions) {
+        return await this.fetchHandler(`/${gameId}/preview/`, {
+            method: 'POST',
+            body: JSON.stringify({ actions }),
+        });
+    }
+
     getCsrfToken() {
         return document.querySelector('[name=csrfmiddlewaretoken]').value;
     }
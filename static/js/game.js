@@ -41,8 +41,8 @@ export class Game {
 
     async pollGameState() {
         try {
-            const newState = await gameApi.getGameState(this.gameId);
-            this.state.update(newState);
+            const response = await gameApi.getGameState(this.gameId, this.state.version);
+            this.state.applyResponse(response);
             this.uiManager.render();
 
             if (this.state.isGameFinished()) {
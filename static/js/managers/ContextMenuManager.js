@@ -1,3 +1,5 @@
+import gameApi from '../api/gameApi.js';
+
 export class ContextMenuManager {
     constructor(game, entityManager) {
         this.game = game;
@@ -72,9 +74,43 @@ export class ContextMenuManager {
                 const action = item.dataset.action;
                 this.handleContextMenuAction(action);
             });
+            item.addEventListener('mouseenter', () => this.previewMenuItem(item), { once: true });
         });
     }
 
+    previewAction(action) {
+        const unit = this.entityManager.selectedUnit;
+        const x = parseInt(this.contextMenuTarget.dataset.x);
+        const y = parseInt(this.contextMenuTarget.dataset.y);
+        if (!unit || Number.isNaN(x) || Number.isNaN(y)) return null;
+
+        if (action === 'attack') {
+            return { type: 'attack', unit_id: unit.id, target_x: x, target_y: y };
+        }
+        if (action === 'move' && this.contextMenuTarget.classList.contains('map-cell')) {
+            return { type: 'move_unit', unit_id: unit.id, x, y };
+        }
+        return null;
+    }
+
+    async previewMenuItem(item) {
+        const action = this.previewAction(item.dataset.action);
+        if (!action) return;
+
+        try {
+            const preview = await gameApi.previewActions(this.game.gameId, [action]);
+            const result = preview.actions[0];
+            if (!result.valid) {
+                item.classList.add('disabled');
+                item.title = result.error;
+            } else if (result.damage !== undefined) {
+                item.title = `${result.damage} damage, target left with ${result.target_health} health`;
+            }
+        } catch (error) {
+            console.error('Action preview failed:', error);
+        }
+    }
+
     getContextMenuItems(target) {
         const isCurrentPlayer = this.game.state.isCurrentPlayer(this.game.state.currentPlayer);
         const items = [];
@@ -139,8 +175,10 @@ export class ContextMenuManager {
         const x = parseInt(target.dataset.x);
         const y = parseInt(target.dataset.y);
         const cell = this.game.state.getMapCell(x, y);
+        const terrainTypes = Object.values(this.game.gameConstants?.terrain_types || {});
+        const terrain = cell && terrainTypes.find(type => type.name === cell.terrain);
 
-        if (isCurrentPlayer && cell && cell.terrain !== 'water' && cell.terrain !== 'mountain') {
+        if (isCurrentPlayer && terrain && terrain.buildable) {
             return [`
                 <div class="context-menu-item" data-action="build">
                     <i class="fas fa-hammer"></i>Build
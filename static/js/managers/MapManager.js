@@ -1,3 +1,8 @@
+import gameApi from '../api/gameApi.js';
+
+// Extra tiles rendered around the viewport so short scrolls need no new cells
+const VIEWPORT_MARGIN = 4;
+
 export class MapManager {
     constructor(game) {
         this.game = game;
@@ -6,11 +11,19 @@ export class MapManager {
         this.mapOverlay = this.container.querySelector('.board-overlay');
         this.hoveredCell = null;
         this.clickedCell = null;
+        this.terrainRequest = null;
+        this.cellSize = 32;
+        // Only tiles near the viewport have elements: tile index -> cell,
+        // plus cells scrolled out of view waiting to be reused
+        this.cells = new Map();
+        this.spareCells = [];
+        this.renderFrame = null;
 
         if (!this.container || !this.gridContainer || !this.mapOverlay) {
             console.error('Required map elements not found');
             return;
         }
+        this.container.addEventListener('scroll', () => this.scheduleViewportRender(), { passive: true });
     }
 
     renderMap() {
@@ -21,6 +34,9 @@ export class MapManager {
         }
 
         this.gridContainer.innerHTML = '';
+        this.cells.clear();
+        this.spareCells = [];
+        this.hoveredCell = null;
 
         const containerWidth = this.container.offsetWidth - 32;
         const containerHeight = this.container.offsetHeight - 32;
@@ -29,47 +45,123 @@ export class MapManager {
         const cellSize = Math.max(32, Math.floor((minDimension - (mapSize + 1)) / mapSize));
         const gridSize = cellSize * mapSize + (mapSize + 1);
 
-        this.configureGridContainer(cellSize, mapSize, gridSize);
-        this.createMapCells(cellSize, mapSize);
+        this.cellSize = cellSize;
+        this.configureGridContainer(gridSize);
         this.configureOverlay(gridSize);
+        this.renderViewport();
+        this.loadVisibleTerrain();
     }
 
-    configureGridContainer(cellSize, mapSize, gridSize) {
-        this.gridContainer.style.display = 'grid';
-        this.gridContainer.style.width = `${gridSize}px`;
-        this.gridContainer.style.height = `${gridSize}px`;
-        this.gridContainer.style.gap = '1px';
-        this.gridContainer.style.padding = '1px';
-        this.gridContainer.style.gridTemplateColumns = `repeat(${mapSize}, ${cellSize}px)`;
-        this.gridContainer.style.gridTemplateRows = `repeat(${mapSize}, ${cellSize}px)`;
-        this.gridContainer.style.margin = '0 auto';
-    }
-
-    createMapCells(cellSize, mapSize) {
-        for (let y = 0; y < mapSize; y++) {
-            for (let x = 0; x < mapSize; x++) {
-                const cell = this.createMapCell(x, y, cellSize);
-                this.gridContainer.appendChild(cell);
+    scheduleViewportRender() {
+        if (this.renderFrame) return;
+        this.renderFrame = requestAnimationFrame(() => {
+            this.renderFrame = null;
+            this.renderViewport();
+            this.loadVisibleTerrain();
+        });
+    }
+
+    visibleTileRect(margin = 0) {
+        const mapSize = this.game.state.getMapSize();
+        const step = this.cellSize + 1;
+        const left = Math.floor(this.container.scrollLeft / step);
+        const top = Math.floor(this.container.scrollTop / step);
+        return {
+            x0: Math.max(0, left - margin),
+            y0: Math.max(0, top - margin),
+            x1: Math.min(mapSize - 1, left + Math.ceil(this.container.clientWidth / step) + margin),
+            y1: Math.min(mapSize - 1, top + Math.ceil(this.container.clientHeight / step) + margin),
+        };
+    }
+
+    renderViewport() {
+        const mapSize = this.game.state.getMapSize();
+        if (!mapSize) return;
+
+        const rect = this.visibleTileRect(VIEWPORT_MARGIN);
+        const inView = (x, y) => x >= rect.x0 && x <= rect.x1 && y >= rect.y0 && y <= rect.y1;
+        this.cells.forEach((cell, index) => {
+            if (!inView(index % mapSize, Math.floor(index / mapSize))) {
+                this.cells.delete(index);
+                this.spareCells.push(cell);
+            }
+        });
+
+        for (let y = rect.y0; y <= rect.y1; y++) {
+            for (let x = rect.x0; x <= rect.x1; x++) {
+                const index = y * mapSize + x;
+                if (this.cells.has(index)) continue;
+                let cell = this.spareCells.pop();
+                if (!cell) {
+                    cell = this.createMapCell();
+                    this.gridContainer.appendChild(cell);
+                }
+                this.placeCell(cell, x, y);
+                this.cells.set(index, cell);
+            }
+        }
+        this.spareCells.forEach(cell => { cell.hidden = true; });
+    }
+
+    async loadVisibleTerrain() {
+        // One request at a time; the next scroll or render picks up the rest
+        if (this.terrainRequest) return;
+        const rect = this.visibleTileRect();
+        const missing = this.game.state.missingChunks(rect.x0, rect.y0, rect.x1, rect.y1);
+        if (!missing.length) return;
+
+        try {
+            this.terrainRequest = gameApi.getTerrainChunks(this.game.gameId, rect);
+            const response = await this.terrainRequest;
+            this.game.state.addTerrainChunks(response);
+            response.chunks.forEach(chunk => this.refreshChunkCells(chunk.cx, chunk.cy, response.chunk_size));
+        } catch (error) {
+            console.error('Failed to load terrain:', error);
+        } finally {
+            this.terrainRequest = null;
+        }
+    }
+
+    refreshChunkCells(cx, cy, chunkSize) {
+        const mapSize = this.game.state.getMapSize();
+        for (let y = cy * chunkSize; y < Math.min(mapSize, (cy + 1) * chunkSize); y++) {
+            for (let x = cx * chunkSize; x < Math.min(mapSize, (cx + 1) * chunkSize); x++) {
+                const cell = this.cells.get(y * mapSize + x);
+                if (cell) this.placeCell(cell, x, y);
             }
         }
     }
 
-    createMapCell(x, y, cellSize) {
+    configureGridContainer(gridSize) {
+        this.container.style.overflow = 'auto';
+        this.gridContainer.style.display = 'block';
+        this.gridContainer.style.position = 'relative';
+        this.gridContainer.style.flexShrink = '0';
+        this.gridContainer.style.width = `${gridSize}px`;
+        this.gridContainer.style.height = `${gridSize}px`;
+        this.gridContainer.style.margin = 'auto';
+    }
+
+    createMapCell() {
         const cell = document.createElement('div');
-        cell.className = 'map-cell';
+        cell.style.position = 'absolute';
+        cell.style.width = `${this.cellSize}px`;
+        cell.style.height = `${this.cellSize}px`;
+        return cell;
+    }
+
+    placeCell(cell, x, y) {
+        const step = this.cellSize + 1;
+        if (cell === this.hoveredCell) this.hoveredCell = null;
+        cell.hidden = false;
         cell.dataset.x = x;
         cell.dataset.y = y;
-        cell.style.width = `${cellSize}px`;
-        cell.style.height = `${cellSize}px`;
+        cell.style.left = `${1 + x * step}px`;
+        cell.style.top = `${1 + y * step}px`;
 
         const mapCell = this.game.state.getMapCell(x, y);
-        if (mapCell && mapCell.terrain) {
-            cell.classList.add(`terrain-${mapCell.terrain}`);
-        } else {
-            cell.classList.add('terrain-unknown');
-        }
-
-        return cell;
+        const terrain = mapCell && mapCell.terrain ? mapCell.terrain : 'unknown';
+        cell.className = `map-cell terrain-${terrain}`;
     }
 
     configureOverlay(gridSize) {
@@ -114,8 +206,7 @@ export class MapManager {
     }
 
     getCellSize() {
-        const cell = this.gridContainer.querySelector('.map-cell');
-        return cell ? cell.offsetWidth : 32;
+        return this.cellSize;
     }
 
     getClickedCell() {
@@ -6,6 +6,10 @@ export class GameState {
     reset() {
         this.map = null;
         this.mapSize = 0;
+        // Large maps arrive as chunkSize x chunkSize blocks keyed "cx,cy"
+        this.chunkSize = 0;
+        this.terrainVersion = null;
+        this.terrainChunks = new Map();
         this.units = new Map();
         this.buildings = new Map();
         this.resources = {
@@ -19,6 +23,35 @@ export class GameState {
         this.gameStatus = 'waiting'; // waiting, in_progress, finished
         this.winner = null;
         this.lastUpdate = null;
+        this.version = null;
+        this.snapshot = null;
+    }
+
+    applyResponse(response) {
+        // The server sends a full snapshot or a patch against this.version
+        if (response.full || !this.snapshot) {
+            this.snapshot = response.state;
+        } else {
+            this.snapshot = this.applyPatch(this.snapshot, response);
+        }
+        this.version = response.version;
+        this.update(this.snapshot);
+    }
+
+    applyPatch(snapshot, patch) {
+        const next = { ...snapshot, ...patch.set };
+        ['players', 'units', 'buildings'].forEach(key => {
+            const changes = patch[key];
+            if (!changes) return;
+
+            const removed = new Set(changes.removed);
+            const changed = new Map(changes.changed.map(fields => [fields.id, fields]));
+            next[key] = (snapshot[key] || [])
+                .filter(item => !removed.has(item.id))
+                .map(item => changed.has(item.id) ? { ...item, ...changed.get(item.id) } : item)
+                .concat(changes.added);
+        });
+        return next;
     }
 
     update(newState) {
@@ -26,7 +59,12 @@ export class GameState {
         // Update map if changed
         if (newState.map_data) {
             this.mapSize = newState.map_data.size;
-            this.map = newState.map_data.terrain;
+            this.map = newState.map_data.terrain || null;
+            this.chunkSize = newState.map_data.chunk_size || 0;
+            if (newState.map_data.terrain_version !== this.terrainVersion) {
+                this.terrainVersion = newState.map_data.terrain_version ?? null;
+                this.terrainChunks.clear();
+            }
         }
 
         if (newState.units) {
@@ -69,13 +107,38 @@ export class GameState {
         this.lastUpdate = new Date();
     }
 
+    addTerrainChunks(response) {
+        if (response.version !== this.terrainVersion) return;
+        response.chunks.forEach(chunk => {
+            this.terrainChunks.set(`${chunk.cx},${chunk.cy}`, chunk.terrain);
+        });
+    }
+
+    missingChunks(x0, y0, x1, y1) {
+        if (this.map || !this.chunkSize) return [];
+        const size = this.chunkSize;
+        const last = Math.ceil(this.mapSize / size) - 1;
+        const missing = [];
+        for (let cy = Math.max(0, Math.floor(y0 / size)); cy <= Math.min(last, Math.floor(y1 / size)); cy++) {
+            for (let cx = Math.max(0, Math.floor(x0 / size)); cx <= Math.min(last, Math.floor(x1 / size)); cx++) {
+                if (!this.terrainChunks.has(`${cx},${cy}`)) missing.push({ cx, cy });
+            }
+        }
+        return missing;
+    }
+
     getMapCell(x, y) {
-        if (!this.map || x < 0 || y < 0 || x >= this.mapSize || y >= this.mapSize) {
+        if (x < 0 || y < 0 || x >= this.mapSize || y >= this.mapSize) {
             console.warn(`Invalid cell coordinates: (${x}, ${y})`);
             return null;
         }
-        const terrain = this.map[y][x];
-        return { terrain };
+        if (this.map) {
+            return { terrain: this.map[y][x] };
+        }
+        // Chunks not fetched yet render as unknown terrain
+        const size = this.chunkSize;
+        const chunk = this.terrainChunks.get(`${Math.floor(x / size)},${Math.floor(y / size)}`);
+        return { terrain: chunk ? chunk[y % size][x % size] : null };
     }
 
     getMapSize() {
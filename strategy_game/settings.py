@@ -12,6 +12,8 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 
 from pathlib import Path
 from dotenv import load_dotenv
+from django.core.exceptions import ImproperlyConfigured
+import django
 import os
 
 load_dotenv()
@@ -70,12 +72,22 @@ TAILWIND_APP_NAME = "theme"
 TAILWIND_CSS_PATH = "css/dist/styles.css"
 NPM_BIN_PATH = "npm.cmd"
 
-# Channel layers for WebSocket
-CHANNEL_LAYERS = {
-    "default": {
-        "BACKEND": "channels.layers.InMemoryChannelLayer",
-    },
-}
+# Channel layers for WebSocket. The in-memory layer only reaches consumers in
+# the same process; set REDIS_URL whenever another process sends to them,
+# such as the run_turn_timer command.
+if os.environ.get("REDIS_URL"):
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels_redis.core.RedisChannelLayer",
+            "CONFIG": {"hosts": [os.environ["REDIS_URL"]]},
+        },
+    }
+else:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels.layers.InMemoryChannelLayer",
+        },
+    }
 
 # Static files configuration
 STATIC_URL = "/static/"
@@ -114,12 +126,82 @@ ASGI_APPLICATION = "strategy_game.asgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+# DB_ENGINE=postgres switches to PostgreSQL configured from the POSTGRES_*
+# variables. Connections are kept open for DB_CONN_MAX_AGE seconds and
+# checked before reuse; SQLite connections are tuned with PRAGMAs on open.
+DB_ENGINE = os.environ.get("DB_ENGINE", "sqlite")
+DB_CONN_MAX_AGE = int(os.environ.get("DB_CONN_MAX_AGE", 60))
+
+if DB_ENGINE == "postgres":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.environ.get("POSTGRES_DB", "strategy_game"),
+            "USER": os.environ.get("POSTGRES_USER", "strategy_game"),
+            "PASSWORD": os.environ.get("POSTGRES_PASSWORD", ""),
+            "HOST": os.environ.get("POSTGRES_HOST", "localhost"),
+            "PORT": os.environ.get("POSTGRES_PORT", "5432"),
+            "CONN_MAX_AGE": DB_CONN_MAX_AGE,
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": {},
+        }
+    }
+    # Django 5.1+ can pool psycopg connections itself; pooling replaces
+    # persistent connections. On older versions put PgBouncer in front.
+    DB_POOL_MAX_SIZE = int(os.environ.get("DB_POOL_MAX_SIZE", 0))
+    if DB_POOL_MAX_SIZE:
+        if django.VERSION < (5, 1):
+            raise ImproperlyConfigured(
+                "DB_POOL_MAX_SIZE needs Django 5.1 or newer; "
+                "unset it and pool with PgBouncer instead"
+            )
+        DATABASES["default"]["OPTIONS"]["pool"] = {
+            "min_size": int(os.environ.get("DB_POOL_MIN_SIZE", 2)),
+            "max_size": DB_POOL_MAX_SIZE,
+            "timeout": 10,
+        }
+        DATABASES["default"]["CONN_MAX_AGE"] = 0
+else:
+    # WAL lets readers run alongside the single writer; busy_timeout (ms)
+    # makes a writer wait for the lock, and IMMEDIATE transactions take it
+    # up front so they never fail upgrading a read lock mid-transaction.
+    SQLITE_PRAGMAS = {
+        "journal_mode": "wal",
+        "synchronous": "normal",
+        "busy_timeout": 5000,
+        "cache_size": -20000,
+        "mmap_size": 134217728,
+        "temp_store": "memory",
+    }
+    DATABASES = {
+        "default": {
+            "ENGINE": "game.db.sqlite3",
+            "NAME": BASE_DIR / "db.sqlite3",
+            "CONN_MAX_AGE": DB_CONN_MAX_AGE,
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": {
+                "init_command": ";".join(f"PRAGMA {name} = {value}" for name, value in SQLITE_PRAGMAS.items()),
+                "transaction_mode": "IMMEDIATE",
+            },
+        }
     }
-}
+
+# Optional read replica for safe-method requests (see game.db.routers):
+# POSTGRES_REPLICA_HOST for PostgreSQL, SQLITE_REPLICA_NAME for a SQLite
+# copy kept in sync outside Django (e.g. LiteFS). Tests mirror the primary.
+_replica = {}
+if DB_ENGINE == "postgres" and os.environ.get("POSTGRES_REPLICA_HOST"):
+    _replica = {"HOST": os.environ["POSTGRES_REPLICA_HOST"]}
+elif DB_ENGINE != "postgres" and os.environ.get("SQLITE_REPLICA_NAME"):
+    _replica = {"NAME": os.environ["SQLITE_REPLICA_NAME"]}
+if _replica:
+    DATABASES["replica"] = {**DATABASES["default"], **_replica, "TEST": {"MIRROR": "default"}}
+
+DATABASE_ROUTERS = ["game.db.routers.PrimaryReplicaRouter"]
+
+# Reads stay on the primary this long after a client's own write; keep it
+# above the replica's worst replication lag
+GAME_REPLICA_PIN_SECONDS = 5
 
 
 # Password validation
@@ -165,6 +247,8 @@ LOGOUT_REDIRECT_URL = 'auth:login'
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
+    "game.middleware.CompressionMiddleware",
+    "game.middleware.ReplicaRoutingMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -178,5 +262,15 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = "strategy_game.urls"
 
+# Run queued jobs in-process on commit instead of waiting for a run_jobs worker
+GAME_JOBS_EAGER = False
+
+# Responses below this many bytes are not compressed
+GAME_COMPRESSION_MIN_SIZE = 1024
+
+# Stored responses for retried Idempotency-Key requests, per process
+GAME_IDEMPOTENCY_MAX_KEYS = 10000
+GAME_IDEMPOTENCY_TTL = 600
+
 # Whitenoise configuration
 STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"